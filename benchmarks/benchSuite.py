@@ -0,0 +1,252 @@
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+from datetime import datetime
+
+import pandas as pd
+
+from scriptFunctions import load_script_functions, SRC_DIRECTORY
+
+sys.path.insert(0, os.path.abspath(SRC_DIRECTORY))
+from scrapeGenerator import generate_scrapes, write_scrape_workbooks
+from dateSlice import sort_by_date
+from fileCatalog import clear_workbook_cache
+
+REPO_DIRECTORY = os.path.abspath(os.path.join(SRC_DIRECTORY, '..'))
+RESULTS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+DASHBOARD = os.path.join(REPO_DIRECTORY, 'src', 'medianCompWithoccupAndISOstats.py')
+LEGACY_DASHBOARD = os.path.join(REPO_DIRECTORY, 'src', 'newOccp.py')
+SORTER = os.path.join(REPO_DIRECTORY, 'data', 'DashboardTHKHA', 'Apsara', 'v2apsara-pricesorter.py')
+
+# Múltiplos do volume de hoje: tamanho n = n coletas de um ano cada (~42 mil linhas por coleta)
+SIZES = [1, 5]
+REPEAT = 3
+
+_modules = {}
+
+def _module(path):
+    if path not in _modules:
+        with contextlib.redirect_stderr(io.StringIO()):
+            _modules[path] = load_script_functions(path)
+    return _modules[path]
+
+def dashboard():
+    return _module(DASHBOARD)
+
+def legacy_dashboard():
+    return _module(LEGACY_DASHBOARD)
+
+def sorter():
+    return _module(SORTER)
+
+# Dados sintéticos de um tamanho; cada fixture é montado uma vez, só quando algum caso precisa dele
+def build_scrapes(fixtures):
+    return generate_scrapes(years=fixtures['size'], fetch_every_days=365)
+
+def build_workbook(fixtures):
+    # Todas as linhas de um hotel num único arquivo, como a entrada do sorter
+    scrapes = fixture(fixtures, 'scrapes')
+    path = os.path.join(fixtures['directory'], 'hotel.xlsx')
+    scrapes[scrapes['hotel_name'] == scrapes['hotel_name'].iloc[0]].to_excel(path, index=False)
+    return path
+
+def build_folder(fixtures):
+    folder = os.path.join(fixtures['directory'], 'DashboardTHKHA')
+    write_scrape_workbooks(fixture(fixtures, 'scrapes'), folder)
+    return folder
+
+def build_prices(fixtures):
+    # Frames no formato do load_price_data (Hotel, Date, Price), ordenados por data
+    prices = fixture(fixtures, 'scrapes')[['hotel_name', 'checkin_date', 'price']].copy()
+    prices.columns = ['Hotel', 'Date', 'Price']
+    prices = sort_by_date(prices)
+    first = prices['Hotel'] == prices['Hotel'].iloc[0]
+    return prices[first].reset_index(drop=True), prices[~first].reset_index(drop=True)
+
+def build_period(fixtures):
+    # Último ano de check-ins, o maior período do dashboard
+    end_date = fixture(fixtures, 'prices')[1]['Date'].max()
+    return end_date - pd.Timedelta(days=360), end_date
+
+def build_occupancy(fixtures):
+    checkin_data = dashboard().read_checkin_files(fixture(fixtures, 'folder'))
+    return checkin_data, dashboard().calculate_daily_occupancy(checkin_data)
+
+def build_middle_date(fixtures):
+    dates = fixture(fixtures, 'occupancy')[1].index
+    return dates[len(dates) // 2]
+
+FIXTURES = {
+    'scrapes': build_scrapes,
+    'workbook': build_workbook,
+    'folder': build_folder,
+    'prices': build_prices,
+    'period': build_period,
+    'occupancy': build_occupancy,
+    'middle_date': build_middle_date,
+}
+
+def fixture(fixtures, name):
+    if name not in fixtures:
+        fixtures[name] = FIXTURES[name](fixtures)
+    return fixtures[name]
+
+# Cada caso recebe os fixtures e devolve a função a medir; a preparação fica fora da medida
+def case_parse_workbook(fixtures):
+    workbook = fixture(fixtures, 'workbook')
+    return lambda: pd.read_excel(workbook)
+
+def case_process_hotel_file(fixtures):
+    workbook = fixture(fixtures, 'workbook')
+    process_hotel_file = sorter().process_hotel_file
+
+    def run():
+        # O sorter imprime cada planilha/aba; a saída não entra na medida
+        with contextlib.redirect_stdout(io.StringIO()):
+            return process_hotel_file(workbook)
+    return run
+
+def case_read_checkin_files(fixtures):
+    folder = fixture(fixtures, 'folder')
+    module = dashboard()
+
+    def run():
+        # read_workbook guarda as planilhas em memória; cada repetição mede a leitura a frio
+        clear_workbook_cache()
+        return module.calculate_daily_occupancy(module.read_checkin_files(folder))
+    return run
+
+def case_calculate_stats(fixtures):
+    competitors_df = fixture(fixtures, 'prices')[1]
+    start_date, end_date = fixture(fixtures, 'period')
+    return lambda: dashboard().calculate_stats(competitors_df, start_date, end_date)
+
+def case_get_hover_data(fixtures):
+    checkin_data, daily_occupancy = fixture(fixtures, 'occupancy')
+    date = fixture(fixtures, 'middle_date')
+    return lambda: legacy_dashboard().get_hover_data(date, daily_occupancy, checkin_data)
+
+def case_build_date_stats_index(fixtures):
+    checkin_data, daily_occupancy = fixture(fixtures, 'occupancy')
+    return lambda: dashboard().build_date_stats_index(daily_occupancy, checkin_data)
+
+def case_get_date_stats(fixtures):
+    checkin_data, daily_occupancy = fixture(fixtures, 'occupancy')
+    date_stats = dashboard().build_date_stats_index(daily_occupancy, checkin_data)
+    date = fixture(fixtures, 'middle_date')
+    return lambda: dashboard().get_date_stats(date_stats, date, daily_occupancy.columns)
+
+def case_create_excel_report(fixtures):
+    khaolak_df, competitors_df = fixture(fixtures, 'prices')
+    start_date, end_date = fixture(fixtures, 'period')
+    return lambda: dashboard().create_excel_report(khaolak_df, competitors_df, start_date, end_date)
+
+CASES = {
+    'parse_workbook': case_parse_workbook,
+    'process_hotel_file': case_process_hotel_file,
+    'read_checkin_files+calculate_daily_occupancy': case_read_checkin_files,
+    'calculate_stats': case_calculate_stats,
+    'get_hover_data': case_get_hover_data,
+    'build_date_stats_index': case_build_date_stats_index,
+    'get_date_stats': case_get_date_stats,
+    'create_excel_report': case_create_excel_report,
+}
+
+def time_case(function, repeat=REPEAT):
+    # Como o timeit: número de chamadas que leva ~0,2 s, repetido; vale o melhor tempo por chamada
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    times = [seconds / number for seconds in timer.repeat(repeat=repeat, number=number)]
+    return {'seconds': min(times), 'median_seconds': sorted(times)[len(times) // 2], 'number': number,
+            'repeat': repeat}
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIRECTORY, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return 'unknown'
+
+def run_suite(sizes=SIZES, cases=None, repeat=REPEAT):
+    cases = list(CASES) if cases is None else cases
+    results = []
+    for size in sizes:
+        directory = tempfile.mkdtemp(prefix=f'bench{size}_')
+        try:
+            fixtures = {'size': size, 'directory': directory}
+            for case in cases:
+                function = CASES[case](fixtures)
+                result = time_case(function, repeat)
+                result.update(case=case, size=size, rows=len(fixture(fixtures, 'scrapes')))
+                results.append(result)
+                print(f"{case:<45} size {size:>4} ({result['rows']:>9} rows): {result['seconds'] * 1000:>10.2f} ms")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'machine': platform.platform(),
+        'results': results,
+    }
+
+def save_results(report, directory=RESULTS_DIRECTORY):
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.fromisoformat(report['timestamp']).strftime('%Y%m%d-%H%M%S')
+    path = os.path.join(directory, f"{stamp}_{report['commit']}.json")
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    return path
+
+def latest_results(directory=RESULTS_DIRECTORY, exclude=None):
+    paths = sorted(path for path in glob.glob(os.path.join(directory, '*.json')) if path != exclude)
+    return paths[-1] if paths else None
+
+def compare_results(report, baseline):
+    # Tempo atual / tempo do baseline por caso e tamanho (>1 = mais lento)
+    key = ['case', 'size']
+    current = pd.DataFrame(report['results']).set_index(key)['seconds']
+    previous = pd.DataFrame(baseline['results']).set_index(key)['seconds']
+    comparison = pd.DataFrame({'baseline_ms': previous * 1000, 'current_ms': current * 1000}).dropna()
+    comparison['ratio'] = comparison['current_ms'] / comparison['baseline_ms']
+    return comparison
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingestion, sorting, aggregation and report export")
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)),
+                        help="comma-separated multiples of today's volume (e.g. 1,10,100)")
+    parser.add_argument('--cases', default=None, help=f"comma-separated subset of: {', '.join(CASES)}")
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--baseline', default=None, help="results file to compare against (default: latest saved)")
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    cases = args.cases.split(',') if args.cases else None
+    unknown = set(cases or []) - set(CASES)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+
+    baseline_path = args.baseline or latest_results()
+    report = run_suite(sizes, cases, args.repeat)
+    if not args.no_save:
+        print(f"\nResults saved to {save_results(report)}")
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {os.path.basename(baseline_path)} (commit {baseline['commit']}):")
+        print(compare_results(report, baseline).round(3).to_string())
+
+if __name__ == "__main__":
+    main()
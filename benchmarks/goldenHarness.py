@@ -0,0 +1,215 @@
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from scriptFunctions import load_script_revision
+from benchSuite import (REPO_DIRECTORY, RESULTS_DIRECTORY, DASHBOARD, SORTER, fixture, git_commit, dashboard,
+                        sorter)
+
+PRICE_DIRECTORY = os.path.join(REPO_DIRECTORY, 'data', 'DetailedPrices')
+SCRAPE_DIRECTORY = os.path.join(REPO_DIRECTORY, 'data', 'DashboardTHKHA')
+# Colunas do {hotel}_detailed_prices_*.xlsx que existiam antes das otimizações
+DETAILED_COLUMNS = ['checkin_date', 'price', 'room_name', 'occupancy', 'breakfast_included', 'refundable']
+STATS_PERIODS = [0, 30, 90, 180, 360]
+MAX_MISMATCHES = 50
+
+def baseline_revision():
+    return subprocess.run(['git', 'rev-list', '--max-parents=0', 'HEAD'], cwd=REPO_DIRECTORY,
+                          capture_output=True, text=True, check=True).stdout.split()[0][:7]
+
+def _quiet(function, *args):
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        return function(*args)
+
+def _timed(function, *args):
+    started = time.perf_counter()
+    result = _quiet(function, *args)
+    return result, time.perf_counter() - started
+
+def _cell(value):
+    # Mesma célula escrita de jeitos diferentes (3 vs 3.0, numpy vs Python) não é diferença
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return 'NaN'
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool):
+        value = float(value)
+        return str(int(value)) if value.is_integer() else repr(round(value, 9))
+    return str(value)
+
+def diff_frames(legacy, optimized, expected=None):
+    # Compara célula a célula (mesmos índices e colunas); expected marca as linhas em que uma
+    # diferença é mudança de regra conhecida e não regressão
+    index = legacy.index.union(optimized.index)
+    columns = legacy.columns.union(optimized.columns, sort=False)
+    legacy = legacy.reindex(index=index, columns=columns)
+    optimized = optimized.reindex(index=index, columns=columns)
+    left = legacy.map(_cell).to_numpy()
+    right = optimized.map(_cell).to_numpy()
+    rows, cols = np.nonzero(left != right)
+
+    expected_rows = np.zeros(len(index), dtype=bool) if expected is None else \
+        pd.Series(expected).reindex(index, fill_value=False).to_numpy(dtype=bool)
+    mismatches = pd.DataFrame({
+        'row': index[rows].map(_cell),
+        'column': columns[cols],
+        'legacy': left[rows, cols],
+        'optimized': right[rows, cols],
+        'expected': expected_rows[rows],
+    })
+    return {
+        'cells': int(left.size),
+        'mismatches': int(len(mismatches)),
+        'unexpected': int((~mismatches['expected']).sum()),
+        'samples': mismatches.sort_values('expected', kind='mergesort').head(MAX_MISMATCHES).to_dict('records'),
+    }
+
+def legacy_detailed_prices(legacy_module, file_path):
+    # O loop antigo: process_date_with_criteria_hierarchy data a data. O process_hotel_file antigo
+    # gravava 'Sold Out' com .loc numa coluna float, o que o pandas 3 recusa, então o frame é
+    # montado aqui a partir das mesmas tuplas
+    df = pd.read_excel(file_path)
+    df['checkin_date'] = pd.to_datetime(df['checkin_date']).dt.date
+    all_dates = pd.date_range(start=df['checkin_date'].min(), end=df['checkin_date'].max()).date
+    rows = [(date,) + tuple(legacy_module.process_date_with_criteria_hierarchy(df, date)) for date in all_dates]
+    return pd.DataFrame(rows, columns=['checkin_date', 'price', 'room_name', 'breakfast_included', 'refundable',
+                                       'occupancy'])
+
+# Cada comparação devolve (legacy, optimized, expected, legacy_seconds, optimized_seconds); legacy é a saída de
+# referência: a do código antigo ou, onde a regra mudou de propósito, a da regra nova calculada à parte
+def compare_sorter(legacy_module, files):
+    legacy_frames, optimized_frames, anomaly_dates = [], [], []
+    legacy_seconds = optimized_seconds = 0.0
+    for file_path in files:
+        legacy_detailed, seconds = _timed(legacy_detailed_prices, legacy_module, file_path)
+        legacy_seconds += seconds
+        (_, optimized_detailed, _), seconds = _timed(sorter().process_hotel_file, file_path)
+        optimized_seconds += seconds
+        if legacy_detailed.empty and optimized_detailed.empty:
+            continue
+        key = os.path.basename(file_path)
+        legacy_frames.append(legacy_detailed[DETAILED_COLUMNS].assign(file=key))
+        optimized_frames.append(optimized_detailed[DETAILED_COLUMNS].assign(file=key))
+        # Datas com preço anômalo em quarentena: o vencedor pode mudar de propósito
+        anomaly_dates.append(optimized_detailed['price_anomaly'].eq('yes').to_numpy())
+
+    def indexed(frames):
+        frame = pd.concat(frames, ignore_index=True)
+        frame.index = frame['file'] + ' ' + frame['checkin_date'].map(_cell)
+        return frame.drop(columns='file')
+    legacy, optimized = indexed(legacy_frames), indexed(optimized_frames)
+    expected = pd.Series(np.concatenate(anomaly_dates), index=optimized.index)
+    return legacy, optimized, expected, legacy_seconds, optimized_seconds
+
+def compare_calculate_stats(legacy_module, frames):
+    legacy_rows, optimized_rows = {}, {}
+    legacy_seconds = optimized_seconds = 0.0
+    for name, df in frames.items():
+        end_date = df['Date'].max()
+        for days in STATS_PERIODS:
+            start_date = end_date - pd.Timedelta(days=days)
+            key = f'{name} {days}d'
+            legacy_rows[key], seconds = _timed(legacy_module.calculate_stats, df, start_date, end_date)
+            legacy_seconds += seconds
+            optimized_rows[key], seconds = _timed(dashboard().calculate_stats, df, start_date, end_date)
+            optimized_seconds += seconds
+    return (pd.DataFrame.from_dict(legacy_rows, orient='index'), pd.DataFrame.from_dict(optimized_rows, orient='index'),
+            None, legacy_seconds, optimized_seconds)
+
+def reference_daily_occupancy(checkin_data):
+    # A regra nova escrita direto sobre as linhas, sem passar pelo inventoryIndex: ofertas distintas
+    # (quarto, ocupação) de cada hotel/data na coleta mais recente (coleta sem data só vale sozinha)
+    rows = checkin_data.dropna(subset=['checkin_date', 'Hotel', 'name', 'occupancy']).copy()
+    rows['date'] = pd.to_datetime(rows['checkin_date']).dt.normalize()
+    rows['fetch'] = pd.to_datetime(rows['fetch_date'], errors='coerce')
+    latest = rows.groupby(['date', 'Hotel'])['fetch'].transform('max')
+    rows = rows[(rows['fetch'] == latest) | latest.isna()]
+    offers = rows.drop_duplicates(subset=['date', 'Hotel', 'name', 'occupancy'])
+    return offers.groupby(['date', 'Hotel']).size().unstack('Hotel').fillna(0)
+
+def compare_daily_occupancy(legacy_module, checkin_data):
+    # A contagem mudou de regra (linhas brutas -> ofertas distintas), então a saída otimizada é comparada
+    # com a referência da regra nova, sem lista de datas esperadas; o código antigo só entra no tempo
+    _, legacy_seconds = _timed(legacy_module.calculate_daily_occupancy, checkin_data)
+    optimized, optimized_seconds = _timed(dashboard().calculate_daily_occupancy, checkin_data)
+    reference = reference_daily_occupancy(checkin_data)
+    reference.index.name = optimized.index.name = None
+    reference.columns.name = optimized.columns.name = None
+    return reference, optimized, None, legacy_seconds, optimized_seconds
+
+def repo_inputs():
+    files = sorted(glob.glob(os.path.join(SCRAPE_DIRECTORY, '*', '*.xlsx')))
+    khaolak_df, competitors_df, _ = _quiet(dashboard().load_price_data, PRICE_DIRECTORY)
+    checkin_data = _quiet(dashboard().read_checkin_files, SCRAPE_DIRECTORY)
+    return files, {'Khaolak': khaolak_df, 'Competitors': competitors_df}, checkin_data
+
+def synthetic_inputs(fixtures):
+    khaolak_df, competitors_df = fixture(fixtures, 'prices')
+    checkin_data = fixture(fixtures, 'occupancy')[0]
+    return [fixture(fixtures, 'workbook')], {'Khaolak': khaolak_df, 'Competitors': competitors_df}, checkin_data
+
+def run_harness(revision, datasets):
+    legacy_dashboard = load_script_revision(DASHBOARD, revision)
+    legacy_sorter = load_script_revision(SORTER, revision)
+    report = []
+    for dataset, (files, price_frames, checkin_data) in datasets:
+        comparisons = {
+            'process_date_with_criteria_hierarchy': lambda: compare_sorter(legacy_sorter, files),
+            'calculate_stats': lambda: compare_calculate_stats(legacy_dashboard, price_frames),
+            'calculate_daily_occupancy': lambda: compare_daily_occupancy(legacy_dashboard, checkin_data),
+        }
+        for case, compare in comparisons.items():
+            legacy, optimized, expected, legacy_seconds, optimized_seconds = compare()
+            result = diff_frames(legacy, optimized, expected)
+            result.update(case=case, dataset=dataset, legacy_seconds=legacy_seconds,
+                          optimized_seconds=optimized_seconds,
+                          speedup=legacy_seconds / optimized_seconds if optimized_seconds else None)
+            report.append(result)
+            print(f"{case:<38} {dataset:<12} {result['cells']:>8} cells  {result['mismatches']:>6} diffs "
+                  f"({result['unexpected']} unexpected)  legacy {legacy_seconds:8.3f} s  "
+                  f"optimized {optimized_seconds:8.3f} s  x{result['speedup'] or float('nan'):.1f}")
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare legacy and optimized outputs cell by cell")
+    parser.add_argument('--revision', default=None, help="git revision with the legacy code (default: first commit)")
+    parser.add_argument('--size', type=int, default=1, help="synthetic data size (multiples of today's volume)")
+    parser.add_argument('--skip-repo', action='store_true', help="only compare on synthetic data")
+    args = parser.parse_args()
+
+    revision = args.revision or baseline_revision()
+    print(f"Legacy code from {revision}, optimized code from the working tree ({git_commit()})\n")
+    directory = tempfile.mkdtemp(prefix='golden_')
+    try:
+        fixtures = {'size': args.size, 'directory': directory}
+        datasets = [] if args.skip_repo else [('repo', repo_inputs())]
+        datasets.append((f'synthetic x{args.size}', synthetic_inputs(fixtures)))
+        report = run_harness(revision, datasets)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    os.makedirs(RESULTS_DIRECTORY, exist_ok=True)
+    path = os.path.join(RESULTS_DIRECTORY, f"golden-{datetime.now().strftime('%Y%m%d-%H%M%S')}_{git_commit()}.json")
+    with open(path, 'w') as f:
+        json.dump({'legacy_revision': revision, 'commit': git_commit(), 'results': report}, f, indent=2,
+                  default=str)
+    print(f"\nReport saved to {path}")
+
+    if any(result['unexpected'] for result in report):
+        print("Unexpected differences found; see the samples in the report")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
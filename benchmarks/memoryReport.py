@@ -0,0 +1,94 @@
+import argparse
+import glob
+import json
+import os
+import sys
+
+import pandas as pd
+
+# Um estágio piora quando o pico cresce mais que THRESHOLD e mais que MIN_GROWTH_BYTES (ruído de alocações pequenas)
+THRESHOLD = 1.2
+MIN_GROWTH_BYTES = 5 * 1024 * 1024
+MEMORY_COLUMNS = ['traced_peak_bytes', 'traced_net_bytes', 'rss_growth_bytes']
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+def previous_report(path):
+    # Relatório anterior do mesmo script na mesma pasta (<script>_<data-hora>.json)
+    script = load_report(path)['script']
+    paths = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(path)), f'{script}_*.json')))
+    paths = [p for p in paths if os.path.abspath(p) != os.path.abspath(path)]
+    earlier = [p for p in paths if os.path.basename(p) < os.path.basename(path)]
+    return earlier[-1] if earlier else None
+
+def stage_table(report):
+    # Um estágio por linha: chamadas, tempo total e o pior pico entre as chamadas
+    stages = pd.DataFrame(report['stages'])
+    if stages.empty:
+        return pd.DataFrame(columns=['calls', 'seconds'] + MEMORY_COLUMNS)
+    for column in MEMORY_COLUMNS:
+        if column not in stages:
+            stages[column] = None
+        stages[column] = pd.to_numeric(stages[column])
+    grouped = stages.groupby('name', sort=False)
+    table = grouped[MEMORY_COLUMNS].max()
+    table.insert(0, 'seconds', grouped['seconds'].sum())
+    table.insert(0, 'calls', grouped.size())
+    return table
+
+def compare_reports(report, baseline, threshold=THRESHOLD, min_growth=MIN_GROWTH_BYTES):
+    current, previous = stage_table(report), stage_table(baseline)
+    comparison = pd.DataFrame({
+        'baseline_peak_mb': previous['traced_peak_bytes'] / 1e6,
+        'current_peak_mb': current['traced_peak_bytes'] / 1e6,
+        'baseline_rss_growth_mb': previous['rss_growth_bytes'] / 1e6,
+        'current_rss_growth_mb': current['rss_growth_bytes'] / 1e6,
+    })
+    comparison['peak_ratio'] = comparison['current_peak_mb'] / comparison['baseline_peak_mb']
+    growth = (current['traced_peak_bytes'] - previous['traced_peak_bytes']).reindex(comparison.index)
+    comparison['regression'] = (comparison['peak_ratio'] > threshold) & (growth > min_growth)
+    return comparison
+
+def top_allocators(report, stage, top=5):
+    # Maiores alocadores da chamada de pico do estágio
+    calls = [record for record in report['stages'] if record['name'] == stage and record.get('top_allocators')]
+    if not calls:
+        return pd.DataFrame(columns=['location', 'size_diff_bytes', 'count_diff'])
+    worst = max(calls, key=lambda record: record.get('traced_peak_bytes') or 0)
+    return pd.DataFrame(worst['top_allocators']).head(top)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-stage memory reports written with PERF_MEMORY_REPORT")
+    parser.add_argument('report', help="memory report to check (<script>_<stamp>.json)")
+    parser.add_argument('--baseline', default=None, help="report to compare against (default: previous run)")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help="peak ratio counted as a regression")
+    args = parser.parse_args()
+
+    report = load_report(args.report)
+    print(f"{report['script']} at {report['timestamp']}: peak RSS "
+          f"{(report['peak_rss_bytes'] or 0) / 1e6:.1f} MB, traced peak {(report['traced_peak_bytes'] or 0) / 1e6:.1f} MB")
+    stages = stage_table(report)
+    stages[MEMORY_COLUMNS] = stages[MEMORY_COLUMNS] / 1e6
+    print(stages.rename(columns=lambda column: column.replace('_bytes', '_mb')).round(3).to_string())
+
+    baseline_path = args.baseline or previous_report(args.report)
+    if not baseline_path:
+        print("\nNo earlier report to compare against.")
+        return
+    baseline = load_report(baseline_path)
+    comparison = compare_reports(report, baseline, args.threshold)
+    print(f"\nCompared with {os.path.basename(baseline_path)}:")
+    print(comparison.round(2).to_string())
+
+    regressions = comparison.index[comparison['regression'].fillna(False).astype(bool)]
+    for stage in regressions:
+        print(f"\nTop allocators in {stage}:")
+        print(top_allocators(report, stage).to_string(index=False))
+    if len(regressions):
+        print(f"\nMemory regressions in: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import ast
+import os
+import subprocess
+import sys
+import types
+
+SRC_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+def _top_level_blocks(source):
+    # Blocos que começam na coluna 0; um bloco com erro de sintaxe (como o main() do newOccp)
+    # é descartado sem perder o resto do arquivo. Decoradores viram blocos soltos e também saem,
+    # então funções com @st.cache_data/@st.fragment rodam sem cache, que é o que se quer medir
+    blocks, current = [], []
+    for line in source.splitlines():
+        if line and not line[0].isspace() and not line.startswith(('#', ')', ']', '}')) and current:
+            blocks.append('\n'.join(current))
+            current = []
+        current.append(line)
+    if current:
+        blocks.append('\n'.join(current))
+    return blocks
+
+def _keep(node):
+    # Só imports, funções e constantes em MAIÚSCULAS: nada de Streamlit rodando no nível do módulo
+    if isinstance(node, (ast.Import, ast.ImportFrom, ast.FunctionDef)):
+        return True
+    if isinstance(node, ast.Assign):
+        return all(isinstance(target, ast.Name) and target.id.isupper() for target in node.targets)
+    return False
+
+def load_script_functions(script_path, name=None):
+    # Carrega as funções de um script (dashboard ou sorter) como um módulo, sem executar o script
+    script_path = os.path.abspath(script_path)
+    with open(script_path, encoding='utf-8') as f:
+        source = f.read()
+    return load_script_source(source, script_path, name)
+
+def git_source(revision, script_path):
+    # Conteúdo do script numa revisão do git (ex.: a implementação antiga, para comparar saídas)
+    script_path = os.path.abspath(script_path)
+    repository = subprocess.run(['git', 'rev-parse', '--show-toplevel'], cwd=os.path.dirname(script_path),
+                                capture_output=True, text=True, check=True).stdout.strip()
+    relative_path = os.path.relpath(script_path, repository).replace(os.sep, '/')
+    return subprocess.run(['git', 'show', f'{revision}:{relative_path}'], cwd=repository,
+                          capture_output=True, text=True, check=True).stdout
+
+def load_script_revision(script_path, revision, name=None):
+    return load_script_source(git_source(revision, script_path), script_path,
+                              name or f"{os.path.splitext(os.path.basename(script_path))[0]}@{revision}")
+
+def load_script_source(source, script_path, name=None):
+    nodes = []
+    for block in _top_level_blocks(source):
+        try:
+            tree = ast.parse(block)
+        except SyntaxError:
+            continue
+        nodes += [node for node in tree.body if _keep(node)]
+
+    for directory in [os.path.abspath(SRC_DIRECTORY), os.path.dirname(script_path)]:
+        if directory not in sys.path:
+            sys.path.insert(0, directory)
+    module = types.ModuleType(name or os.path.splitext(os.path.basename(script_path))[0])
+    module.__file__ = script_path
+    exec(compile(ast.Module(body=nodes, type_ignores=[]), script_path, 'exec'), module.__dict__)
+    return module
@@ -1,7 +1,30 @@
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 import os
 import re
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'src'))
+from roomTypes import normalize_room_types
+from priceAnomalies import flag_price_anomalies
+from losCube import normalize_nightly_rate
+from perfSpans import (span, measure_frame, enable_span_logging, memory_profiling_requested, start_memory_profiling,
+                       write_memory_report)
+
+# Perfis de seleção da tarifa comparável. 'price' é o critério original do relatório;
+# os demais geram uma coluna extra de preço nos relatórios simples e detalhado.
+SELECTION_PROFILES = {
+    'price': {'label': None, 'types': ['Regular'], 'occupancy_order': [2, 3, 4, 5, 1],
+              'breakfast_included': None, 'refundable': None},
+    'price_refundable': {'label': 'Refundable', 'types': ['Regular'], 'occupancy_order': [2, 3, 4, 5, 1],
+                         'breakfast_included': None, 'refundable': 'yes'},
+    'price_breakfast': {'label': 'Breakfast', 'types': ['Regular'], 'occupancy_order': [2, 3, 4, 5, 1],
+                        'breakfast_included': 'yes', 'refundable': None},
+    'price_wholesaler': {'label': 'Incl. Wholesaler', 'types': ['Regular', 'Wholesaler'],
+                         'occupancy_order': [2, 3, 4, 5, 1], 'breakfast_included': None, 'refundable': None},
+}
+EXTRA_PROFILES = [profile for profile in SELECTION_PROFILES if SELECTION_PROFILES[profile]['label']]
 
 def remove_apostrophe(x):
     return x.lstrip("'") if isinstance(x, str) else x
@@ -34,50 +57,134 @@ def process_hotel_file(file_path):
         # Convert checkin_date to datetime and then to date (removing time component)
         df['checkin_date'] = pd.to_datetime(df['checkin_date']).dt.date
 
+        # Canonical room category shared across the compset hotels
+        df['room_category'] = normalize_room_types(df['name'])
+
+        # Per-night rate (the scraped price is the total for the stay), then screen scrape glitches
+        # (10x, zero prices) before picking the cheapest rate
+        df['numeric_price'] = pd.to_numeric(df['price'].map(remove_apostrophe), errors='coerce')
+        df = normalize_nightly_rate(df, price_column='numeric_price')
+        df = flag_price_anomalies(df, price_column='nightly_price')
+        anomaly_dates = set(df.loc[df['price_anomaly'], 'checkin_date'])
+
         # Create a date range for all days in the file
         min_date = df['checkin_date'].min()
         max_date = df['checkin_date'].max()
         all_dates = pd.date_range(start=min_date, end=max_date).date
         
+        # Select the winner of every profile for every date in a single pass
+        winners = select_profile_winners(df)
+        prices = df['nightly_price'].to_numpy()
+        profile_prices = (winners.assign(price=prices[winners['row'].to_numpy()])
+                          .pivot(index='checkin_date', columns='profile', values='price')
+                          .reindex(index=all_dates, columns=list(SELECTION_PROFILES)))
+        profile_prices = profile_prices.astype(object).where(profile_prices.notna(), 'Sold Out')
+
+        default_rows = (winners[winners['profile'] == 'price']
+                        .set_index('checkin_date')['row'].reindex(all_dates))
+        details = df.iloc[default_rows.dropna().astype(int)]
+        details = details.set_index(default_rows.dropna().index)
+        details = details.reindex(all_dates)[['name', 'room_category', 'occupancy', 'breakfast_included', 'refundable']]
+        details = details.astype(object).where(details.notna(), 'N/A')
+
         # Create DataFrames with all dates
         result_df = pd.DataFrame({'checkin_date': all_dates})
-        detailed_df = pd.DataFrame({'checkin_date': all_dates})
-
-        # Process each date
-        for date in all_dates:
-            price, room_name, breakfast, refundable, occupancy = process_date_with_criteria_hierarchy(df, date)
-            result_df.loc[result_df['checkin_date'] == date, 'price'] = price
-            detailed_df.loc[detailed_df['checkin_date'] == date, 'price'] = price
-            detailed_df.loc[detailed_df['checkin_date'] == date, 'room_name'] = room_name
-            detailed_df.loc[detailed_df['checkin_date'] == date, 'occupancy'] = occupancy
-            detailed_df.loc[detailed_df['checkin_date'] == date, 'breakfast_included'] = breakfast
-            detailed_df.loc[detailed_df['checkin_date'] == date, 'refundable'] = refundable
+        result_df['price'] = profile_prices['price'].to_numpy()
+        detailed_df = result_df.copy()
+        detailed_df['room_name'] = details['name'].to_numpy()
+        detailed_df['room_category'] = details['room_category'].to_numpy()
+        detailed_df['occupancy'] = details['occupancy'].to_numpy()
+        detailed_df['breakfast_included'] = details['breakfast_included'].to_numpy()
+        detailed_df['refundable'] = details['refundable'].to_numpy()
+        detailed_df['price_anomaly'] = np.where(result_df['checkin_date'].isin(anomaly_dates), 'yes', 'no')
+        for profile in EXTRA_PROFILES:
+            result_df[profile] = profile_prices[profile].to_numpy()
+            detailed_df[profile] = profile_prices[profile].to_numpy()
 
         return result_df, detailed_df, hotel_name
     except Exception as e:
         print(f"Error processing {file_path}: {str(e)}")
         return pd.DataFrame(), pd.DataFrame(), None
 
-def process_date_with_criteria_hierarchy(df, date):
-    occupancy_order = [2, 3, 4, 5, 1]
-    
-    for occupancy in occupancy_order:
-        filtered_df = df[(df['checkin_date'] == date) & 
-                         (df['type'] == 'Regular') & 
-                         (df['occupancy'] == occupancy)]
-        
-        if not filtered_df.empty:
-            # Find the lowest price
-            min_price_row = filtered_df.loc[filtered_df['price'].idxmin()]
-            return (remove_apostrophe(min_price_row['price']), 
-                    min_price_row['name'], 
-                    min_price_row['breakfast_included'], 
-                    min_price_row['refundable'],
-                    min_price_row['occupancy'])
-    
-    return 'Sold Out', 'N/A', 'N/A', 'N/A', 'N/A'
+def select_profile_winners(df, profiles=SELECTION_PROFILES):
+    # One candidate table for all profiles, then a single sort + dedupe picks, for each
+    # (profile, date), the first occupancy in the profile order and the lowest price
+    sort_price = df['nightly_price']
+    candidates = []
+    for profile, criteria in profiles.items():
+        rank = df['occupancy'].map({occupancy: i for i, occupancy in enumerate(criteria['occupancy_order'])})
+        mask = df['type'].isin(criteria['types']) & rank.notna() & sort_price.notna()
+        if 'price_anomaly' in df.columns:
+            mask &= ~df['price_anomaly']
+        for column in ['breakfast_included', 'refundable']:
+            if criteria[column] is not None:
+                mask &= df[column] == criteria[column]
+        mask = mask.to_numpy()
+        candidates.append(pd.DataFrame({
+            'profile': profile,
+            'row': np.flatnonzero(mask),
+            'checkin_date': df['checkin_date'].to_numpy()[mask],
+            'rank': rank.to_numpy()[mask],
+            'sort_price': sort_price.to_numpy()[mask],
+        }))
+
+    candidates = pd.concat(candidates, ignore_index=True)
+    candidates.sort_values(['profile', 'checkin_date', 'rank', 'sort_price'], kind='mergesort', inplace=True)
+    return candidates.drop_duplicates(subset=['profile', 'checkin_date'], keep='first')
+
+def combine_results(file_results):
+    # Junta os (df, detailed_df, hotel_name) de process_hotel_file na ordem dos arquivos: uma linha por
+    # data (a mais barata) e colunas renomeadas. O watcher usa o mesmo caminho só com o arquivo novo reprocessado
+    frames = [(df, detailed_df) for df, detailed_df, _ in file_results if not df.empty]
+    if not frames:
+        return None, None, None
+    hotel_name = next((name for _, _, name in file_results if name is not None), None)
+    if hotel_name is None:
+        print("Warning: Could not determine hotel name from files. Using 'Unknown Hotel'.")
+        hotel_name = "Unknown Hotel"
+
+    with span('concat results') as record:
+        all_results = pd.concat([df for df, _ in frames], ignore_index=True)
+        all_detailed_results = measure_frame(record, pd.concat([detailed_df for _, detailed_df in frames],
+                                                               ignore_index=True))
+
+    # Process results for both DataFrames
+    for df in [all_results, all_detailed_results]:
+        with span('sort and deduplicate') as record:
+            # Convert 'Sold Out' to a high number for sorting purposes
+            df['sort_price'] = pd.to_numeric(df['price'], errors='coerce').fillna(float('inf'))
+
+            # Sort the results by date and price
+            df.sort_values(['checkin_date', 'sort_price'], inplace=True)
+
+            # Remove any duplicate dates, keeping the cheapest price
+            df.drop_duplicates(subset=['checkin_date'], keep='first', inplace=True)
+
+            # Drop the temporary 'sort_price' column
+            df.drop(columns=['sort_price'], inplace=True)
+            measure_frame(record, df)
+
+    # Rename columns for the simple report
+    profile_labels = [SELECTION_PROFILES[profile]['label'] for profile in EXTRA_PROFILES]
+    all_results.columns = ['Date', hotel_name] + [f'{hotel_name} ({label})' for label in profile_labels]
+
+    # Rename and reorder columns for the detailed report
+    detailed_columns = ['Date', 'Price', 'Room Name', 'Room Category', 'Occupancy', 'Breakfast Included', 'Refundable',
+                        'Price Anomaly']
+    detailed_columns += [f'Price ({label})' for label in profile_labels]
+    all_detailed_results.columns = detailed_columns
+    all_detailed_results = all_detailed_results[detailed_columns]
+
+    # Convert Date column to string format 'YYYY-MM-DD' for both DataFrames
+    all_results['Date'] = all_results['Date'].astype(str)
+    all_detailed_results['Date'] = all_detailed_results['Date'].astype(str)
+    return all_results, all_detailed_results, hotel_name
 
 def main():
+    enable_span_logging()
+    # PERF_MEMORY_REPORT=<pasta>: pico de RSS e maiores alocadores por estágio, gravados num relatório
+    if memory_profiling_requested():
+        start_memory_profiling()
     directory = "./THKHA/THKHA-codes-06/Bhandari/"   # Replace with the actual directory path
 
     print(f"Looking for files in directory: {directory}")
@@ -93,64 +200,35 @@ def main():
         return
 
     # Process all files
-    all_results = pd.DataFrame()
-    all_detailed_results = pd.DataFrame()
-    hotel_name = None
+    file_results = []
     for file in files:
         file_path = os.path.join(directory, file)
-        df, detailed_df, file_hotel_name = process_hotel_file(file_path)
-        if not df.empty:
-            all_results = pd.concat([all_results, df], ignore_index=True)
-            all_detailed_results = pd.concat([all_detailed_results, detailed_df], ignore_index=True)
-        if hotel_name is None and file_hotel_name is not None:
-            hotel_name = file_hotel_name
-
-    if all_results.empty:
+        with span('process_hotel_file', file=file) as record:
+            file_results.append(process_hotel_file(file_path))
+            measure_frame(record, file_results[-1][1])
+
+    all_results, all_detailed_results, hotel_name = combine_results(file_results)
+    if all_results is None:
         print("No data found matching any criteria for any of the files.")
         return
 
-    if hotel_name is None:
-        print("Warning: Could not determine hotel name from files. Using 'Unknown Hotel'.")
-        hotel_name = "Unknown Hotel"
-
-    # Process results for both DataFrames
-    for df in [all_results, all_detailed_results]:
-        # Convert 'Sold Out' to a high number for sorting purposes
-        df['sort_price'] = pd.to_numeric(df['price'], errors='coerce').fillna(float('inf'))
-
-        # Sort the results by date and price
-        df.sort_values(['checkin_date', 'sort_price'], inplace=True)
-
-        # Remove any duplicate dates, keeping the cheapest price
-        df.drop_duplicates(subset=['checkin_date'], keep='first', inplace=True)
-
-        # Drop the temporary 'sort_price' column
-        df.drop(columns=['sort_price'], inplace=True)
-
-    # Rename columns for the simple report
-    all_results.columns = ['Date', hotel_name]
-
-    # Rename and reorder columns for the detailed report
-    all_detailed_results.columns = ['Date', 'Price', 'Room Name', 'Occupancy', 'Breakfast Included', 'Refundable']
-    all_detailed_results = all_detailed_results[['Date', 'Price', 'Room Name', 'Occupancy', 'Breakfast Included', 'Refundable']]
-
-    # Convert Date column to string format 'YYYY-MM-DD' for both DataFrames
-    all_results['Date'] = all_results['Date'].astype(str)
-    all_detailed_results['Date'] = all_detailed_results['Date'].astype(str)
-
     # Save the results to new Excel files
     current_date = datetime.now().strftime("%Y%m%d")
     simple_output_file_path = f'{hotel_name}_prices_{current_date}.xlsx'
     detailed_output_file_path = f'{hotel_name}_detailed_prices_{current_date}.xlsx'
 
     try:
-        all_results.to_excel(simple_output_file_path, index=False, engine='openpyxl')
+        with span('to_excel', file=simple_output_file_path):
+            all_results.to_excel(simple_output_file_path, index=False, engine='openpyxl')
         print(f"Simple results saved to {simple_output_file_path}")
         
-        all_detailed_results.to_excel(detailed_output_file_path, index=False, engine='openpyxl')
+        with span('to_excel', file=detailed_output_file_path):
+            all_detailed_results.to_excel(detailed_output_file_path, index=False, engine='openpyxl')
         print(f"Detailed results saved to {detailed_output_file_path}")
     except Exception as e:
         print(f"Error saving results: {str(e)}")
 
+    write_memory_report(os.path.splitext(os.path.basename(__file__))[0])
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
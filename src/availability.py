@@ -0,0 +1,74 @@
+import pandas as pd
+import numpy as np
+from collections import namedtuple
+
+# sold_out[h, d] = True quando o hotel h não tinha tarifa na data dates[d]; observed[h, d] = True quando a
+# coleta do hotel cobre a data (fora da cobertura a disponibilidade é desconhecida, não esgotada)
+Availability = namedtuple('Availability', ['sold_out', 'observed', 'hotels', 'dates'])
+
+def availability_from_frame(df, hotel_column='Hotel', date_column='Date', price_column='Price'):
+    # Uma linha por hotel/data; preço vazio (ex.: "Sold Out" limpo pelo clean_price) = esgotado
+    dates = pd.to_datetime(df[date_column]).dt.normalize()
+    hotel_codes, hotels = pd.factorize(df[hotel_column], sort=True)
+    all_dates = pd.date_range(dates.min(), dates.max())
+    date_codes = ((dates - all_dates[0]).dt.days).to_numpy()
+
+    # Só datas com linha do hotel contam; sem linha (arquivo que termina antes) fica desconhecida
+    observed = np.zeros((len(hotels), len(all_dates)), dtype=bool)
+    observed[hotel_codes, date_codes] = True
+    sold_out = np.zeros_like(observed)
+    missing_price = df[price_column].isna().to_numpy()
+    sold_out[hotel_codes[missing_price], date_codes[missing_price]] = True
+    # Uma tarifa na data (ex.: dois arquivos do mesmo hotel) vence o "Sold Out"
+    available = ~missing_price
+    sold_out[hotel_codes[available], date_codes[available]] = False
+    return Availability(sold_out, observed, pd.Index(hotels), all_dates)
+
+def slice_availability(availability, start_date=None, end_date=None):
+    start = 0 if start_date is None else availability.dates.searchsorted(pd.Timestamp(start_date), side='left')
+    end = len(availability.dates) if end_date is None else \
+        availability.dates.searchsorted(pd.Timestamp(end_date), side='right')
+    return availability._replace(sold_out=availability.sold_out[:, start:end],
+                                 observed=availability.observed[:, start:end], dates=availability.dates[start:end])
+
+def market_compression(availability):
+    # Fração esgotada entre os hotéis com cobertura em cada data (NaN sem nenhum)
+    observed = availability.observed.sum(axis=0)
+    compression = np.divide(availability.sold_out.sum(axis=0), observed, out=np.full(len(observed), np.nan),
+                            where=observed > 0)
+    return pd.Series(compression, index=availability.dates, name='Market Compression')
+
+def first_sold_out_lead_time(availability, fetch_date=None):
+    # Dias entre a coleta e a primeira data esgotada de cada hotel (NaN se nunca esgotou ou sem data de coleta).
+    # fetch_date: data da coleta, uma para todos ou uma Series por hotel
+    if isinstance(fetch_date, pd.Series):
+        fetch_dates = pd.DatetimeIndex(pd.to_datetime(fetch_date, errors='coerce').reindex(availability.hotels))
+    else:
+        fetch_dates = pd.DatetimeIndex([pd.Timestamp(fetch_date)] * len(availability.hotels))
+    first = availability.sold_out.argmax(axis=1)
+    lead_time = (availability.dates[first] - fetch_dates).days.to_numpy().astype(np.float64)
+    lead_time[~availability.sold_out.any(axis=1)] = np.nan
+    return pd.Series(lead_time, index=availability.hotels, name='First Sold Out (days)')
+
+def sold_out_streaks(availability):
+    # Sequências de datas esgotadas consecutivas, via diferenças na matriz com borda
+    padded = np.pad(availability.sold_out.astype(np.int8), ((0, 0), (1, 1)))
+    changes = np.diff(padded, axis=1)
+    start_hotels, starts = np.nonzero(changes == 1)
+    _, ends = np.nonzero(changes == -1)
+    return pd.DataFrame({
+        'Hotel': availability.hotels[start_hotels],
+        'Start': availability.dates[starts],
+        'End': availability.dates[ends - 1],
+        'Days': ends - starts,
+    })
+
+def availability_summary(availability, fetch_date=None):
+    streaks = sold_out_streaks(availability)
+    summary = pd.DataFrame({
+        'Observed Days': availability.observed.sum(axis=1),
+        'Sold Out Days': availability.sold_out.sum(axis=1),
+        'First Sold Out (days)': first_sold_out_lead_time(availability, fetch_date),
+    }, index=availability.hotels)
+    summary['Longest Streak'] = streaks.groupby('Hotel')['Days'].max().reindex(summary.index).fillna(0).astype(int)
+    return summary
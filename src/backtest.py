@@ -0,0 +1,147 @@
+import pandas as pd
+import numpy as np
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from trendFit import days_since, fit_trend, predict_trend
+from seasonalForecast import fit_seasonal, predict_seasonal
+from compsetTable import read_scrape_files
+from priceAnomalies import flag_price_anomalies, quarantine_anomalies
+from inventoryIndex import daily_availability_index
+from perfSpans import span, measure_frame, enable_span_logging
+
+HORIZONS = [1, 7, 14, 30]
+MIN_TRAIN_DAYS = 90
+STEP_DAYS = 7
+
+# Cada modelo recebe o histórico até a origem (Series por data, sem NaN) e as datas a prever
+def forecast_naive(train, dates):
+    return np.full(len(dates), train.iloc[-1], dtype=np.float64)
+
+def forecast_seasonal_naive(train, dates):
+    # Último valor observado no mesmo dia da semana
+    weeks = np.ceil((dates - train.index.max()).days / 7).astype(int)
+    return train.reindex(dates - pd.to_timedelta(weeks * 7, unit='D')).to_numpy(dtype=np.float64)
+
+def forecast_linear(train, dates):
+    # A mesma reta do fig_occupancy: dias desde a primeira data do histórico
+    model = fit_trend(days_since(train.index), train.to_numpy())
+    return predict_trend(model, days_since(dates, train.index.min()))
+
+def forecast_seasonal(train, dates):
+    return predict_seasonal(fit_seasonal(train), dates)
+
+MODELS = {
+    'naive': forecast_naive,
+    'seasonal_naive': forecast_seasonal_naive,
+    'linear': forecast_linear,
+    'seasonal': forecast_seasonal,
+}
+
+def rolling_origins(dates, min_train_days=MIN_TRAIN_DAYS, step_days=STEP_DAYS):
+    # Uma origem a cada step_days, depois de min_train_days de histórico e antes da última data
+    dates = pd.DatetimeIndex(dates)
+    if len(dates) == 0:
+        return pd.DatetimeIndex([])
+    return pd.date_range(dates.min() + pd.Timedelta(days=min_train_days), dates.max() - pd.Timedelta(days=1),
+                         freq=f'{step_days}D')
+
+def _backtest_series(task):
+    # Todas as origens de um (hotel, modelo); roda num processo do pool
+    hotel, model_name, series, horizons, min_train_days, step_days = task
+    series = series.dropna().sort_index()
+    forecast = MODELS[model_name]
+    rows = []
+    for origin in rolling_origins(series.index, min_train_days, step_days):
+        train = series.loc[:origin]
+        targets = origin + pd.to_timedelta(horizons, unit='D')
+        actual = series.reindex(targets).to_numpy(dtype=np.float64)
+        if len(train) < 2 or np.isnan(actual).all():
+            continue
+        try:
+            predicted = forecast(train, targets)
+        except Exception as e:
+            print(f"Error forecasting {hotel} with {model_name} at {origin.date()}: {str(e)}")
+            continue
+        for horizon, a, p in zip(horizons, actual, predicted):
+            if not np.isnan(a):
+                rows.append((hotel, model_name, origin, horizon, a, p))
+    return rows
+
+def backtest(frame, models=None, horizons=HORIZONS, min_train_days=MIN_TRAIN_DAYS, step_days=STEP_DAYS,
+             workers=None):
+    # frame: data x hotel. As tarefas (hotel, modelo) são distribuídas num pool de processos;
+    # workers=1 roda tudo no processo atual
+    models = list(MODELS) if models is None else list(models)
+    tasks = [(hotel, model_name, frame[hotel], list(horizons), min_train_days, step_days)
+             for hotel in frame.columns for model_name in models]
+    if workers == 1:
+        results = map(_backtest_series, tasks)
+        rows = [row for result in results for row in result]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            rows = [row for result in executor.map(_backtest_series, tasks) for row in result]
+    return pd.DataFrame(rows, columns=['hotel', 'model', 'origin', 'horizon', 'actual', 'forecast'])
+
+def backtest_summary(errors):
+    # MAE e MAPE por hotel, modelo e horizonte; MAPE ignora os dias com valor real zero
+    errors = errors.assign(abs_error=(errors['actual'] - errors['forecast']).abs())
+    nonzero = errors['actual'] != 0
+    errors['ape'] = (errors['abs_error'] / errors['actual'].abs()).where(nonzero) * 100
+    summary = errors.groupby(['hotel', 'model', 'horizon']).agg(
+        MAE=('abs_error', 'mean'),
+        MAPE=('ape', 'mean'),
+        Folds=('abs_error', 'size'),
+    )
+    return summary.reset_index()
+
+def model_ranking(summary):
+    # Média entre hotéis por modelo e horizonte: o menor MAPE indica o modelo a usar
+    return summary.pivot_table(index='model', columns='horizon', values='MAPE', aggfunc='mean')
+
+def build_backtest_series(scrapes):
+    availability = daily_availability_index(scrapes, hotel_column='hotel_name')
+    price = scrapes.groupby(['checkin_date', 'hotel_name'], observed=True)['nightly_price'].median()
+    return {
+        'Available Rooms': availability,
+        'Median Nightly Price': price.unstack('hotel_name'),
+    }
+
+def main():
+    main_directory = "./data/DashboardTHKHA/"   # Replace with the actual directory path
+    output_directory = "./data/Backtests/"
+    enable_span_logging()
+
+    print(f"Looking for scrape files in: {main_directory}")
+    with span('read_scrape_files') as record:
+        scrapes = measure_frame(record, read_scrape_files(main_directory))
+    with span('flag_price_anomalies') as record:
+        scrapes, quarantined = quarantine_anomalies(flag_price_anomalies(scrapes))
+        measure_frame(record, scrapes)
+    print(f"Loaded {len(scrapes)} rows for {scrapes['hotel_name'].nunique()} hotels "
+          f"({len(quarantined)} anomalous price rows quarantined)")
+
+    summaries = {}
+    with span('build_backtest_series'):
+        series = build_backtest_series(scrapes)
+    for metric, frame in series.items():
+        started = time.perf_counter()
+        with span('backtest', metric=metric) as record:
+            errors = measure_frame(record, backtest(frame))
+        summaries[metric] = backtest_summary(errors)
+        print(f"\n{metric}: {len(errors)} forecasts in {time.perf_counter() - started:.1f} s")
+        print("MAPE (%) by model and horizon (days), mean over hotels:")
+        print(model_ranking(summaries[metric]).round(2))
+
+    os.makedirs(output_directory, exist_ok=True)
+    output_file_path = os.path.join(output_directory, f"backtest-{pd.Timestamp.now().strftime('%Y%m%d')}.xlsx")
+    try:
+        with pd.ExcelWriter(output_file_path, engine='openpyxl') as writer:
+            for metric, summary in summaries.items():
+                summary.to_excel(writer, sheet_name=metric[:31], index=False)
+        print(f"\nBacktest saved to {output_file_path}")
+    except Exception as e:
+        print(f"Error saving backtest: {str(e)}")
+
+if __name__ == "__main__":
+    main()
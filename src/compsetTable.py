@@ -0,0 +1,119 @@
+import pandas as pd
+import os
+
+from priceTensor import build_price_tensor, tensor_to_compset
+from losCube import normalize_nightly_rate
+from roomTypes import normalize_room_types
+from priceAnomalies import flag_price_anomalies, quarantine_anomalies
+from fileCatalog import catalog_files
+from perfSpans import span, measure_frame, enable_span_logging
+
+SOLD_OUT = 'Sold Out'
+SCRAPE_COLUMNS = ['hotel_name', 'type', 'name', 'occupancy', 'price', 'checkin_date',
+                  'breakfast_included', 'refundable']
+
+# Ordem das colunas usada no arquivo thkha-compset
+COMPSET_HOTELS = [
+    'Khaolak Laguna Resort',
+    'Moracea by Khao Lak Resort',
+    'Khaolak Merlin Resort',
+    'The Sands Khao Lak by Katathani - SHA Extra Plus',
+    'Kalima Resort and Villas Khao Lak',
+    'Ramada Resort by Wyndham Khao Lak',
+    'Apsara Beachfront Resort & Villa - SHA Extra Plus',
+    'Khaolak Bhandari Resort & Spa - SHA Extra Plus',
+]
+
+def clean_scrape_prices(prices):
+    # Mesma regra do remove_apostrophe dos sorters, mas para a coluna inteira
+    if prices.dtype == object or pd.api.types.is_string_dtype(prices):
+        prices = prices.astype(str).str.lstrip("'")
+    return pd.to_numeric(prices, errors='coerce')
+
+def read_scrape_files(main_directory, hotels=None, start_date=None, end_date=None):
+    # O catálogo diz quais planilhas cobrem o período/hotéis; as outras nem são abertas
+    scrape_dfs = []
+    for file_path in catalog_files(main_directory, kind='scrape', hotels=hotels,
+                                   start_date=start_date, end_date=end_date):
+        try:
+            df = pd.read_excel(file_path)
+        except Exception as e:
+            print(f"Error processing {file_path}: {str(e)}")
+            continue
+        if not all(col in df.columns for col in SCRAPE_COLUMNS):
+            continue
+        scrape_dfs.append(df)
+
+    if not scrape_dfs:
+        raise ValueError(f"No scrape files with the required columns found in {main_directory}")
+
+    scrapes = pd.concat(scrape_dfs, ignore_index=True)
+    scrapes['checkin_date'] = pd.to_datetime(scrapes['checkin_date']).dt.normalize()
+    scrapes['price'] = clean_scrape_prices(scrapes['price'])
+    scrapes['hotel_name'] = scrapes['hotel_name'].astype('category')
+    scrapes['room_category'] = normalize_room_types(scrapes['name'])
+    return normalize_nightly_rate(scrapes)
+
+def order_hotels(hotels):
+    ordered = [h for h in COMPSET_HOTELS if h in hotels]
+    return ordered + sorted(h for h in hotels if h not in ordered)
+
+def write_compset(matrix, output_file_path):
+    out = matrix.astype(object).where(matrix.notna(), SOLD_OUT)
+    out.index = out.index.strftime('%Y-%m-%d')
+    out.index.name = 'Date'
+    out.reset_index().to_excel(output_file_path, index=False, engine='openpyxl')
+
+def read_compset(file_path):
+    # "Sold Out" vira NaN já no parser, então as colunas chegam numéricas
+    df = pd.read_excel(file_path, na_values=[SOLD_OUT])
+    df['Date'] = pd.to_datetime(df['Date'])
+    matrix = df.set_index('Date').astype('float64')
+    sold_out = matrix.isna().to_numpy()
+    return matrix, sold_out
+
+def compset_file_name(matrix):
+    first = matrix.index.min().strftime('%Y%m%d')
+    last = matrix.index.max().strftime('%Y%m%d')
+    return f"thkha-compset-{first}_{last}.xlsx"
+
+def main():
+    main_directory = "./data/DashboardTHKHA/"   # Replace with the actual directory path
+    # Pasta própria: o thkha-compset em Dados é a referência montada à mão e não pode ser sobrescrito
+    output_directory = "./data/Compset/"
+    enable_span_logging()
+
+    print(f"Looking for scrape files in: {main_directory}")
+    with span('read_scrape_files') as record:
+        scrapes = measure_frame(record, read_scrape_files(main_directory))
+    print(f"Loaded {len(scrapes)} rows for {scrapes['hotel_name'].nunique()} hotels")
+
+    with span('flag_price_anomalies') as record:
+        scrapes, quarantined = quarantine_anomalies(flag_price_anomalies(scrapes))
+        measure_frame(record, scrapes)
+    print(f"Quarantined {len(quarantined)} anomalous price rows")
+
+    # O compset começa no dia da coleta (fetch_date), como o arquivo montado à mão; sem a coluna, na primeira data
+    start_date = None
+    if 'fetch_date' in scrapes.columns:
+        start_date = pd.to_datetime(scrapes['fetch_date'], errors='coerce').min()
+        start_date = None if pd.isna(start_date) else start_date
+    with span('build_price_tensor'):
+        price_tensor = build_price_tensor(scrapes, start_date=start_date, price_column='nightly_price')
+    with span('tensor_to_compset') as record:
+        matrix = measure_frame(record, tensor_to_compset(price_tensor, hotels=order_hotels(price_tensor.hotels)))
+
+    output_file_path = os.path.join(output_directory, compset_file_name(matrix))
+    if os.path.exists(output_file_path):
+        print(f"Error saving compset: {output_file_path} already exists; remove it to rebuild")
+        return
+    try:
+        os.makedirs(output_directory, exist_ok=True)
+        with span('write_compset', file=output_file_path):
+            write_compset(matrix, output_file_path)
+        print(f"Compset saved to {output_file_path}")
+    except Exception as e:
+        print(f"Error saving compset: {str(e)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import pandas as pd
+from datetime import date, datetime
+
+def sort_by_date(df, date_column='Date'):
+    # Ordenado uma vez na carga; depois todo filtro de período vira busca binária
+    df = df.copy()
+    df[date_column] = pd.to_datetime(df[date_column])
+    return df.sort_values(date_column, kind='mergesort').reset_index(drop=True)
+
+def is_date_sorted(df, date_column='Date'):
+    return df[date_column].is_monotonic_increasing
+
+def _bound(value, side):
+    # datetime.date (dos date_input) cobre o dia inteiro, como as comparações com .dt.date faziam
+    timestamp = pd.Timestamp(value)
+    if side == 'right' and isinstance(value, date) and not isinstance(value, datetime):
+        return timestamp + pd.Timedelta(days=1), 'left'
+    return timestamp, side
+
+def date_bounds(dates, start_date=None, end_date=None):
+    # Posições [início, fim) do período em uma coluna/índice de datas ordenado
+    start = 0
+    end = len(dates)
+    if start_date is not None:
+        value, side = _bound(start_date, 'left')
+        start = dates.searchsorted(value, side=side)
+    if end_date is not None:
+        value, side = _bound(end_date, 'right')
+        end = dates.searchsorted(value, side=side)
+    return start, max(start, end)
+
+def date_slice(df, start_date=None, end_date=None, date_column='Date'):
+    # Mesmo resultado que (df[col] >= início) & (df[col] <= fim), sem varrer nem copiar o frame
+    start, end = date_bounds(df[date_column], start_date, end_date)
+    return df.iloc[start:end]
@@ -0,0 +1,99 @@
+import pandas as pd
+import numpy as np
+from collections import namedtuple
+
+GROUP_KEYS = ['hotel_name', 'day', 'length_stay', 'deal', 'deal_name']
+NO_DEAL_NAME = 'No deal name'
+# Um bin por ponto percentual: como o 'discount %' da coleta é inteiro, os quantis saem exatos
+DISCOUNT_BINS = np.arange(0, 101)
+DESCRIBE_COLUMNS = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+# summary: count/mean/std/min/max por grupo; histogram: contagem por bin de desconto por grupo
+DiscountStats = namedtuple('DiscountStats', ['summary', 'histogram'])
+
+def build_discount_stats(df):
+    data = pd.DataFrame({
+        'hotel_name': df['hotel_name'].astype(str),
+        'day': pd.to_datetime(df['checkin_date']).dt.normalize(),
+        'length_stay': df['length_stay'] if 'length_stay' in df.columns else 1,
+        'deal': df['deal'].fillna('no'),
+        'deal_name': df['deal_name'].astype(object).where(df['deal_name'].notna(), NO_DEAL_NAME),
+        'discount': pd.to_numeric(df['discount %'], errors='coerce'),
+    }).dropna(subset=['discount'])
+    data['bin'] = np.clip(data['discount'].round(), DISCOUNT_BINS[0], DISCOUNT_BINS[-1]).astype('int64')
+
+    grouped = data.groupby(GROUP_KEYS, sort=True)
+    summary = grouped['discount'].agg(['count', 'mean', 'std', 'min', 'max'])
+    histogram = (grouped['bin'].value_counts()
+                 .unstack('bin', fill_value=0)
+                 .reindex(columns=DISCOUNT_BINS, fill_value=0))
+    return DiscountStats(summary, histogram)
+
+def select_groups(stats, start_date=None, end_date=None, hotels=None, length_stays=None):
+    index = stats.histogram.index
+    mask = np.ones(len(index), dtype=bool)
+    days = index.get_level_values('day')
+    if start_date is not None:
+        mask &= days >= pd.Timestamp(start_date)
+    if end_date is not None:
+        mask &= days <= pd.Timestamp(end_date)
+    if hotels is not None:
+        mask &= index.get_level_values('hotel_name').isin(hotels)
+    if length_stays is not None:
+        mask &= index.get_level_values('length_stay').isin(length_stays)
+    return DiscountStats(stats.summary[mask], stats.histogram[mask])
+
+def histogram_describe(histogram):
+    # Equivalente ao Series.describe() de cada linha, calculado direto das contagens
+    counts = histogram.to_numpy()
+    values = histogram.columns.to_numpy(dtype=np.float64)
+    n = counts.sum(axis=1)
+    valid = n > 0
+    safe_n = np.where(valid, n, 1)
+
+    mean = counts @ values / safe_n
+    variance = (counts @ values ** 2 - safe_n * mean ** 2) / np.where(n > 1, n - 1, np.nan)
+    cumulative = counts.cumsum(axis=1)
+
+    def value_at(position):
+        return values[(cumulative > position[:, None]).argmax(axis=1)]
+
+    result = {'count': n, 'mean': mean, 'std': np.sqrt(np.clip(variance, 0, None))}
+    result['min'] = values[(counts > 0).argmax(axis=1)]
+    for q, column in [(0.25, '25%'), (0.5, '50%'), (0.75, '75%')]:
+        position = q * (n - 1)
+        low, high = np.floor(position), np.ceil(position)
+        result[column] = value_at(low) + (value_at(high) - value_at(low)) * (position - low)
+    result['max'] = values[counts.shape[1] - 1 - (counts[:, ::-1] > 0).argmax(axis=1)]
+
+    described = pd.DataFrame(result, index=histogram.index)[DESCRIBE_COLUMNS]
+    described.loc[~valid, DESCRIBE_COLUMNS[1:]] = np.nan
+    return described
+
+def daily_discount_summary(stats, start_date=None, end_date=None, hotels=None, length_stays=None,
+                           min_discount=None):
+    histogram = select_groups(stats, start_date, end_date, hotels, length_stays).histogram
+    if min_discount is not None:
+        histogram = histogram.loc[:, histogram.columns >= min_discount]
+    daily = histogram.groupby(level='day').sum()
+    daily = daily[daily.sum(axis=1) > 0]
+    summary = histogram_describe(daily)
+    summary.index = summary.index.to_period('D')
+    summary.index.name = 'checkin_date'
+    return summary
+
+def discount_threshold(stats, quantile=0.05):
+    # Limite inferior dos descontos "de verdade": quantil dos descontos não nulos
+    totals = stats.histogram.sum(axis=0)
+    totals = totals[totals.index > 0]
+    if totals.sum() == 0:
+        return 0
+    cumulative = totals.cumsum() / totals.sum()
+    return int(cumulative.index[(cumulative >= quantile).argmax()])
+
+def discount_color_range(stats, min_discount=0):
+    totals = stats.histogram.sum(axis=0)
+    present = totals.index[(totals > 0) & (totals.index >= min_discount)]
+    if len(present) == 0:
+        return min_discount, min_discount
+    return int(present.min()), int(present.max())
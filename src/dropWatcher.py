@@ -0,0 +1,267 @@
+import contextlib
+import ctypes
+import ctypes.util
+import glob
+import importlib.util
+import io
+import os
+import select
+import struct
+import sys
+import time
+from datetime import datetime
+from fileCatalog import DETAILED_PATTERN, update_catalog, touch_data_version
+from perfSpans import span, measure_frame, enable_span_logging
+
+THKHA_DIRECTORY = "./data/DashboardTHKHA/"   # Replace with the actual directory paths
+DADOS_DIRECTORY = "./data/Dados/"
+DETAILED_DIRECTORY = "./data/DetailedPrices/"
+
+# Catálogo próprio do watcher: se um dashboard indexar a planilha nova antes, o watcher ainda a vê como mudança
+WATCHER_CATALOG_NAME = '.watcher.sqlite'
+
+# Espera as gravações pararem antes de processar (o Excel salva em vários passos)
+SETTLE_SECONDS = 2
+POLL_SECONDS = 5
+
+# inotify(7): constantes de <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')
+
+# Resultados de process_hotel_file por pasta de hotel e arquivo: uma mudança só reprocessa o arquivo novo
+_SORTER_RESULTS = {}
+_SORTERS = {}
+
+def is_workbook(path):
+    filename = os.path.basename(path)
+    return filename.endswith('.xlsx') and not filename.startswith('~$')
+
+def inotify_watcher(directories):
+    # Descritor do inotify com as pastas (e subpastas) registradas; None fora do Linux ou sem libc
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    watcher = {'fd': fd, 'libc': libc, 'watches': {}, 'roots': list(directories)}
+    watch_subdirectories(watcher)
+    return watcher
+
+def watch_subdirectories(watcher):
+    watched = set(watcher['watches'].values())
+    for directory in watcher['roots']:
+        for dirpath, _, _ in os.walk(directory):
+            if dirpath not in watched:
+                add_watch(watcher, dirpath)
+
+def add_watch(watcher, directory):
+    wd = watcher['libc'].inotify_add_watch(watcher['fd'], os.fsencode(directory), WATCH_MASK)
+    if wd < 0:
+        print(f"Error watching {directory}: {os.strerror(ctypes.get_errno())}")
+        return
+    watcher['watches'][wd] = directory
+
+def read_inotify_events(watcher, timeout):
+    # Caminhos afetados pelos eventos que chegarem em até `timeout` segundos
+    ready, _, _ = select.select([watcher['fd']], [], [], timeout)
+    if not ready:
+        return []
+    data = b''
+    while True:
+        try:
+            chunk = os.read(watcher['fd'], 64 * 1024)
+        except BlockingIOError:
+            break
+        if not chunk:
+            break
+        data += chunk
+
+    paths, offset = [], 0
+    while offset + EVENT_HEADER.size <= len(data):
+        wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+        name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0')
+        offset += EVENT_HEADER.size + length
+        if mask & IN_Q_OVERFLOW:
+            # O kernel descartou eventos (wd = -1): toda planilha das pastas vira candidata e o catálogo
+            # decide pelo checksum o que mudou; pastas criadas nesse meio tempo passam a ser observadas
+            print("inotify queue overflowed; rescanning the watched folders")
+            watch_subdirectories(watcher)
+            paths += list(folder_signature(watcher['roots']))
+            continue
+        directory = watcher['watches'].get(wd)
+        if directory is None or not name:
+            continue
+        path = os.path.join(directory, os.fsdecode(name))
+        if mask & IN_ISDIR:
+            # Pasta de hotel nova: passa a ser observada e as planilhas já copiadas para ela contam como novas
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                add_watch(watcher, path)
+                paths += glob.glob(os.path.join(glob.escape(path), '*.xlsx'))
+            continue
+        paths.append(path)
+    return paths
+
+def folder_signature(directories):
+    # Fallback sem inotify: (tamanho, mtime) de cada planilha, comparado a cada POLL_SECONDS
+    signature = {}
+    for directory in directories:
+        for dirpath, _, files in os.walk(directory):
+            for filename in files:
+                path = os.path.join(dirpath, filename)
+                if is_workbook(path):
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    signature[path] = (stat.st_size, stat.st_mtime_ns)
+    return signature
+
+def changed_paths(previous, current):
+    return [path for path in set(previous) | set(current) if previous.get(path) != current.get(path)]
+
+def watcher_catalog(root):
+    return os.path.join(root, WATCHER_CATALOG_NAME)
+
+def load_sorter(hotel_directory):
+    # O v2*-pricesorter.py da pasta do hotel, importado uma vez (o main() fica protegido pelo __name__)
+    if hotel_directory not in _SORTERS:
+        scripts = sorted(glob.glob(os.path.join(glob.escape(hotel_directory), 'v2*-pricesorter.py')))
+        module = None
+        if scripts:
+            spec = importlib.util.spec_from_file_location(
+                f"sorter_{os.path.basename(os.path.normpath(hotel_directory))}", scripts[0])
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        _SORTERS[hotel_directory] = module
+    return _SORTERS[hotel_directory]
+
+def detailed_output_path(output_directory, hotel_name):
+    # Sobrescreve o relatório detalhado do hotel que já existe (os dashboards leem todos os da pasta);
+    # sem nenhum, cria um novo com a data de hoje, como o sorter
+    existing = sorted(filename for filename in os.listdir(output_directory)
+                      if DETAILED_PATTERN.match(filename) and DETAILED_PATTERN.match(filename).group(1) == hotel_name)
+    filename = existing[-1] if existing else f"{hotel_name}_detailed_prices_{datetime.now().strftime('%Y%m%d')}.xlsx"
+    return os.path.join(output_directory, filename)
+
+def refresh_hotel(hotel_directory, changed_files, output_directory=DETAILED_DIRECTORY):
+    # Roda o sorter do hotel só nos arquivos novos/alterados e regrava o relatório detalhado.
+    # Na primeira mudança do hotel desde que o watcher subiu, processa a pasta inteira uma vez
+    sorter = load_sorter(hotel_directory)
+    if sorter is None:
+        print(f"No price sorter in {hotel_directory}; skipping")
+        return None
+
+    files = sorted(filename for filename in os.listdir(hotel_directory) if is_workbook(filename))
+    results = _SORTER_RESULTS.get(hotel_directory)
+    to_process = files if results is None else [filename for filename in changed_files if filename in files]
+    results = {filename: result for filename, result in (results or {}).items() if filename in files}
+    for filename in to_process:
+        with span('process_hotel_file', file=filename) as record, contextlib.redirect_stdout(io.StringIO()):
+            results[filename] = sorter.process_hotel_file(os.path.join(hotel_directory, filename))
+            measure_frame(record, results[filename][1])
+    _SORTER_RESULTS[hotel_directory] = results
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, detailed_results, hotel_name = sorter.combine_results([results[filename] for filename in files])
+    if detailed_results is None:
+        print(f"No data found matching any criteria in {hotel_directory}")
+        return None
+
+    # Grava num temporário e troca: um dashboard relendo a pasta nunca vê a planilha pela metade.
+    # O prefixo ~$ (arquivo de trava do Excel) deixa o temporário fora do catálogo
+    output_file_path = detailed_output_path(output_directory, hotel_name)
+    temporary_path = os.path.join(output_directory, '~$' + os.path.basename(output_file_path))
+    with span('to_excel', file=output_file_path):
+        detailed_results.to_excel(temporary_path, index=False, engine='openpyxl')
+        os.replace(temporary_path, output_file_path)
+    print(f"{hotel_name}: {len(to_process)} of {len(files)} files processed, saved to {output_file_path}")
+    return output_file_path
+
+def process_changes(paths, thkha_directory=THKHA_DIRECTORY, dados_directory=DADOS_DIRECTORY,
+                    detailed_directory=DETAILED_DIRECTORY):
+    # O catálogo decide o que mudou de fato (checksum); só essas planilhas são relidas
+    started = time.perf_counter()
+    paths = [os.path.abspath(path) for path in paths]
+
+    def under(directory):
+        directory = os.path.abspath(directory)
+        return any(path == directory or path.startswith(directory + os.sep) for path in paths)
+
+    if under(thkha_directory):
+        with span('update_catalog', root=thkha_directory):
+            changed = [path for path in update_catalog(thkha_directory, watcher_catalog(thkha_directory))
+                       if is_workbook(path)]
+        hotels = {}
+        for relative_path in changed:
+            parts = relative_path.split(os.sep)
+            if len(parts) == 2:
+                hotels.setdefault(parts[0], []).append(parts[1])
+        for hotel, files in sorted(hotels.items()):
+            try:
+                with span('refresh_hotel', hotel=hotel):
+                    refresh_hotel(os.path.join(thkha_directory, hotel), files, detailed_directory)
+            except Exception as e:
+                print(f"Error refreshing {hotel}: {str(e)}")
+        if changed:
+            touch_data_version(thkha_directory)
+        if hotels:
+            touch_data_version(detailed_directory)
+
+    if under(dados_directory):
+        with span('update_catalog', root=dados_directory):
+            changed = update_catalog(dados_directory, watcher_catalog(dados_directory))
+        if changed:
+            touch_data_version(dados_directory)
+            print(f"{len(changed)} workbooks changed in {dados_directory}")
+
+    print(f"Changes processed in {time.perf_counter() - started:.1f} s")
+
+def watch(directories, handle_changes, settle_seconds=SETTLE_SECONDS, poll_seconds=POLL_SECONDS, use_inotify=True):
+    watcher = inotify_watcher(directories) if use_inotify else None
+    signature = folder_signature(directories) if watcher is None else None
+    print(f"Watching {', '.join(directories)} ({'inotify' if watcher else f'polling every {poll_seconds} s'})")
+
+    pending, last_event = set(), None
+    while True:
+        if watcher is not None:
+            paths = read_inotify_events(watcher, timeout=1)
+        else:
+            time.sleep(poll_seconds)
+            current = folder_signature(directories)
+            paths, signature = changed_paths(signature, current), current
+
+        paths = [path for path in paths if is_workbook(path)]
+        if paths:
+            pending.update(paths)
+            last_event = time.monotonic()
+        if pending and time.monotonic() - last_event >= settle_seconds:
+            handle_changes(sorted(pending))
+            pending.clear()
+
+def main():
+    enable_span_logging()
+    directories = [THKHA_DIRECTORY, DADOS_DIRECTORY]
+
+    # O que chegou com o watcher parado é processado ao subir; a primeira vez processa tudo e deixa
+    # os resultados por arquivo em memória, então as próximas mudanças custam só o arquivo novo
+    process_changes(directories)
+    try:
+        watch(directories, process_changes, use_inotify='--poll' not in sys.argv)
+    except KeyboardInterrupt:
+        print("Watcher stopped")
+
+if __name__ == "__main__":
+    main()
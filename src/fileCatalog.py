@@ -0,0 +1,216 @@
+import pandas as pd
+import os
+import re
+import sqlite3
+import hashlib
+import time
+from collections import OrderedDict
+
+CATALOG_NAME = '.catalog.sqlite'
+# Marcador tocado pelo dropWatcher quando a pasta recebe dados novos; os dashboards o usam na chave do cache
+DATA_VERSION_NAME = '.data_version'
+
+PORTUGUESE_MONTHS = {
+    'Janeiro': 1, 'Fevereiro': 2, 'Março': 3, 'Abril': 4, 'Maio': 5, 'Junho': 6,
+    'Julho': 7, 'Agosto': 8, 'Setembro': 9, 'Outubro': 10, 'Novembro': 11, 'Dezembro': 12,
+}
+
+# Padrões de nome usados pelos arquivos do repositório
+SCRAPE_PATTERN = re.compile(r'_(\d{8})_(\d{4}-\d{2}-\d{2})_to_(\d{4}-\d{2}-\d{2})\.xlsx$')
+MONTHLY_PATTERN = re.compile(r'^([^_]+)_([^_]+)_(\d{4})\.xlsx$')
+DETAILED_PATTERN = re.compile(r'^(.+)_detailed_prices_(\d{8})\.xlsx$')
+COMPSET_PATTERN = re.compile(r'^thkha-compset-(\d{8})_(\d{8})\.xlsx$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    kind TEXT,
+    hotel TEXT,
+    hotel_name TEXT,
+    label TEXT,
+    start_date TEXT,
+    end_date TEXT,
+    fetch_date TEXT,
+    row_count INTEGER,
+    checksum TEXT,
+    size INTEGER,
+    mtime_ns INTEGER
+)
+"""
+COLUMNS = ['path', 'kind', 'hotel', 'hotel_name', 'label', 'start_date', 'end_date', 'fetch_date', 'row_count',
+           'checksum', 'size', 'mtime_ns']
+
+def default_catalog_path(root):
+    return os.path.join(root, CATALOG_NAME)
+
+def file_checksum(file_path):
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _iso(value):
+    return None if value is None or pd.isna(value) else pd.Timestamp(value).strftime('%Y-%m-%d')
+
+def parse_file_name(relative_path):
+    # Metadados que dá para tirar só do nome/pasta do arquivo
+    filename = os.path.basename(relative_path)
+    folder = os.path.basename(os.path.dirname(relative_path))
+    meta = {'kind': 'other', 'hotel': None, 'label': None, 'start_date': None, 'end_date': None, 'fetch_date': None}
+
+    match = COMPSET_PATTERN.match(filename)
+    if match:
+        meta.update(kind='compset', fetch_date=_iso(match.group(1)),
+                    start_date=_iso(match.group(1)), end_date=_iso(match.group(2)))
+        return meta
+    match = DETAILED_PATTERN.match(filename)
+    if match:
+        meta.update(kind='detailed', hotel=filename.split('_')[0], fetch_date=_iso(match.group(2)))
+        return meta
+    match = SCRAPE_PATTERN.search(filename)
+    if match:
+        # O intervalo do nome é [início, fim): 2024-10-01_to_2024-11-01 cobre outubro
+        meta.update(kind='scrape', hotel=folder, fetch_date=_iso(match.group(1)), start_date=match.group(2),
+                    end_date=_iso(pd.Timestamp(match.group(3)) - pd.Timedelta(days=1)))
+        return meta
+    match = MONTHLY_PATTERN.match(filename)
+    if match and match.group(2) in PORTUGUESE_MONTHS:
+        start = pd.Timestamp(year=int(match.group(3)), month=PORTUGUESE_MONTHS[match.group(2)], day=1)
+        meta.update(kind='monthly_scrape', hotel=match.group(1), label=match.group(2), start_date=_iso(start),
+                    end_date=_iso(start + pd.offsets.MonthEnd(0)))
+    return meta
+
+def read_file_metadata(root, relative_path):
+    file_path = os.path.join(root, relative_path)
+    meta = parse_file_name(relative_path)
+    df = pd.read_excel(file_path)
+
+    # O conteúdo manda: intervalo real das datas e nome do hotel da primeira linha
+    date_column = next((c for c in ['checkin_date', 'Date'] if c in df.columns), None)
+    if date_column is not None and not df.empty:
+        dates = pd.to_datetime(df[date_column], errors='coerce')
+        meta['start_date'] = _iso(dates.min()) or meta['start_date']
+        meta['end_date'] = _iso(dates.max()) or meta['end_date']
+    if 'fetch_date' in df.columns and not df.empty:
+        meta['fetch_date'] = _iso(pd.to_datetime(df['fetch_date'], errors='coerce').max()) or meta['fetch_date']
+    meta['hotel_name'] = str(df['hotel_name'].iloc[0]) if 'hotel_name' in df.columns and not df.empty else None
+    meta['row_count'] = len(df)
+    return meta
+
+def update_catalog(root, catalog_path=None):
+    # Indexa os .xlsx novos ou alterados; devolve os caminhos (relativos) que mudaram
+    catalog_path = catalog_path or default_catalog_path(root)
+    changed = []
+    with sqlite3.connect(catalog_path) as conn:
+        conn.execute(SCHEMA)
+        known = {row[0]: row[1:] for row in conn.execute("SELECT path, size, mtime_ns, checksum FROM files")}
+        seen = set()
+        for dirpath, dirs, files in os.walk(root):
+            for filename in sorted(files):
+                if not filename.endswith('.xlsx') or filename.startswith('~$'):
+                    continue
+                relative_path = os.path.relpath(os.path.join(dirpath, filename), root)
+                seen.add(relative_path)
+                stat = os.stat(os.path.join(dirpath, filename))
+                previous = known.get(relative_path)
+                if previous is not None and previous[0] == stat.st_size and previous[1] == stat.st_mtime_ns:
+                    continue
+
+                checksum = file_checksum(os.path.join(dirpath, filename))
+                if previous is not None and previous[2] == checksum:
+                    conn.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?",
+                                 (stat.st_size, stat.st_mtime_ns, relative_path))
+                    continue
+                try:
+                    meta = read_file_metadata(root, relative_path)
+                except Exception as e:
+                    print(f"Error cataloging {relative_path}: {str(e)}")
+                    continue
+                meta.update(path=relative_path, checksum=checksum, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+                conn.execute(f"INSERT OR REPLACE INTO files ({', '.join(COLUMNS)}) "
+                             f"VALUES ({', '.join('?' for _ in COLUMNS)})", [meta[c] for c in COLUMNS])
+                changed.append(relative_path)
+
+        removed = [path for path in known if path not in seen]
+        conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in removed])
+    return changed + removed
+
+def query_catalog(root, kind=None, hotels=None, start_date=None, end_date=None, catalog_path=None):
+    # Só os arquivos cujo intervalo [start_date, end_date] cruza o período pedido
+    conditions, params = [], []
+    if kind is not None:
+        kinds = [kind] if isinstance(kind, str) else list(kind)
+        conditions.append(f"kind IN ({', '.join('?' for _ in kinds)})")
+        params += kinds
+    if hotels is not None:
+        hotels = list(hotels)
+        marks = ', '.join('?' for _ in hotels)
+        conditions.append(f"(hotel IN ({marks}) OR hotel_name IN ({marks}))")
+        params += hotels + hotels
+    if start_date is not None:
+        conditions.append("end_date >= ?")
+        params.append(_iso(start_date))
+    if end_date is not None:
+        conditions.append("start_date <= ?")
+        params.append(_iso(end_date))
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    with sqlite3.connect(catalog_path or default_catalog_path(root)) as conn:
+        conn.execute(SCHEMA)
+        entries = pd.read_sql_query(f"SELECT * FROM files {where} ORDER BY path", conn, params=params)
+    entries['path'] = [os.path.join(root, path) for path in entries['path']]
+    return entries
+
+def catalog_entries(root, kind=None, hotels=None, start_date=None, end_date=None, catalog_path=None):
+    # Atualiza o catálogo (só relê o que mudou) e devolve as linhas que cruzam o filtro
+    update_catalog(root, catalog_path)
+    return query_catalog(root, kind, hotels, start_date, end_date, catalog_path)
+
+def catalog_files(root, kind=None, hotels=None, start_date=None, end_date=None, catalog_path=None):
+    return catalog_entries(root, kind, hotels, start_date, end_date, catalog_path)['path'].tolist()
+
+# Planilhas já lidas neste processo, por caminho: (checksum, DataFrame). Uma recarga só relê o que mudou;
+# LRU limitado a WORKBOOK_CACHE_SIZE planilhas para o processo do Streamlit não crescer sem fim
+WORKBOOK_CACHE_SIZE = 128
+_WORKBOOK_CACHE = OrderedDict()
+
+def read_workbook(file_path, checksum=None):
+    # pd.read_excel com cache pelo checksum do catálogo; devolve uma cópia, os chamadores alteram o frame
+    checksum = checksum or file_checksum(file_path)
+    cached = _WORKBOOK_CACHE.get(file_path)
+    if cached is None or cached[0] != checksum:
+        cached = _WORKBOOK_CACHE[file_path] = (checksum, pd.read_excel(file_path))
+    _WORKBOOK_CACHE.move_to_end(file_path)
+    while len(_WORKBOOK_CACHE) > WORKBOOK_CACHE_SIZE:
+        _WORKBOOK_CACHE.popitem(last=False)
+    return cached[1].copy()
+
+def clear_workbook_cache():
+    _WORKBOOK_CACHE.clear()
+
+def data_version(root):
+    # Versão dos dados da pasta (0 se o watcher nunca rodou); muda a cada touch_data_version
+    try:
+        with open(os.path.join(root, DATA_VERSION_NAME)) as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+def touch_data_version(root):
+    version = time.time_ns()
+    with open(os.path.join(root, DATA_VERSION_NAME), 'w') as f:
+        f.write(str(version))
+    return version
+
+def refresh_on_data_change(roots, interval=5):
+    # Dashboards: confere os marcadores a cada `interval` segundos e reroda o app quando algum muda.
+    # As funções em cache recebem data_version(root) como argumento, então a nova execução relê só o que mudou
+    import streamlit as st
+    versions = [data_version(root) for root in roots]
+
+    @st.fragment(run_every=interval)
+    def check_data_versions():
+        if [data_version(root) for root in roots] != versions:
+            st.rerun()
+    check_data_versions()
@@ -0,0 +1,67 @@
+import pandas as pd
+import numpy as np
+
+def offer_codes(df):
+    # Código inteiro único por (nome do quarto, ocupação)
+    name_codes, _ = pd.factorize(df['name'])
+    occupancy_codes, occupancies = pd.factorize(df['occupancy'])
+    return name_codes.astype(np.int64) * (len(occupancies) + 1) + occupancy_codes
+
+def fetch_dates(df, fetch_column='fetch_date'):
+    # Data da coleta; vazia ou inválida vira NaT (sem a coluna, tudo NaT)
+    if fetch_column not in df.columns:
+        return np.full(len(df), np.datetime64('NaT'), dtype='datetime64[ns]')
+    return pd.to_datetime(df[fetch_column], errors='coerce').to_numpy()
+
+def latest_fetch(index, keys):
+    # Valor da coleta mais recente de cada grupo: a maior data, e NaT só quando o grupo não tem outra
+    frame = index.reset_index().sort_values('fetch', na_position='first', kind='mergesort')
+    return frame.groupby(keys, sort=True)[index.name].last()
+
+def availability_index(df, hotel_column='Hotel', date_column='checkin_date', fetch_column='fetch_date'):
+    # Available rooms = ofertas distintas (quarto, ocupação) por hotel, data de check-in e coleta, não linhas
+    # brutas da coleta: repetir a mesma coleta ou ter vários planos tarifários para o mesmo quarto não infla o número
+    frame = pd.DataFrame({
+        'hotel': df[hotel_column].to_numpy(),
+        'date': pd.to_datetime(df[date_column], errors='coerce').dt.normalize().to_numpy(),
+        'fetch': fetch_dates(df, fetch_column),
+        'offer': offer_codes(df),
+    })
+    frame = frame[(frame['offer'] >= 0) & frame['date'].notna() & pd.notna(frame['hotel'])]
+    return frame.groupby(['hotel', 'date', 'fetch'], sort=True, dropna=False)['offer'].nunique()
+
+def daily_availability_index(df, hotel_column='Hotel', date_column='checkin_date', fetch_column='fetch_date'):
+    # Data x hotel, usando a coleta mais recente de cada (hotel, data)
+    index = availability_index(df, hotel_column, date_column, fetch_column)
+    latest = latest_fetch(index, ['hotel', 'date'])
+    daily = latest.unstack(level='hotel').fillna(0)
+    daily.index.name = date_column
+    daily.columns.name = hotel_column
+    return daily
+
+def occupancy_availability_index(df, hotel_column='hotel_name', date_column='checkin_date', fetch_column='fetch_date'):
+    # Data x (hotel, ocupação): quartos distintos por ocupação na coleta mais recente.
+    # NaN = hotel sem coleta na data; 0 = hotel coletado, mas sem oferta para essa ocupação
+    frame = pd.DataFrame({
+        'hotel': df[hotel_column].to_numpy(),
+        'occupancy': df['occupancy'].to_numpy(),
+        'date': pd.to_datetime(df[date_column], errors='coerce').dt.normalize().to_numpy(),
+        'fetch': fetch_dates(df, fetch_column),
+        'room': pd.factorize(df['name'])[0],
+    })
+    frame = frame[(frame['room'] >= 0) & frame['date'].notna() & pd.notna(frame['hotel'])]
+    index = frame.groupby(['hotel', 'occupancy', 'date', 'fetch'], sort=True, dropna=False)['room'].nunique()
+    latest = latest_fetch(index, ['hotel', 'occupancy', 'date'])
+    daily = latest.unstack(level=['hotel', 'occupancy']).sort_index(axis=1)
+
+    scraped = frame.groupby(['date', 'hotel']).size().unstack('hotel').notna()
+    scraped = scraped.reindex(index=daily.index, columns=daily.columns.get_level_values('hotel'), fill_value=False)
+    daily = daily.where(daily.notna() | ~scraped.to_numpy(dtype=bool), 0)
+    daily.index.name = date_column
+    return daily
+
+def total_availability_frame(df, hotel_column='hotel_name', date_column='checkin_date', fetch_column='fetch_date'):
+    # Mesmo formato do occupancy_df antigo (Date, Occupied_Rooms), somando os hotéis
+    daily = daily_availability_index(df, hotel_column, date_column, fetch_column)
+    occupancy_df = daily.sum(axis=1).rename('Occupied_Rooms').reset_index()
+    return occupancy_df.rename(columns={date_column: 'Date'})
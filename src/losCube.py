@@ -0,0 +1,42 @@
+import pandas as pd
+import numpy as np
+
+CUBE_DIMENSIONS = ['hotel_name', 'checkin_date', 'length_stay', 'occupancy']
+
+def normalize_nightly_rate(df, price_column='price'):
+    # O preço coletado é o total da estadia; devolve uma cópia com o preço por noite (nightly_price).
+    # Se length_stay vier vazio, usa checkout_date - checkin_date.
+    checkin = pd.to_datetime(df['checkin_date'])
+    length_stay = pd.to_numeric(df['length_stay'], errors='coerce') if 'length_stay' in df.columns \
+        else pd.Series(np.nan, index=df.index)
+    if 'checkout_date' in df.columns:
+        nights = (pd.to_datetime(df['checkout_date'], errors='coerce') - checkin).dt.days
+        length_stay = length_stay.fillna(nights)
+    length_stay = length_stay.fillna(1).clip(lower=1).astype('int64')
+
+    return df.assign(length_stay=length_stay,
+                     nightly_price=pd.to_numeric(df[price_column], errors='coerce') / length_stay)
+
+def build_los_cube(df, value_column='nightly_price'):
+    cube = (df.groupby(CUBE_DIMENSIONS, observed=True)[value_column]
+            .agg(['count', 'mean', 'median', 'min', 'max'])
+            .rename(columns=lambda stat: stat if stat == 'count' else f'{stat}_price'))
+    return cube.sort_index()
+
+def slice_los_cube(cube, hotels=None, start_date=None, end_date=None, length_stay=None, occupancy=None):
+    # Seleção direta no índice ordenado do cubo, sem voltar às linhas brutas
+    def level(value):
+        if value is None:
+            return slice(None)
+        return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+    dates = slice(None if start_date is None else pd.Timestamp(start_date),
+                  None if end_date is None else pd.Timestamp(end_date))
+    return cube.loc[(level(hotels), dates, level(length_stay), level(occupancy)), :]
+
+def los_daily_median(cube, length_stays=None):
+    # Mediana (entre hotéis/ocupações) da mediana diária, uma coluna por LOS
+    sliced = cube if length_stays is None else slice_los_cube(cube, length_stay=list(length_stays))
+    return (sliced['median_price']
+            .groupby(level=['checkin_date', 'length_stay']).median()
+            .unstack('length_stay'))
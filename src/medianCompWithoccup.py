@@ -8,8 +8,15 @@ from io import BytesIO
 from openpyxl import Workbook
 from openpyxl.utils.dataframe import dataframe_to_rows
 from openpyxl.styles import Font, Alignment, Border, Side
+from inventoryIndex import daily_availability_index
+from losCube import normalize_nightly_rate
+from dateSlice import sort_by_date, date_slice
+from perfSpans import span, record_span, measure_frame, reset_spans, performance_panel
+import time
+from fileCatalog import catalog_entries, read_workbook, refresh_on_data_change
 
 st.set_page_config(page_title="Price and Occupancy Comparison", layout="wide")
+reset_spans()
 
 def clean_price(price):
     if pd.isna(price) or price == '':
@@ -23,31 +30,32 @@ directory = "C:/Users/ribei/Documents/RegiOtels/Dashboard-estatistica/DetailedPr
 competitors_dfs = []
 khaolak_dfs = []
 
-for filename in os.listdir(directory):
-    if filename.endswith(".xlsx") and "detailed_prices" in filename:
-        file_path = os.path.join(directory, filename)
-        try:
-            df = pd.read_excel(file_path)
-            df['Hotel'] = filename.split('_')[0]
+for entry in catalog_entries(directory, kind='detailed').itertuples():
+    filename, file_path = os.path.basename(entry.path), entry.path
+    try:
+        with span('read_workbook') as record:
+            df = measure_frame(record, read_workbook(file_path, entry.checksum))
+        df['Hotel'] = entry.hotel
+        with span('clean_price'):
             df['Price'] = df['Price'].apply(clean_price)
-            df_cleaned = df.dropna(subset=['Price'])
-            if "khaolak" in filename.lower():
-                khaolak_dfs.append(df_cleaned)
-            else:
-                competitors_dfs.append(df_cleaned)
-        except Exception as e:
-            st.error(f"Erro ao processar {filename}: {str(e)}")
+        df_cleaned = df.dropna(subset=['Price'])
+        if "khaolak" in entry.hotel.lower():
+            khaolak_dfs.append(df_cleaned)
+        else:
+            competitors_dfs.append(df_cleaned)
+    except Exception as e:
+        st.error(f"Erro ao processar {filename}: {str(e)}")
 
 if not competitors_dfs and not khaolak_dfs:
     st.error("Nenhum arquivo válido encontrado. Verifique o diretório e os nomes dos arquivos.")
     st.stop()
 
-competitors_df = pd.concat(competitors_dfs, ignore_index=True) if competitors_dfs else pd.DataFrame()
-khaolak_df = pd.concat(khaolak_dfs, ignore_index=True) if khaolak_dfs else pd.DataFrame()
+competitors_df = sort_by_date(pd.concat(competitors_dfs, ignore_index=True)) if competitors_dfs else pd.DataFrame()
+khaolak_df = sort_by_date(pd.concat(khaolak_dfs, ignore_index=True)) if khaolak_dfs else pd.DataFrame()
 
 def calculate_stats(df, start_date, end_date):
-    mask = (df['Date'] >= start_date) & (df['Date'] <= end_date)
-    period_data = df.loc[mask]
+    # df ordenado por data (sort_by_date): o período sai por busca binária
+    period_data = date_slice(df, start_date, end_date)
     return {
         'mean': period_data['Price'].mean(),
         'min': period_data['Price'].min(),
@@ -65,24 +73,24 @@ periods = {
 }
 selected_period = st.selectbox("Select the viewing period:", list(periods.keys()))
 
-khaolak_df['Date'] = pd.to_datetime(khaolak_df['Date'])
-competitors_df['Date'] = pd.to_datetime(competitors_df['Date'])
-
 end_date = max(khaolak_df['Date'].max(), competitors_df['Date'].max())
 start_date = end_date - timedelta(days=periods[selected_period])
 
-khaolak_filtered = khaolak_df[(khaolak_df['Date'] >= start_date) & (khaolak_df['Date'] <= end_date)]
-competitors_filtered = competitors_df[(competitors_df['Date'] >= start_date) & (competitors_df['Date'] <= end_date)]
+khaolak_filtered = date_slice(khaolak_df, start_date, end_date)
+competitors_filtered = date_slice(competitors_df, start_date, end_date)
 
-khaolak_median = khaolak_filtered.groupby('Date')['Price'].median().reset_index()
-competitors_median = competitors_filtered.groupby('Date')['Price'].median().reset_index()
+with span('median groupby'):
+    khaolak_median = khaolak_filtered.groupby('Date')['Price'].median().reset_index()
+    competitors_median = competitors_filtered.groupby('Date')['Price'].median().reset_index()
 
-khaolak_stats = calculate_stats(khaolak_filtered, start_date, end_date)
-competitors_stats = calculate_stats(competitors_filtered, start_date, end_date)
+with span('calculate_stats'):
+    khaolak_stats = calculate_stats(khaolak_filtered, start_date, end_date)
+    competitors_stats = calculate_stats(competitors_filtered, start_date, end_date)
 
 diff_percentage = ((khaolak_stats['median'] - competitors_stats['median']) / competitors_stats['median']) * 100
 
 # Criar o gráfico de comparação de preços
+started = time.perf_counter()
 fig = make_subplots(specs=[[{"secondary_y": True}]])
 
 fig.add_trace(
@@ -129,43 +137,47 @@ fig.update_layout(
 
 # Exibir o gráfico no Streamlit
 st.plotly_chart(fig, use_container_width=True)
+record_span('price chart', time.perf_counter() - started)
 
-def read_checkin_files(main_directory):
+def read_checkin_files(main_directory, hotels=None, start_date=None, end_date=None):
     checkin_dfs = []
     
-    for root, dirs, files in os.walk(main_directory):
-        for filename in files:
-            if filename.endswith(".xlsx"):
-                file_path = os.path.join(root, filename)
-                try:
-                    df = pd.read_excel(file_path)
-                    required_columns = ['occupancy', 'checkin_date', 'price']
-                    if not all(col in df.columns for col in required_columns):
-                        continue
+    for entry in catalog_entries(main_directory, kind='scrape', hotels=hotels,
+                                 start_date=start_date, end_date=end_date).itertuples():
+        filename, file_path = os.path.basename(entry.path), entry.path
+        try:
+            df = read_workbook(file_path, entry.checksum)
+            required_columns = ['occupancy', 'checkin_date', 'price']
+            if not all(col in df.columns for col in required_columns):
+                continue
                     
-                    df = df[df['occupancy'] == 2]
-                    df['checkin_date'] = pd.to_datetime(df['checkin_date'], errors='coerce')
+            df = df[df['occupancy'] == 2]
+            df['checkin_date'] = pd.to_datetime(df['checkin_date'], errors='coerce')
                     
-                    # Usar o nome da pasta como nome do hotel
-                    hotel_name = os.path.basename(root)
-                    df['Hotel'] = hotel_name
+            # Usar o nome da pasta como nome do hotel
+            hotel_name = entry.hotel
+            df['Hotel'] = hotel_name
                     
-                    checkin_dfs.append(df)
-                except Exception as e:
-                    st.error(f"Erro ao processar o arquivo {filename}: {str(e)}")
+            checkin_dfs.append(df)
+        except Exception as e:
+            st.error(f"Erro ao processar o arquivo {filename}: {str(e)}")
     
     if not checkin_dfs:
         raise ValueError("Nenhum arquivo válido encontrado com as colunas necessárias e occupancy igual a 2")
     
-    return pd.concat(checkin_dfs, ignore_index=True)
+    # Preço por noite: o preço coletado é o total da estadia
+    return normalize_nightly_rate(pd.concat(checkin_dfs, ignore_index=True))
 
 def calculate_daily_occupancy(df):
-    return df.groupby(['Hotel', 'checkin_date']).size().unstack(level=0).fillna(0)
+    # Ofertas distintas (quarto, ocupação) por hotel/data na coleta mais recente, não linhas brutas
+    return daily_availability_index(df)
 
 main_directory = r"C:/Users/ribei/Documents/RegiOtels/Dashboard-estatistica/DashboardTHKHA"
 try:
-    checkin_data = read_checkin_files(main_directory)
-    daily_occupancy = calculate_daily_occupancy(checkin_data)
+    with span('read_checkin_files') as record:
+        checkin_data = measure_frame(record, read_checkin_files(main_directory))
+    with span('calculate_daily_occupancy') as record:
+        daily_occupancy = measure_frame(record, calculate_daily_occupancy(checkin_data))
 except Exception as e:
     st.error(f"Erro ao processar dados de ocupação: {str(e)}")
     st.stop()
@@ -219,7 +231,8 @@ def create_occupancy_chart(daily_occupancy, start_date, end_date):
 
 # Criar e exibir o gráfico de ocupação com os dados filtrados
 if not filtered_occupancy.empty:
-    occupancy_fig = create_occupancy_chart(filtered_occupancy, occupancy_start_date, occupancy_end_date)
+    with span('occupancy chart (plotly)'):
+        occupancy_fig = create_occupancy_chart(filtered_occupancy, occupancy_start_date, occupancy_end_date)
     st.plotly_chart(occupancy_fig, use_container_width=True)
 else:
     st.warning("Não foi possível criar o gráfico de ocupação devido à falta de dados válidos para o período selecionado")
@@ -258,8 +271,8 @@ def create_excel_report(khaolak_df, competitors_df, start_date, end_date):
 
     date_range = pd.date_range(start=start_date, end=end_date)
     for date in date_range:
-        khaolak_stats = calculate_stats(khaolak_df[khaolak_df['Date'] == date], date, date)
-        competitors_stats = calculate_stats(competitors_df[competitors_df['Date'] == date], date, date)
+        khaolak_stats = calculate_stats(khaolak_df, date, date)
+        competitors_stats = calculate_stats(competitors_df, date, date)
         
         row = [
             date.strftime('%Y-%m-%d'),
@@ -295,10 +308,14 @@ def create_excel_report(khaolak_df, competitors_df, start_date, end_date):
     return excel_buffer
 
 # Criar e oferecer download do relatório Excel
-excel_file = create_excel_report(khaolak_df, competitors_df, start_date, end_date)
+with span('create_excel_report'):
+    excel_file = create_excel_report(khaolak_df, competitors_df, start_date, end_date)
 st.download_button(
     label="Download Detailed Report of the Selected Period in Excel",
     data=excel_file,
     file_name=f"detailed_report_{start_date.date()}_a_{end_date.date()}.xlsx",
     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-)
\ No newline at end of file
+)
+
+performance_panel()
+refresh_on_data_change([directory, main_directory])
@@ -4,13 +4,26 @@ from plotly.subplots import make_subplots
 import streamlit as st
 from datetime import datetime, timedelta
 import os
+import time
 from io import BytesIO
 from openpyxl import Workbook
 from openpyxl.utils.dataframe import dataframe_to_rows
 from openpyxl.styles import Font, Alignment, Border, Side
 from streamlit.components.v1 import html
+from roomTypes import normalize_room_types
+from priceAnomalies import flag_price_anomalies, quarantine_anomalies
+from availability import availability_from_frame, slice_availability, market_compression, availability_summary
+from inventoryIndex import daily_availability_index
+from losCube import normalize_nightly_rate
+from fileCatalog import catalog_entries, read_workbook, data_version, refresh_on_data_change
+from compsetTable import clean_scrape_prices
+from dateSlice import sort_by_date, date_slice
+from seasonalForecast import fit_seasonal_per_hotel, forecast_frame, forecast_summary
+from perfSpans import (span, cached_span, cache_miss, record_span, measure_frame, reset_spans,
+                       performance_panel)
 
 st.set_page_config(layout="wide")
+reset_spans()
 
 def clean_price(price):
     if pd.isna(price) or price == '':
@@ -20,189 +33,175 @@ def clean_price(price):
         return float(cleaned) if cleaned else None
     return float(price)
 
-directory = "C:/Users/ribei/Documents/RegiOtels/Dashboard-estatistica/DetailedPrices"
-competitors_dfs = []
-khaolak_dfs = []
+def read_checkin_files(main_directory, hotels=None, start_date=None, end_date=None):
+    checkin_dfs = []
+    
+    for entry in catalog_entries(main_directory, kind='scrape', hotels=hotels,
+                                 start_date=start_date, end_date=end_date).itertuples():
+        filename, file_path = os.path.basename(entry.path), entry.path
+        try:
+            df = read_workbook(file_path, entry.checksum)
+            required_columns = ['occupancy', 'checkin_date', 'price']
+            if not all(col in df.columns for col in required_columns):
+                continue
+                    
+            df = df[df['occupancy'] == 2]
+            df['checkin_date'] = pd.to_datetime(df['checkin_date'], errors='coerce')
+                    
+            # Usar o nome da pasta como nome do hotel
+            hotel_name = entry.hotel
+            df['Hotel'] = hotel_name
+            df['room_category'] = normalize_room_types(df['name'])
+                    
+            checkin_dfs.append(df)
+        except Exception as e:
+            st.error(f"Erro ao processar o arquivo {filename}: {str(e)}")
+    
+    if not checkin_dfs:
+        raise ValueError("Nenhum arquivo válido encontrado com as colunas necessárias e occupancy igual a 2")
+    
+    # Preço por noite: o preço coletado é o total da estadia
+    checkin_data = pd.concat(checkin_dfs, ignore_index=True)
+    return normalize_nightly_rate(checkin_data.assign(price=clean_scrape_prices(checkin_data['price'])))
 
-for filename in os.listdir(directory):
-    if filename.endswith(".xlsx") and "detailed_prices" in filename:
-        file_path = os.path.join(directory, filename)
+def calculate_daily_occupancy(df):
+    # Ofertas distintas (quarto, ocupação) por hotel/data na coleta mais recente, não linhas brutas
+    return daily_availability_index(df)
+
+# Carga em cache: trocar um widget não relê as planilhas. version (data_version da pasta) muda quando o
+# dropWatcher grava dados novos, e aí só as planilhas com checksum novo são relidas
+@st.cache_data
+def load_price_data(directory, version=0):
+    cache_miss()
+    competitors_dfs = []
+    khaolak_dfs = []
+    availability_dfs = []
+
+    for entry in catalog_entries(directory, kind='detailed').itertuples():
+        filename, file_path = os.path.basename(entry.path), entry.path
         try:
-            df = pd.read_excel(file_path)
-            df['Hotel'] = filename.split('_')[0]
-            df['Price'] = df['Price'].apply(clean_price)
+            with span('read_workbook') as record:
+                df = measure_frame(record, read_workbook(file_path, entry.checksum))
+            df['Hotel'] = entry.hotel
+            df['Date'] = pd.to_datetime(df['Date'])
+            with span('clean_price'):
+                df['Price'] = df['Price'].apply(clean_price)
+            with span('normalize_room_types'):
+                df['Room Category'] = normalize_room_types(df['Room Name'])
+            availability_dfs.append(df[['Hotel', 'Date', 'Price']])
             df_cleaned = df.dropna(subset=['Price'])
-            if "khaolak" in filename.lower():
+            if "khaolak" in entry.hotel.lower():
                 khaolak_dfs.append(df_cleaned)
             else:
                 competitors_dfs.append(df_cleaned)
         except Exception as e:
             st.error(f"Erro ao processar {filename}: {str(e)}")
 
-if not competitors_dfs and not khaolak_dfs:
-    st.error("Nenhum arquivo válido encontrado. Verifique o diretório e os nomes dos arquivos.")
-    st.stop()
-
-competitors_df = pd.concat(competitors_dfs, ignore_index=True) if competitors_dfs else pd.DataFrame()
-khaolak_df = pd.concat(khaolak_dfs, ignore_index=True) if khaolak_dfs else pd.DataFrame()
+    if not competitors_dfs and not khaolak_dfs:
+        return None, None, None
+
+    competitors_df = sort_by_date(pd.concat(competitors_dfs, ignore_index=True)) if competitors_dfs else pd.DataFrame()
+    khaolak_df = sort_by_date(pd.concat(khaolak_dfs, ignore_index=True)) if khaolak_dfs else pd.DataFrame()
+
+    # Matriz hotel x data de "Sold Out", montada uma vez na carga
+    with span('availability_from_frame'):
+        market_availability = availability_from_frame(pd.concat(availability_dfs, ignore_index=True))
+    return khaolak_df, competitors_df, market_availability
+
+@st.cache_data
+def load_occupancy_data(main_directory, version=0):
+    cache_miss()
+    with span('read_checkin_files') as record:
+        checkin_data = measure_frame(record, read_checkin_files(main_directory))
+    with span('flag_price_anomalies'):
+        checkin_data = flag_price_anomalies(checkin_data, price_column='nightly_price')
+    with span('calculate_daily_occupancy') as record:
+        daily_occupancy = measure_frame(record, calculate_daily_occupancy(checkin_data))
+    # Data da coleta de cada hotel (nome completo, como nos relatórios detalhados), para o lead time do esgotamento
+    fetch_dates = pd.Series(dtype='datetime64[ns]')
+    if {'fetch_date', 'hotel_name'} <= set(checkin_data.columns):
+        fetch_dates = pd.to_datetime(checkin_data['fetch_date'], errors='coerce').groupby(checkin_data['hotel_name']).max()
+    # Preços anômalos continuam contando na ocupação, mas saem das estatísticas de preço
+    checkin_data, quarantined_rows = quarantine_anomalies(checkin_data)
+    # O índice sai junto da carga em cache: cliques e seletores não re-hasheiam as linhas da coleta
+    with span('build_date_stats_index') as record:
+        date_stats = measure_frame(record, build_date_stats_index(daily_occupancy, checkin_data))
+    return daily_occupancy, date_stats, fetch_dates
 
 def calculate_stats(df, start_date, end_date):
-    mask = (df['Date'] >= start_date) & (df['Date'] <= end_date)
-    period_data = df.loc[mask]
+    # df ordenado por data (sort_by_date): o período sai por busca binária
+    period_data = date_slice(df, start_date, end_date)
     return {
         'mean': period_data['Price'].mean(),
         'min': period_data['Price'].min(),
         'max': period_data['Price'].max(),
         'median': period_data['Price'].median()
     }
-    
-st.title("Khaolak vs Competitors")
-
-periods = {
-    "1 Month": 30,
-    "3 Months": 90,
-    "6 Months": 180,
-    "1 Year": 360,
-}
-selected_period = st.selectbox("Select the viewing period:", list(periods.keys()))
-
-khaolak_df['Date'] = pd.to_datetime(khaolak_df['Date'])
-competitors_df['Date'] = pd.to_datetime(competitors_df['Date'])
-
-end_date = max(khaolak_df['Date'].max(), competitors_df['Date'].max())
-start_date = end_date - timedelta(days=periods[selected_period])
 
-khaolak_filtered = khaolak_df[(khaolak_df['Date'] >= start_date) & (khaolak_df['Date'] <= end_date)]
-competitors_filtered = competitors_df[(competitors_df['Date'] >= start_date) & (competitors_df['Date'] <= end_date)]
-
-khaolak_median = khaolak_filtered.groupby('Date')['Price'].median().reset_index()
-competitors_median = competitors_filtered.groupby('Date')['Price'].median().reset_index()
-
-khaolak_stats = calculate_stats(khaolak_filtered, start_date, end_date)
-competitors_stats = calculate_stats(competitors_filtered, start_date, end_date)
-
-diff_percentage = ((khaolak_stats['median'] - competitors_stats['median']) / competitors_stats['median']) * 100
-
-# Criar o gráfico de comparação de preços
-fig = make_subplots(specs=[[{"secondary_y": True}]])
-
-fig.add_trace(
-    go.Scatter(
-        x=khaolak_median['Date'],
-        y=khaolak_median['Price'],
-        mode='lines+markers',
-        name='Median Khaolak',
-        hovertemplate=(
-            "<b>Data:</b> %{x|%Y-%m-%d}<br>"
-            "<b>Mediana Khaolak:</b> %{y:.2f}<br>"
-            "<b>Preço Médio Khaolak:</b> " + f"{khaolak_stats['mean']:.2f}" + "<br>"
-            "<b>Preço Mínimo Khaolak:</b> " + f"{khaolak_stats['min']:.2f}" + "<br>"
-            "<b>Preço Máximo Khaolak:</b> " + f"{khaolak_stats['max']:.2f}" + "<br>"
-            "<extra></extra>"
+def section_timing(started, name):
+    seconds = time.perf_counter() - started
+    record_span(name, seconds)
+    st.caption(f"Section computed in {seconds * 1000:.0f} ms")
+
+# Cada seção é um fragmento: um widget dentro dela só reexecuta a própria seção
+@st.fragment
+def price_comparison_section(khaolak_filtered, competitors_filtered, khaolak_stats, competitors_stats, diff_percentage):
+    started = time.perf_counter()
+    with span('median groupby'):
+        khaolak_median = khaolak_filtered.groupby('Date')['Price'].median().reset_index()
+        competitors_median = competitors_filtered.groupby('Date')['Price'].median().reset_index()
+
+    # Criar o gráfico de comparação de preços
+    figure_started = time.perf_counter()
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+
+    fig.add_trace(
+        go.Scatter(
+            x=khaolak_median['Date'],
+            y=khaolak_median['Price'],
+            mode='lines+markers',
+            name='Median Khaolak',
+            hovertemplate=(
+                "<b>Data:</b> %{x|%Y-%m-%d}<br>"
+                "<b>Mediana Khaolak:</b> %{y:.2f}<br>"
+                "<b>Preço Médio Khaolak:</b> " + f"{khaolak_stats['mean']:.2f}" + "<br>"
+                "<b>Preço Mínimo Khaolak:</b> " + f"{khaolak_stats['min']:.2f}" + "<br>"
+                "<b>Preço Máximo Khaolak:</b> " + f"{khaolak_stats['max']:.2f}" + "<br>"
+                "<extra></extra>"
+            )
         )
     )
-)
-
-fig.add_trace(
-    go.Scatter(
-        x=competitors_median['Date'],
-        y=competitors_median['Price'],
-        mode='lines+markers',
-        name='Median Competitors',
-        hovertemplate=(
-            "<b>Data:</b> %{x|%Y-%m-%d}<br>"
-            "<b>Mediana Competidores:</b> %{y:.2f}<br>"
-            "<b>Preço Médio Competidores:</b> " + f"{competitors_stats['mean']:.2f}" + "<br>"
-            "<b>Preço Mínimo Competidores:</b> " + f"{competitors_stats['min']:.2f}" + "<br>"
-            "<b>Preço Máximo Competidores:</b> " + f"{competitors_stats['max']:.2f}" + "<br>"
-            "<b>Diferença Percentual:</b> " + f"{diff_percentage:.2f}%" + "<br>"
-            "<extra></extra>"
+
+    fig.add_trace(
+        go.Scatter(
+            x=competitors_median['Date'],
+            y=competitors_median['Price'],
+            mode='lines+markers',
+            name='Median Competitors',
+            hovertemplate=(
+                "<b>Data:</b> %{x|%Y-%m-%d}<br>"
+                "<b>Mediana Competidores:</b> %{y:.2f}<br>"
+                "<b>Preço Médio Competidores:</b> " + f"{competitors_stats['mean']:.2f}" + "<br>"
+                "<b>Preço Mínimo Competidores:</b> " + f"{competitors_stats['min']:.2f}" + "<br>"
+                "<b>Preço Máximo Competidores:</b> " + f"{competitors_stats['max']:.2f}" + "<br>"
+                "<b>Diferença Percentual:</b> " + f"{diff_percentage:.2f}%" + "<br>"
+                "<extra></extra>"
+            )
         )
     )
-)
 
-fig.update_layout(
-    title='Comparação de Medianas de Preços: Khaolak vs Competidores',
-    xaxis_title='Data',
-    yaxis_title='Preço (Mediana)',
-    hovermode='x unified'
-)
-
-# Exibir o gráfico no Streamlit
-st.plotly_chart(fig, use_container_width=True)
-
-def read_checkin_files(main_directory):
-    checkin_dfs = []
-    
-    for root, dirs, files in os.walk(main_directory):
-        for filename in files:
-            if filename.endswith(".xlsx"):
-                file_path = os.path.join(root, filename)
-                try:
-                    df = pd.read_excel(file_path)
-                    required_columns = ['occupancy', 'checkin_date', 'price']
-                    if not all(col in df.columns for col in required_columns):
-                        continue
-                    
-                    df = df[df['occupancy'] == 2]
-                    df['checkin_date'] = pd.to_datetime(df['checkin_date'], errors='coerce')
-                    
-                    # Usar o nome da pasta como nome do hotel
-                    hotel_name = os.path.basename(root)
-                    df['Hotel'] = hotel_name
-                    
-                    checkin_dfs.append(df)
-                except Exception as e:
-                    st.error(f"Erro ao processar o arquivo {filename}: {str(e)}")
-    
-    if not checkin_dfs:
-        raise ValueError("Nenhum arquivo válido encontrado com as colunas necessárias e occupancy igual a 2")
-    
-    return pd.concat(checkin_dfs, ignore_index=True)
-
-def calculate_daily_occupancy(df):
-    return df.groupby(['Hotel', 'checkin_date']).size().unstack(level=0).fillna(0)
+    fig.update_layout(
+        title='Comparação de Medianas de Preços: Khaolak vs Competidores',
+        xaxis_title='Data',
+        yaxis_title='Preço (Mediana)',
+        hovermode='x unified'
+    )
+    record_span('price chart (plotly)', time.perf_counter() - figure_started)
 
-main_directory = r"C:/Users/ribei/Documents/RegiOtels/Dashboard-estatistica/DashboardTHKHA"
-try:
-    checkin_data = read_checkin_files(main_directory)
-    daily_occupancy = calculate_daily_occupancy(checkin_data)
-except Exception as e:
-    st.error(f"Erro ao processar dados de ocupação: {str(e)}")
-    st.stop()
-    
-st.subheader("Occupancy Chart")
+    # Exibir o gráfico no Streamlit
+    st.plotly_chart(fig, use_container_width=True)
+    section_timing(started, 'price comparison section')
 
-# Seletor de período para o gráfico de ocupação
-occupancy_periods = {
-    "1 Month": 30,
-    "3 Months": 90,
-    "6 Months": 180,
-    "Entire Period": None  # Adicionamos uma opção para ver todo o período
-}
-selected_occupancy_period = st.selectbox("Select the viewing period:", list(occupancy_periods.keys()))
-
-# Calcular as datas de início e fim para o gráfico de ocupação
-occupancy_end_date = daily_occupancy.index.max()
-if occupancy_periods[selected_occupancy_period] is not None:
-    occupancy_start_date = occupancy_end_date - timedelta(days=occupancy_periods[selected_occupancy_period])
-else:
-    occupancy_start_date = daily_occupancy.index.min()
-
-# Filtrar os dados de ocupação para o período selecionado
-filtered_occupancy = daily_occupancy.loc[occupancy_start_date:occupancy_end_date]
-sorted_columns = daily_occupancy.sum().sort_values().index
-
-def calculate_hotel_stats(df, hotel, start_date, end_date):
-    mask = (df['Hotel'] == hotel) & (df['checkin_date'] >= start_date) & (df['checkin_date'] <= end_date)
-    period_data = df.loc[mask]
-    return {
-        'mean': period_data['price'].mean(),
-        'min': period_data['price'].min(),
-        'max': period_data['price'].max(),
-        'median': period_data['price'].median()
-    }
-    
 def create_occupancy_chart(daily_occupancy, start_date, end_date):
     sorted_columns = daily_occupancy.sum().sort_values().index
     
@@ -214,7 +213,10 @@ def create_occupancy_chart(daily_occupancy, start_date, end_date):
                 x=daily_occupancy.index,
                 y=daily_occupancy[hotel],
                 name=hotel,
-                mode='none',
+                # Marcadores pequenos: o Plotly só deixa selecionar pontos de traços com marcador
+                mode='lines+markers',
+                marker=dict(size=3),
+                line=dict(width=0.5),
                 fill='tonexty',
                 stackgroup='one'
             )
@@ -230,88 +232,190 @@ def create_occupancy_chart(daily_occupancy, start_date, end_date):
 
     return fig
 
-def get_hover_data(date, daily_occupancy, checkin_data, sorted_columns):
-    new_values = {
+# (data, hotel) -> ocupação e estatísticas de preço, montado uma vez no load_occupancy_data; a consulta de uma
+# data é O(hotéis)
+def build_date_stats_index(daily_occupancy, checkin_data):
+    prices = checkin_data['nightly_price']
+    keys = [checkin_data['checkin_date'].dt.normalize().rename('Date'), checkin_data['Hotel']]
+    price_stats = prices.groupby(keys).agg(['mean', 'min', 'max', 'median'])
+    price_stats.columns = ['Mean Price', 'Min Price', 'Max Price', 'Median Price']
+
+    occupancy = daily_occupancy.stack().rename('Occupancy')
+    occupancy.index.names = ['Date', 'Hotel']
+    return occupancy.to_frame().join(price_stats, how='outer').sort_index()
+
+def get_date_stats(date_stats, date, sorted_columns):
+    date = pd.Timestamp(date).normalize()
+    try:
+        day = date_stats.xs(date, level='Date')
+    except KeyError:
+        day = date_stats.iloc[:0].droplevel('Date')
+    day = day.reindex(sorted_columns)
+
+    date_data = pd.DataFrame({
         'Hotel': sorted_columns,
-        'Date': [date.strftime('%Y-%m-%d')] * len(sorted_columns),
-        'Occupancy': [daily_occupancy.loc[date, hotel] for hotel in sorted_columns]
+        'Date': date.strftime('%Y-%m-%d'),
+        'Occupancy': day['Occupancy'].fillna(0).to_numpy(),
+    })
+    for column in ['Mean Price', 'Min Price', 'Max Price', 'Median Price']:
+        date_data[column] = [f"{value:.2f}" if pd.notna(value) else 'N/A' for value in day[column]]
+    return date_data
+
+def selected_dates(event):
+    # Datas dos pontos clicados/selecionados no gráfico de ocupação
+    points = event.selection.points if event is not None else []
+    return sorted({pd.Timestamp(point['x']).normalize() for point in points if 'x' in point})
+
+@st.fragment
+def occupancy_section(daily_occupancy, date_stats, market_availability, fetch_dates):
+    started = time.perf_counter()
+    st.subheader("Occupancy Chart")
+
+    # Seletor de período para o gráfico de ocupação
+    occupancy_periods = {
+        "1 Month": 30,
+        "3 Months": 90,
+        "6 Months": 180,
+        "Entire Period": None  # Adicionamos uma opção para ver todo o período
     }
-    for stat in ['mean', 'min', 'max', 'median']:
-        stat_func = getattr(checkin_data.loc[checkin_data['checkin_date'] == date, 'price'], stat, None)
-        if stat_func:
-            new_values[f'{stat.capitalize()} Price'] = [
-                f"{stat_func():.2f}" if not checkin_data[(checkin_data['Hotel'] == hotel) & (checkin_data['checkin_date'] == date)].empty
-                else 'N/A'
-                for hotel in sorted_columns
-            ]
-    return pd.DataFrame(new_values)
-
-# Inicialização do estado da sessão
-if 'hover_date' not in st.session_state:
-    st.session_state.hover_date = None
-
-if not filtered_occupancy.empty:
-    st.title("Occupancy Chart and Data")
-    
-    occupancy_fig = create_occupancy_chart(filtered_occupancy, occupancy_start_date, occupancy_end_date)
-    
-    # Renderizando o gráfico
-    st.plotly_chart(occupancy_fig, use_container_width=True, config={'responsive': True})
-    
-    # Criando um separador visual
-    st.markdown("---")
-    
+    selected_occupancy_period = st.selectbox("Select the viewing period:", list(occupancy_periods.keys()),
+                                             key='occupancy_period')
+
+    # Calcular as datas de início e fim para o gráfico de ocupação
+    occupancy_end_date = daily_occupancy.index.max()
+    if occupancy_periods[selected_occupancy_period] is not None:
+        occupancy_start_date = occupancy_end_date - timedelta(days=occupancy_periods[selected_occupancy_period])
+    else:
+        occupancy_start_date = daily_occupancy.index.min()
+
+    # Filtrar os dados de ocupação para o período selecionado
+    filtered_occupancy = daily_occupancy.loc[occupancy_start_date:occupancy_end_date]
+    sorted_columns = daily_occupancy.sum().sort_values().index
+
+    if not filtered_occupancy.empty:
+        st.title("Occupancy Chart and Data")
+
+        with span('occupancy chart (plotly)'):
+            occupancy_fig = create_occupancy_chart(filtered_occupancy, occupancy_start_date, occupancy_end_date)
+
+        # Renderizando o gráfico; clicar ou selecionar datas reexecuta só esta seção
+        occupancy_event = st.plotly_chart(occupancy_fig, use_container_width=True, config={'responsive': True},
+                                          key='occupancy_chart', on_select='rerun', selection_mode=('points', 'box'))
+        section_timing(started, 'occupancy section')
+
+        # Criando um separador visual
+        st.markdown("---")
+        hover_section(date_stats, selected_dates(occupancy_event), sorted_columns)
+    else:
+        st.warning("Unable to create the occupancy chart due to lack of valid data for the selected period")
+
+    market_compression_section(market_availability, fetch_dates, occupancy_start_date, occupancy_end_date)
+
+@st.fragment
+def hover_section(date_stats, dates, sorted_columns):
+    started = time.perf_counter()
     # Criando um título para a seção da tabela
     st.subheader("Hover Data")
-    
-    # Criando um container para a tabela
-    table_container = st.empty()
-    
-    # Inicializando a tabela com dados padrão ou vazios
-    default_data = pd.DataFrame({
-        'Hotel': sorted_columns,
-        'Date': [''] * len(sorted_columns),
-        'Occupancy': [''] * len(sorted_columns),
-        'Mean Price': [''] * len(sorted_columns),
-        'Min Price': [''] * len(sorted_columns),
-        'Max Price': [''] * len(sorted_columns),
-        'Median Price': [''] * len(sorted_columns)
-    })
-    table_container.dataframe(default_data)
-    
-    # Função para atualizar a tabela (chamada via callback)
-    def update_table(trace, points, state):
-        if len(points.xs) > 0:
-            date = pd.to_datetime(points.xs[0])
-            hover_data = get_hover_data(date, filtered_occupancy, checkin_data, sorted_columns)
-            table_container.dataframe(hover_data)
-    
-    # Adicionando o callback ao gráfico
-    for trace in occupancy_fig.data:
-        trace.on_hover(update_table)
 
-else:
-    st.warning("Unable to create the occupancy chart due to lack of valid data for the selected period")
-    
-# Exibir estatísticas gerais
-st.subheader("Statistics for the Selected Period")
-col1, col2 = st.columns(2)
-
-with col1:
-    st.write("Khaolak:")
-    st.write(f"Mean Price: {khaolak_stats['mean']:.2f}")
-    st.write(f"Minimum Price: {khaolak_stats['min']:.2f}")
-    st.write(f"Maximum Price: {khaolak_stats['max']:.2f}")
-    st.write(f"Median Price: {khaolak_stats['median']:.2f}")
-
-with col2:
-    st.write("Competitors:")
-    st.write(f"Mean Price: {competitors_stats['mean']:.2f}")
-    st.write(f"Minimum Price: {competitors_stats['min']:.2f}")
-    st.write(f"Maximum Price: {competitors_stats['max']:.2f}")
-    st.write(f"Median Price: {competitors_stats['median']:.2f}")
-
-st.write(f"Percentage Difference in Median: {diff_percentage:.2f}%")
+    if not dates:
+        st.caption("Click a date (or box-select a range) on the occupancy chart to see per-hotel details.")
+        # Inicializando a tabela com dados padrão ou vazios
+        default_data = pd.DataFrame({
+            'Hotel': sorted_columns,
+            'Date': [''] * len(sorted_columns),
+            'Occupancy': [''] * len(sorted_columns),
+            'Mean Price': [''] * len(sorted_columns),
+            'Min Price': [''] * len(sorted_columns),
+            'Max Price': [''] * len(sorted_columns),
+            'Median Price': [''] * len(sorted_columns)
+        })
+        st.dataframe(default_data)
+        return
+
+    hover_data = pd.concat([get_date_stats(date_stats, date, sorted_columns) for date in dates], ignore_index=True)
+    st.dataframe(hover_data)
+    section_timing(started, 'hover section')
+
+@st.fragment
+def market_compression_section(market_availability, fetch_dates, start_date, end_date):
+    started = time.perf_counter()
+    st.subheader("Market Compression")
+    compression_availability = slice_availability(market_availability, start_date, end_date)
+    # Fração esgotada entre os hotéis com coleta cobrindo a data
+    compression = market_compression(compression_availability)
+    compression_fig = go.Figure(go.Bar(x=compression.index, y=compression.values, name='Market Compression'))
+    compression_fig.update_layout(
+        title='Share of Observed Hotels Sold Out per Date',
+        xaxis_title='Timeline',
+        yaxis_title='Sold Out Share',
+        yaxis_tickformat='.0%',
+        height=350,
+    )
+    st.plotly_chart(compression_fig, use_container_width=True)
+    st.dataframe(availability_summary(compression_availability, fetch_dates))
+    section_timing(started, 'market compression section')
+
+# Tendência + sazonalidade semanal/anual por hotel; os modelos ficam em cache pelo hash de cada série
+@st.fragment
+def forecast_section(daily_occupancy, date_stats):
+    started = time.perf_counter()
+    st.subheader("Seasonal Forecast")
+    metrics = {
+        "Available Rooms": daily_occupancy,
+        "Median Price": date_stats['Median Price'].unstack('Hotel'),
+    }
+    col1, col2 = st.columns(2)
+    with col1:
+        selected_metric = st.radio("Forecast metric:", list(metrics.keys()), horizontal=True, key='forecast_metric')
+    series = metrics[selected_metric]
+    with col2:
+        selected_hotel = st.selectbox("Hotel:", list(series.columns), key='forecast_hotel')
+
+    models = fit_seasonal_per_hotel(series)
+    last_date = series.index.max()
+    forecast = forecast_frame(models[selected_hotel], last_date)
+    history = series[selected_hotel].loc[last_date - timedelta(days=180):]
+
+    forecast_fig = go.Figure()
+    forecast_fig.add_trace(go.Scatter(x=history.index, y=history.values, mode='lines', name='History'))
+    forecast_fig.add_trace(go.Scatter(x=forecast.index, y=forecast['Upper'], mode='lines',
+                                      line=dict(width=0), showlegend=False, hoverinfo='skip'))
+    forecast_fig.add_trace(go.Scatter(x=forecast.index, y=forecast['Lower'], mode='lines', line=dict(width=0),
+                                      fill='tonexty', fillcolor='rgba(255, 0, 0, 0.15)', name='95% band'))
+    forecast_fig.add_trace(go.Scatter(x=forecast.index, y=forecast['Forecast'], mode='lines', name='Forecast',
+                                      line=dict(color='red', dash='dash')))
+    forecast_fig.update_layout(
+        title=f'{selected_metric}: {selected_hotel} (next 30 days)',
+        xaxis_title='Timeline',
+        yaxis_title=selected_metric,
+        hovermode='x unified',
+        height=450,
+    )
+    st.plotly_chart(forecast_fig, use_container_width=True)
+    st.dataframe(forecast_summary(models, last_date).round(2))
+    section_timing(started, 'forecast section')
+
+@st.fragment
+def statistics_section(khaolak_stats, competitors_stats, diff_percentage):
+    # Exibir estatísticas gerais
+    st.subheader("Statistics for the Selected Period")
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.write("Khaolak:")
+        st.write(f"Mean Price: {khaolak_stats['mean']:.2f}")
+        st.write(f"Minimum Price: {khaolak_stats['min']:.2f}")
+        st.write(f"Maximum Price: {khaolak_stats['max']:.2f}")
+        st.write(f"Median Price: {khaolak_stats['median']:.2f}")
+
+    with col2:
+        st.write("Competitors:")
+        st.write(f"Mean Price: {competitors_stats['mean']:.2f}")
+        st.write(f"Minimum Price: {competitors_stats['min']:.2f}")
+        st.write(f"Maximum Price: {competitors_stats['max']:.2f}")
+        st.write(f"Median Price: {competitors_stats['median']:.2f}")
+
+    st.write(f"Percentage Difference in Median: {diff_percentage:.2f}%")
 
 # Função para criar o relatório Excel
 def create_excel_report(khaolak_df, competitors_df, start_date, end_date):
@@ -327,8 +431,8 @@ def create_excel_report(khaolak_df, competitors_df, start_date, end_date):
 
     date_range = pd.date_range(start=start_date, end=end_date)
     for date in date_range:
-        khaolak_stats = calculate_stats(khaolak_df[khaolak_df['Date'] == date], date, date)
-        competitors_stats = calculate_stats(competitors_df[competitors_df['Date'] == date], date, date)
+        khaolak_stats = calculate_stats(khaolak_df, date, date)
+        competitors_stats = calculate_stats(competitors_df, date, date)
         
         row = [
             date.strftime('%Y-%m-%d'),
@@ -363,18 +467,77 @@ def create_excel_report(khaolak_df, competitors_df, start_date, end_date):
 
     return excel_buffer
 
-# Criar e oferecer download do relatório Excel
-excel_file = create_excel_report(khaolak_df, competitors_df, start_date, end_date)
-st.download_button(
-    label="Download Detailed Report of the Selected Period in Excel",
-    data=excel_file,
-    file_name=f"detailed_report_{start_date.date()}_a_{end_date.date()}.xlsx",
-    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-)
+# O relatório só é remontado quando o período ou as categorias mudam
+@st.cache_data
+def load_excel_report(khaolak_df, competitors_df, start_date, end_date):
+    cache_miss()
+    return create_excel_report(khaolak_df, competitors_df, start_date, end_date).getvalue()
+
+@st.fragment
+def download_section(khaolak_df, competitors_df, start_date, end_date):
+    started = time.perf_counter()
+    # Criar e oferecer download do relatório Excel
+    with cached_span('load_excel_report'):
+        excel_file = load_excel_report(khaolak_df, competitors_df, start_date, end_date)
+    st.download_button(
+        label="Download Detailed Report of the Selected Period in Excel",
+        data=excel_file,
+        file_name=f"detailed_report_{start_date.date()}_a_{end_date.date()}.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        on_click='ignore'
+    )
+    section_timing(started, 'download section')
 
-# Let's search for where the `update_table` function is being called in the file.
-# This will help us understand how the variables (like `points`) are being passed to the function.
+directory = "C:/Users/ribei/Documents/RegiOtels/Dashboard-estatistica/DetailedPrices"
+with cached_span('load_price_data'):
+    khaolak_df, competitors_df, market_availability = load_price_data(directory, data_version(directory))
 
-# Adicione este código no final do seu script Streamlit para forçar atualizações
+if khaolak_df is None:
+    st.error("Nenhum arquivo válido encontrado. Verifique o diretório e os nomes dos arquivos.")
+    st.stop()
 
+main_directory = r"C:/Users/ribei/Documents/RegiOtels/Dashboard-estatistica/DashboardTHKHA"
+try:
+    with cached_span('load_occupancy_data') as record:
+        daily_occupancy, date_stats, fetch_dates = load_occupancy_data(main_directory, data_version(main_directory))
+        measure_frame(record, date_stats)
+except Exception as e:
+    st.error(f"Erro ao processar dados de ocupação: {str(e)}")
+    st.stop()
+
+st.title("Khaolak vs Competitors")
+
+# Período e categorias alimentam preço, estatísticas e relatório, então ficam fora dos fragmentos
+periods = {
+    "1 Month": 30,
+    "3 Months": 90,
+    "6 Months": 180,
+    "1 Year": 360,
+}
+selected_period = st.selectbox("Select the viewing period:", list(periods.keys()))
+
+room_categories = [c for c in khaolak_df['Room Category'].cat.categories
+                   if c in set(khaolak_df['Room Category']) | set(competitors_df['Room Category'])]
+selected_room_categories = st.multiselect("Room categories:", room_categories, default=room_categories)
+khaolak_df = khaolak_df[khaolak_df['Room Category'].isin(selected_room_categories)]
+competitors_df = competitors_df[competitors_df['Room Category'].isin(selected_room_categories)]
+
+end_date = max(khaolak_df['Date'].max(), competitors_df['Date'].max())
+start_date = end_date - timedelta(days=periods[selected_period])
+
+khaolak_filtered = date_slice(khaolak_df, start_date, end_date)
+competitors_filtered = date_slice(competitors_df, start_date, end_date)
+
+with span('calculate_stats'):
+    khaolak_stats = calculate_stats(khaolak_filtered, start_date, end_date)
+    competitors_stats = calculate_stats(competitors_filtered, start_date, end_date)
+
+diff_percentage = ((khaolak_stats['median'] - competitors_stats['median']) / competitors_stats['median']) * 100
 
+price_comparison_section(khaolak_filtered, competitors_filtered, khaolak_stats, competitors_stats, diff_percentage)
+occupancy_section(daily_occupancy, date_stats, market_availability, fetch_dates)
+forecast_section(daily_occupancy, date_stats)
+statistics_section(khaolak_stats, competitors_stats, diff_percentage)
+download_section(khaolak_df, competitors_df, start_date, end_date)
+performance_panel()
+refresh_on_data_change([directory, main_directory])
@@ -8,11 +8,16 @@ from io import BytesIO
 from openpyxl import Workbook
 from openpyxl.utils.dataframe import dataframe_to_rows
 from openpyxl.styles import Font, Alignment, Border, Side
+from fileCatalog import catalog_entries, read_workbook, refresh_on_data_change
+from dateSlice import sort_by_date, date_slice
+from perfSpans import span, record_span, measure_frame, reset_spans, performance_panel
+import time
 
 
 
 # Configuração da página Streamlit
 st.set_page_config(page_title="price comparison", layout="wide")
+reset_spans()
 
 def clean_price(price):
     if pd.isna(price) or price == '':
@@ -33,34 +38,35 @@ khaolak_dfs = []
 print(f"Buscando arquivos em: {directory}")
 
 # Ler todos os arquivos Excel no diretório
-for filename in os.listdir(directory):
-    if filename.endswith(".xlsx") and "detailed_prices" in filename:
-        file_path = os.path.join(directory, filename)
-        print(f"/nProcessando arquivo: {filename}")
-        try:
-            df = pd.read_excel(file_path)
-            df['Hotel'] = filename.split('_')[0]  # Extrair nome do hotel do arquivo
+for entry in catalog_entries(directory, kind='detailed').itertuples():
+    filename, file_path = os.path.basename(entry.path), entry.path
+    print(f"/nProcessando arquivo: {filename}")
+    try:
+        with span('read_workbook') as record:
+            df = measure_frame(record, read_workbook(file_path, entry.checksum))
+        df['Hotel'] = entry.hotel  # Extrair nome do hotel do arquivo
             
-            # Mostrar as primeiras linhas e informações sobre a coluna 'Price'
-            print(f"Primeiras 5 linhas do DataFrame:\n{df.head()}")
-            print(f"Informações sobre a coluna 'Price':\n{df['Price'].describe()}")
-            print(f"Valores únicos na coluna 'Price': {df['Price'].unique()}")
+        # Mostrar as primeiras linhas e informações sobre a coluna 'Price'
+        print(f"Primeiras 5 linhas do DataFrame:\n{df.head()}")
+        print(f"Informações sobre a coluna 'Price':\n{df['Price'].describe()}")
+        print(f"Valores únicos na coluna 'Price': {df['Price'].unique()}")
             
-            # Limpar e converter a coluna 'Price'
+        # Limpar e converter a coluna 'Price'
+        with span('clean_price'):
             df['Price'] = df['Price'].apply(clean_price)
             
-            # Remover linhas com preços nulos
-            df_cleaned = df.dropna(subset=['Price'])
-            print(f"Linhas antes da limpeza: {len(df)}, após limpeza: {len(df_cleaned)}")
+        # Remover linhas com preços nulos
+        df_cleaned = df.dropna(subset=['Price'])
+        print(f"Linhas antes da limpeza: {len(df)}, após limpeza: {len(df_cleaned)}")
             
-            if "khaolak" in filename.lower():
-                khaolak_dfs.append(df_cleaned)
-                print(f"Adicionado à lista khaolak: {filename}")
-            else:
-                competitors_dfs.append(df_cleaned)
-                print(f"Adicionado à lista de competidores: {filename}")
-        except Exception as e:
-            print(f"Erro ao processar {filename}: {str(e)}")
+        if "khaolak" in entry.hotel.lower():
+            khaolak_dfs.append(df_cleaned)
+            print(f"Adicionado à lista khaolak: {filename}")
+        else:
+            competitors_dfs.append(df_cleaned)
+            print(f"Adicionado à lista de competidores: {filename}")
+    except Exception as e:
+        print(f"Erro ao processar {filename}: {str(e)}")
 
 print(f"\nTotal de arquivos de competidores: {len(competitors_dfs)}")
 print(f"Total de arquivos de Khaolak: {len(khaolak_dfs)}")
@@ -72,7 +78,7 @@ if not competitors_dfs and not khaolak_dfs:
 
 # Combinar os dataframes
 if competitors_dfs:
-    competitors_df = pd.concat(competitors_dfs, ignore_index=True)
+    competitors_df = sort_by_date(pd.concat(competitors_dfs, ignore_index=True))
     print(f"\nShape do DataFrame de competidores: {competitors_df.shape}")
     print(f"Tipos de dados: {competitors_df.dtypes}")
     print(f"Resumo estatístico dos preços dos competidores:\n{competitors_df['Price'].describe()}")
@@ -80,7 +86,7 @@ else:
     print("Nenhum dado de competidores para processar.")
 
 if khaolak_dfs:
-    khaolak_df = pd.concat(khaolak_dfs, ignore_index=True)
+    khaolak_df = sort_by_date(pd.concat(khaolak_dfs, ignore_index=True))
     print(f"\nShape do DataFrame de Khaolak: {khaolak_df.shape}")
     print(f"Tipos de dados: {khaolak_df.dtypes}")
     print(f"Resumo estatístico dos preços de Khaolak:\n{khaolak_df['Price'].describe()}")
@@ -88,8 +94,8 @@ else:
     print("Nenhum dado de Khaolak para processar.")
 
 def calculate_stats(df, start_date, end_date):
-    mask = (df['Date'] >= start_date) & (df['Date'] <= end_date)
-    period_data = df.loc[mask]
+    # df ordenado por data (sort_by_date): o período sai por busca binária
+    period_data = date_slice(df, start_date, end_date)
     return {
         'mean': period_data['Price'].mean(),
         'min': period_data['Price'].min(),
@@ -122,19 +128,20 @@ end_date = max(khaolak_df['Date'].max(), competitors_df['Date'].max())
 start_date = end_date - timedelta(days=periods[selected_period])
 
 # Filtrar dados para o período selecionado
-khaolak_filtered = khaolak_df[(khaolak_df['Date'] >= start_date) & (khaolak_df['Date'] <= end_date)]
-competitors_filtered = competitors_df[(competitors_df['Date'] >= start_date) & (competitors_df['Date'] <= end_date)]
+khaolak_filtered = date_slice(khaolak_df, start_date, end_date)
+competitors_filtered = date_slice(competitors_df, start_date, end_date)
 # Filtrar dados para o período selecionado
-khaolak_filtered = khaolak_df[(khaolak_df['Date'] >= start_date) & (khaolak_df['Date'] <= end_date)]
-competitors_filtered = competitors_df[(competitors_df['Date'] >= start_date) & (competitors_df['Date'] <= end_date)]
+khaolak_filtered = date_slice(khaolak_df, start_date, end_date)
+competitors_filtered = date_slice(competitors_df, start_date, end_date)
 
 # Calcular medianas
 khaolak_median = khaolak_filtered.groupby('Date')['Price'].median().reset_index()
 competitors_median = competitors_filtered.groupby('Date')['Price'].median().reset_index()
 
 # Calcular estatísticas para o período
-khaolak_stats = calculate_stats(khaolak_filtered, start_date, end_date)
-competitors_stats = calculate_stats(competitors_filtered, start_date, end_date)
+with span('calculate_stats'):
+    khaolak_stats = calculate_stats(khaolak_filtered, start_date, end_date)
+    competitors_stats = calculate_stats(competitors_filtered, start_date, end_date)
 
 # Calcular diferença percentual
 diff_percentage = ((khaolak_stats['median'] - competitors_stats['median']) / competitors_stats['median']) * 100
@@ -164,14 +171,16 @@ if start_date > end_date:
     st.stop()
 
 # Filtrar os dados com base nas datas selecionadas
-khaolak_filtered = khaolak_df[(khaolak_df['Date'].dt.date >= start_date) & (khaolak_df['Date'].dt.date <= end_date)]
-competitors_filtered = competitors_df[(competitors_df['Date'].dt.date >= start_date) & (competitors_df['Date'].dt.date <= end_date)]
+# date_input devolve datetime.date: date_slice inclui o dia final inteiro, sem criar um date por linha
+khaolak_filtered = date_slice(khaolak_df, start_date, end_date)
+competitors_filtered = date_slice(competitors_df, start_date, end_date)
 
 # Calcular as medianas
-khaolak_median = khaolak_filtered.groupby('Date')['Price'].median().reset_index()
-competitors_median = competitors_filtered.groupby('Date')['Price'].median().reset_index()
-
+with span('median groupby'):
+    khaolak_median = khaolak_filtered.groupby('Date')['Price'].median().reset_index()
+    competitors_median = competitors_filtered.groupby('Date')['Price'].median().reset_index()
 
+started = time.perf_counter()
 fig.add_trace(
     go.Scatter(
         x=khaolak_median['Date'],
@@ -217,9 +226,11 @@ fig.update_layout(
 
 # Exibir o gráfico no Streamlit
 st.plotly_chart(fig, use_container_width=True)
+record_span('price chart', time.perf_counter() - started)
 
 def calculate_daily_stats(df, date):
-    day_data = df[df['Date'] == date]
+    # df ordenado por data (sort_by_date): o dia sai por busca binária
+    day_data = date_slice(df, date, date)
     return {
         'date': date,
         'price': day_data['Price'].median(),
@@ -302,10 +313,14 @@ with col2:
 
 st.write(f"Diferença Percentual na Mediana: {diff_percentage:.2f}%")
 
-excel_file = create_excel_report(khaolak_df, competitors_df, start_date, end_date)
+with span('create_excel_report'):
+    excel_file = create_excel_report(khaolak_df, competitors_df, start_date, end_date)
 st.download_button(
     label="Baixar Relatório Detalhado Excel",
     data=excel_file,
     file_name=f"relatorio_detalhado_{start_date}_a_{end_date}.xlsx",
     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-)
\ No newline at end of file
+)
+
+performance_panel()
+refresh_on_data_change([directory])
@@ -8,6 +8,9 @@ import io
 from io import BytesIO
 from openpyxl import Workbook
 from openpyxl.styles import Font
+from inventoryIndex import daily_availability_index
+from fileCatalog import catalog_entries
+from dateSlice import sort_by_date, date_slice
 
 # Configuração da página
 st.set_page_config(layout="wide")
@@ -29,25 +32,24 @@ def clean_price(price):
 def read_excel_files(directory):
     competitors_dfs = []
     khaolak_dfs = []
-    for filename in os.listdir(directory):
-        if filename.endswith(".xlsx") and "detailed_prices" in filename:
-            file_path = os.path.join(directory, filename)
-            try:
-                df = pd.read_excel(file_path)
-                df['Hotel'] = filename.split('_')[0]
-                df['Price'] = df['Price'].apply(clean_price)
-                df_cleaned = df.dropna(subset=['Price'])
-                if "khaolak" in filename.lower():
-                    khaolak_dfs.append(df_cleaned)
-                else:
-                    competitors_dfs.append(df_cleaned)
-            except Exception as e:
-                st.error(f"Error processing {filename}: {str(e)}")
+    for entry in catalog_entries(directory, kind='detailed').itertuples():
+        filename, file_path = os.path.basename(entry.path), entry.path
+        try:
+            df = pd.read_excel(file_path)
+            df['Hotel'] = entry.hotel
+            df['Price'] = df['Price'].apply(clean_price)
+            df_cleaned = df.dropna(subset=['Price'])
+            if "khaolak" in entry.hotel.lower():
+                khaolak_dfs.append(df_cleaned)
+            else:
+                competitors_dfs.append(df_cleaned)
+        except Exception as e:
+            st.error(f"Error processing {filename}: {str(e)}")
     return competitors_dfs, khaolak_dfs
 
 def calculate_stats(df, start_date, end_date):
-    mask = (df['Date'] >= start_date) & (df['Date'] <= end_date)
-    period_data = df.loc[mask]
+    # df ordenado por data (sort_by_date): o período sai por busca binária
+    period_data = date_slice(df, start_date, end_date)
     return {
         'mean': period_data['Price'].mean(),
         'min': period_data['Price'].min(),
@@ -124,8 +126,8 @@ def load_price_data():
     competitors_df = pd.concat(competitors_dfs, ignore_index=True) if competitors_dfs else pd.DataFrame()
     khaolak_df = pd.concat(khaolak_dfs, ignore_index=True) if khaolak_dfs else pd.DataFrame()
 
-    khaolak_df['Date'] = pd.to_datetime(khaolak_df['Date'])
-    competitors_df['Date'] = pd.to_datetime(competitors_df['Date'])
+    khaolak_df = sort_by_date(khaolak_df)
+    competitors_df = sort_by_date(competitors_df)
 
     return khaolak_df, competitors_df
 
@@ -138,8 +140,8 @@ def price_comparison_section(khaolak_df, competitors_df):
     end_date = max(khaolak_df['Date'].max(), competitors_df['Date'].max())
     start_date = end_date - timedelta(days=periods[selected_period])
 
-    khaolak_filtered = khaolak_df[(khaolak_df['Date'] >= start_date) & (khaolak_df['Date'] <= end_date)]
-    competitors_filtered = competitors_df[(competitors_df['Date'] >= start_date) & (competitors_df['Date'] <= end_date)]
+    khaolak_filtered = date_slice(khaolak_df, start_date, end_date)
+    competitors_filtered = date_slice(competitors_df, start_date, end_date)
 
     khaolak_median = khaolak_filtered.groupby('Date')['Price'].median().reset_index()
     competitors_median = competitors_filtered.groupby('Date')['Price'].median().reset_index()
@@ -207,27 +209,27 @@ def statistics_section(khaolak_stats, competitors_stats, diff_percentage):
     st.write(f"Percentage Difference in Median: {diff_percentage:.2f}%")
 
 
-def read_checkin_files(main_directory):
+def read_checkin_files(main_directory, hotels=None, start_date=None, end_date=None):
     checkin_dfs = []
-    for root, dirs, files in os.walk(main_directory):
-        for filename in files:
-            if filename.endswith(".xlsx"):
-                file_path = os.path.join(root, filename)
-                try:
-                    df = pd.read_excel(file_path)
-                    if all(col in df.columns for col in ['occupancy', 'checkin_date', 'price']):
-                        df = df[df['occupancy'] == 2]
-                        df['checkin_date'] = pd.to_datetime(df['checkin_date'], errors='coerce')
-                        df['Hotel'] = os.path.basename(root)
-                        checkin_dfs.append(df)
-                except Exception as e:
-                    st.error(f"Error processing file {filename}: {str(e)}")
+    for entry in catalog_entries(main_directory, kind='scrape', hotels=hotels,
+                                 start_date=start_date, end_date=end_date).itertuples():
+        filename, file_path = os.path.basename(entry.path), entry.path
+        try:
+            df = pd.read_excel(file_path)
+            if all(col in df.columns for col in ['occupancy', 'checkin_date', 'price']):
+                df = df[df['occupancy'] == 2]
+                df['checkin_date'] = pd.to_datetime(df['checkin_date'], errors='coerce')
+                df['Hotel'] = entry.hotel
+                checkin_dfs.append(df)
+        except Exception as e:
+            st.error(f"Error processing file {filename}: {str(e)}")
     if not checkin_dfs:
         raise ValueError("No valid files found with required columns and occupancy equal to 2")
     return pd.concat(checkin_dfs, ignore_index=True)
 
 def calculate_daily_occupancy(df):
-    return df.groupby(['Hotel', 'checkin_date']).size().unstack(level=0).fillna(0)
+    # Ofertas distintas (quarto, ocupação) por hotel/data na coleta mais recente, não linhas brutas
+    return daily_availability_index(df)
 
 def create_occupancy_chart(daily_occupancy):
     fig = go.Figure()
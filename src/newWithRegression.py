@@ -1,56 +1,52 @@
-import os
-import glob
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-from collections import Counter
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import PolynomialFeatures
+from inventoryIndex import total_availability_frame
+from losCube import normalize_nightly_rate
+from fileCatalog import catalog_entries
+from trendFit import days_since, fit_trend, predict_trend
+from discountStats import build_discount_stats, daily_discount_summary, discount_threshold, discount_color_range
+from perfSpans import (span, measure_frame, enable_span_logging, memory_profiling_requested, start_memory_profiling,
+                       write_memory_report)
 
 
+enable_span_logging()
+# PERF_MEMORY_REPORT=<pasta>: pico de RSS e maiores alocadores por estágio, gravados num relatório
+if memory_profiling_requested():
+    start_memory_profiling()
+
 # Path to the folder containing Excel files
 folder_path = r'C:/Users/ribei/Documents/RegioTels/Dashboard-estatistica/Dados'
 
-# Find all Excel files in the specified folder
-files = glob.glob(os.path.join(folder_path, '*.xlsx'))
+# Monthly scrape workbooks listed in the folder catalog (the compset workbook is skipped)
+entries = catalog_entries(folder_path, kind='monthly_scrape')
 
 # List to store DataFrames
 df_list = []
 
-for file in files:
-    # Extract the file name
-    file_name = os.path.basename(file)
-
-    # Split the file name by underscore
-    parts = file_name.split('_')
-
-    # Capture the part of the name that corresponds to the month
-    month = parts[1]
-
+for entry in entries.itertuples():
     # Load the DataFrame from the Excel file
-    df = pd.read_excel(file)
+    with span('read_excel', file=entry.label) as record:
+        df = measure_frame(record, pd.read_excel(entry.path))
 
-    # Add a column for the month, extracted from the file name
-    df['Month'] = month
+    # Add a column for the month, as recorded in the catalog
+    df['Month'] = entry.label
 
     # Add the DataFrame to the list
     df_list.append(df)
 
 # Concatenate all DataFrames into a single DataFrame
-df_combined = pd.concat(df_list, ignore_index=True)
+with span('concat') as record:
+    df_combined = measure_frame(record, pd.concat(df_list, ignore_index=True))
 
 # Convert 'checkin_date' to datetime if it's not already
 df_combined['checkin_date'] = pd.to_datetime(df_combined['checkin_date'])
 
-# Count occurrences of each check-in date
-checkin_counts = Counter(df_combined['checkin_date'])
+# Preço por noite: o preço coletado é o total da estadia
+df_combined = normalize_nightly_rate(df_combined)
 
-# Convert the Counter to a DataFrame for easier visualization
-occupancy_df = pd.DataFrame.from_dict(checkin_counts, orient='index', columns=['Occupied_Rooms'])
-occupancy_df.index.name = 'Date'
-occupancy_df.reset_index(inplace=True)
-occupancy_df['Date'] = pd.to_datetime(occupancy_df['Date'])
-occupancy_df = occupancy_df.sort_values('Date')
+with span('total_availability_frame') as record:
+    occupancy_df = measure_frame(record, total_availability_frame(df_combined))
 
 # Create the occupancy graph
 fig_occupancy = go.Figure()
@@ -85,13 +81,20 @@ fig_occupancy.update_layout(
 )
 
 # Show the occupancy graph
-fig_occupancy.show()
+with span('show occupancy chart'):
+    fig_occupancy.show()
 
 # Create the discount distribution graph
 fig_discount = go.Figure()
 
-# Filter out rows where discount % is less than 24
-df_filtered = df_combined[df_combined['discount %'] >= 24]
+# Discount histograms and stats per hotel/day/deal, computed once
+with span('build_discount_stats'):
+    discount_stats = build_discount_stats(df_combined)
+
+# Filter out rows below the data-driven discount threshold
+min_discount = discount_threshold(discount_stats)
+cmin, cmax = discount_color_range(discount_stats, min_discount)
+df_filtered = df_combined[df_combined['discount %'] >= min_discount]
 
 fig_discount.add_trace(go.Scatter(
     x=df_filtered['checkin_date'],
@@ -102,15 +105,15 @@ fig_discount.add_trace(go.Scatter(
         color=df_filtered['discount %'],
         colorscale='viridis',
         colorbar=dict(title="Desconto %"),
-        cmin=24,
-        cmax=38,
+        cmin=cmin,
+        cmax=cmax,
     ),
     hovertemplate=
     "<b>Data:</b> %{x|%d/%m/%Y}<br>" +
     "<b>Desconto:</b> %{y:.2f}%<br>" +
     "<b>Hotel:</b> %{customdata[0]}<br>" +
     "<b>Preço:</b> R$ %{customdata[1]:.2f}<extra></extra>",
-    customdata=df_filtered[['hotel_name', 'price']]
+    customdata=df_filtered[['hotel_name', 'nightly_price']]
 ))
 
 # Update layout for discount graph
@@ -118,7 +121,7 @@ fig_discount.update_layout(
     title='Distribuição de Descontos ao Longo do Tempo',
     xaxis_title="Data de Check-in",
     yaxis_title="Porcentagem de Desconto",
-    yaxis=dict(range=[24, 38]),
+    yaxis=dict(range=[cmin, cmax]),
     xaxis=dict(
         rangeselector=dict(
             buttons=list([
@@ -134,26 +137,27 @@ fig_discount.update_layout(
 )
 
 # Show the discount distribution graph
-fig_discount.show()
+with span('show discount chart'):
+    fig_discount.show()
 
 # Print summary statistics
 print("Occupancy Statistics:")
 print(occupancy_df.describe())
 print("\nDiscount Distribution Statistics:")
-print(df_filtered.groupby(df_filtered['checkin_date'].dt.to_period('D'))['discount %'].describe())
+print(daily_discount_summary(discount_stats, min_discount=min_discount))
 
 
 # Prepare data for regression
-X = (occupancy_df['Date'] - occupancy_df['Date'].min()).dt.days.values.reshape(-1, 1)
+X = days_since(occupancy_df['Date'])
 y = occupancy_df['Occupied_Rooms'].values
 
 # Perform linear regression
-model = LinearRegression()
-model.fit(X, y)
+with span('fit_trend'):
+    model = fit_trend(X, y)
 
 # Generate predictions
-X_pred = np.array(range(X.min(), X.max() + 30)).reshape(-1, 1)  # Extend 30 days into the future
-y_pred = model.predict(X_pred)
+X_pred = np.arange(X.min(), X.max() + 30)  # Extend 30 days into the future
+y_pred = predict_trend(model, X_pred)
 
 # Convert X_pred back to dates
 dates_pred = pd.date_range(start=occupancy_df['Date'].min(), periods=len(X_pred), freq='D')
@@ -200,10 +204,13 @@ fig_occupancy.update_layout(
 )
 
 # Show the occupancy graph
-fig_occupancy.show()
+with span('show occupancy regression chart'):
+    fig_occupancy.show()
 
 # Print regression statistics
 print("Linear Regression Statistics:")
-print(f"Slope: {model.coef_[0]:.4f}")
-print(f"Intercept: {model.intercept_:.4f}")
-print(f"R-squared: {model.score(X, y):.4f}")
\ No newline at end of file
+print(f"Slope: {model.slope:.4f}")
+print(f"Intercept: {model.intercept:.4f}")
+print(f"R-squared: {model.r2:.4f}")
+
+write_memory_report('newWithRegression')
@@ -3,43 +3,80 @@ import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from collections import Counter
-from sklearn.linear_model import LinearRegression
-import os
-import glob
+from inventoryIndex import total_availability_frame, occupancy_availability_index
+from fileCatalog import catalog_entries, read_workbook, data_version, refresh_on_data_change
+from dateSlice import sort_by_date, date_slice
+from trendFit import days_since, predict_trend, build_trend_stats, window_trend, window_trends_batched
 from io import BytesIO
+from losCube import normalize_nightly_rate, build_los_cube, los_daily_median
+from discountStats import build_discount_stats, daily_discount_summary
+from yoyCompare import build_yoy_metrics, yoy_frame, yoy_summary
+from seasonalForecast import cached_fit, predict_seasonal
+from perfSpans import span, cached_span, cache_miss, record_span, measure_frame, reset_spans, performance_panel
+import time
 
 # Streamlit page configuration
 st.set_page_config(page_title="Hotel Analytics Dashboard", layout="wide")
+reset_spans()
 st.title("Hotel Analytics Dashboard")
 
-# Function to load data
+# Function to load data (version changes when the drop-folder watcher writes new data to the folder)
 @st.cache_data
-def load_data(folder_path):
-    files = glob.glob(os.path.join(folder_path, '*.xlsx'))
+def load_data(folder_path, version=0):
+    # Only the monthly scrape workbooks from the folder catalog (skips the compset workbook)
+    cache_miss()
+    entries = catalog_entries(folder_path, kind='monthly_scrape')
     df_list = []
-    for file in files:
-        file_name = os.path.basename(file)
-        parts = file_name.split('_')
-        month = parts[1]
-        df = pd.read_excel(file)
-        df['Month'] = month
+    for entry in entries.itertuples():
+        with span('read_workbook') as record:
+            df = measure_frame(record, read_workbook(entry.path, entry.checksum))
+        df['Month'] = entry.label
         df_list.append(df)
     df_combined = pd.concat(df_list, ignore_index=True)
-    df_combined['checkin_date'] = pd.to_datetime(df_combined['checkin_date'])
-    return df_combined
+    df_combined = sort_by_date(df_combined, 'checkin_date')
+    return normalize_nightly_rate(df_combined)
+
+# Precomputed nightly-rate aggregates by hotel, date, length of stay and occupancy
+@st.cache_data
+def load_los_cube(df_combined):
+    cache_miss()
+    return build_los_cube(df_combined)
+
+# Discount histograms and stats per hotel/day/LOS/deal, computed at ingest
+@st.cache_data
+def load_discount_stats(df_combined):
+    cache_miss()
+    return build_discount_stats(df_combined)
+
+# Price and availability matrices aligned with the same weekday 52 weeks earlier
+@st.cache_data
+def load_yoy_metrics(df):
+    cache_miss()
+    return build_yoy_metrics(df)
+
+# Running sums per calendar day for the regressions: a new period only reads the prefix sums
+@st.cache_data
+def load_occupancy_trend_stats(occupancy_df):
+    cache_miss()
+    return build_trend_stats(occupancy_df.set_index('Date')['Occupied_Rooms'])
+
+@st.cache_data
+def load_series_trend_stats(df_combined, length_stays):
+    cache_miss()
+    df = df_combined[df_combined['length_stay'].isin(length_stays)]
+    return build_trend_stats(occupancy_availability_index(df))
 
 # Load data
 folder_path = r'C:/Users/ribei/Documents/RegioTels/Dashboard-estatistica/Dados'
-df_combined = load_data(folder_path)
+with cached_span('load_data') as record:
+    df_combined = measure_frame(record, load_data(folder_path, data_version(folder_path)))
+with cached_span('load_los_cube') as record:
+    los_cube = measure_frame(record, load_los_cube(df_combined))
+with cached_span('load_discount_stats'):
+    discount_stats = load_discount_stats(df_combined)
 
-# Create occupancy DataFrame
-checkin_counts = Counter(df_combined['checkin_date'])
-occupancy_df = pd.DataFrame.from_dict(checkin_counts, orient='index', columns=['Occupied_Rooms'])
-occupancy_df.index.name = 'Date'
-occupancy_df.reset_index(inplace=True)
-occupancy_df['Date'] = pd.to_datetime(occupancy_df['Date'])
-occupancy_df = occupancy_df.sort_values('Date')
+with span('total_availability_frame'):
+    occupancy_df = total_availability_frame(df_combined)
 
 # Sidebar for period selection
 st.sidebar.header("Settings")
@@ -47,27 +84,37 @@ date_range = st.sidebar.selectbox(
     "Select analysis period:",
     ["1 month", "3 months", "6 months", "All data"]
 )
+length_stays = sorted(los_cube.index.get_level_values('length_stay').unique())
+selected_length_stays = st.sidebar.multiselect("Length of stay (nights):", length_stays, default=length_stays)
 
-# Function to filter data based on selected period
-def filter_data(df, date_column, period):
+# Start and end of the selected period (None, None for all data)
+def period_bounds(df, date_column, period):
     end_date = df[date_column].max()
     if period == "1 month":
-        start_date = end_date - pd.Timedelta(days=30)
+        return end_date - pd.Timedelta(days=30), end_date
     elif period == "3 months":
-        start_date = end_date - pd.Timedelta(days=90)
+        return end_date - pd.Timedelta(days=90), end_date
     elif period == "6 months":
-        start_date = end_date - pd.Timedelta(days=180)
-    else:
+        return end_date - pd.Timedelta(days=180), end_date
+    return None, None
+
+# Function to filter data based on selected period
+def filter_data(df, date_column, period):
+    start_date, end_date = period_bounds(df, date_column, period)
+    if start_date is None:
         return df
-    return df[(df[date_column] >= start_date) & (df[date_column] <= end_date)]
+    # Frames ordenados pela data: o período é uma fatia por busca binária
+    return date_slice(df, start_date, end_date, date_column)
 
 # Filter data
 filtered_occupancy_df = filter_data(occupancy_df, 'Date', date_range)
 filtered_df_combined = filter_data(df_combined, 'checkin_date', date_range)
+filtered_df_combined = filtered_df_combined[filtered_df_combined['length_stay'].isin(selected_length_stays)]
 
 
 # Occupancy graph
 st.header("Hotel Occupancy")
+started = time.perf_counter()
 fig_occupancy = go.Figure()
 fig_occupancy.add_trace(go.Scatter(
     x=filtered_occupancy_df['Date'],
@@ -76,13 +123,13 @@ fig_occupancy.add_trace(go.Scatter(
     name='Daily Occupancy'
 ))
 
-# Linear regression
-X = (filtered_occupancy_df['Date'] - filtered_occupancy_df['Date'].min()).dt.days.values.reshape(-1, 1)
-y = filtered_occupancy_df['Occupied_Rooms'].values
-model = LinearRegression()
-model.fit(X, y)
-X_pred = np.array(range(X.min(), X.max() + 30)).reshape(-1, 1)
-y_pred = model.predict(X_pred)
+# Linear regression over the selected period, from the cached running sums
+X = days_since(filtered_occupancy_df['Date'])
+with cached_span('load_occupancy_trend_stats'):
+    occupancy_trend_stats = load_occupancy_trend_stats(occupancy_df)
+model = window_trend(occupancy_trend_stats, *period_bounds(occupancy_df, 'Date', date_range))
+X_pred = np.arange(X.min(), X.max() + 30)
+y_pred = predict_trend(model, X_pred)
 dates_pred = pd.date_range(start=filtered_occupancy_df['Date'].min(), periods=len(X_pred), freq='D')
 
 fig_occupancy.add_trace(go.Scatter(
@@ -93,6 +140,36 @@ fig_occupancy.add_trace(go.Scatter(
     line=dict(color='red', dash='dash')
 ))
 
+# Weekly and annual seasonality plus trend, fitted on the whole history (cached by data hash)
+with span('cached_fit (seasonal)'):
+    seasonal_model = cached_fit(occupancy_df.set_index('Date')['Occupied_Rooms'])
+seasonal_pred = predict_seasonal(seasonal_model, dates_pred)
+fig_occupancy.add_trace(go.Scatter(
+    x=dates_pred,
+    y=seasonal_pred,
+    mode='lines',
+    name='Seasonal Forecast',
+    line=dict(color='green', dash='dot')
+))
+
+# Trend per hotel and occupancy level: every series comes from the same running sums
+series_trends = None
+if not filtered_df_combined.empty:
+    with cached_span('load_series_trend_stats'):
+        series_stats = load_series_trend_stats(df_combined, tuple(selected_length_stays))
+    with span('window_trends_batched'):
+        series_trends = window_trends_batched(series_stats, *period_bounds(df_combined, 'checkin_date', date_range))
+if series_trends is not None:
+    for hotel, occupancy in series_trends.projection.columns:
+        fig_occupancy.add_trace(go.Scatter(
+            x=series_trends.projection.index,
+            y=series_trends.projection[(hotel, occupancy)],
+            mode='lines',
+            name=f'Trend {hotel} ({occupancy} guests)',
+            line=dict(dash='dot', width=1),
+            visible='legendonly'
+        ))
+
 fig_occupancy.update_layout(
     xaxis_title='Date',
     yaxis_title='Available Rooms',
@@ -101,23 +178,62 @@ fig_occupancy.update_layout(
 )
 
 # Ensure y-axis starts at 1
-y_max = max(filtered_occupancy_df['Occupied_Rooms'].max(), y_pred.max())
+y_max = max(filtered_occupancy_df['Occupied_Rooms'].max(), y_pred.max(), np.nanmax(seasonal_pred))
 fig_occupancy.update_yaxes(range=[1, y_max * 1.1])  # Start at 1 and add 10% padding at the top
 
 st.plotly_chart(fig_occupancy, use_container_width=True)
+record_span('occupancy chart', time.perf_counter() - started)
+
+if series_trends is not None:
+    with st.expander("Trend per hotel and occupancy"):
+        trend_table = pd.DataFrame({
+            'Intercept': series_trends.coefficients['c0'],
+            'Slope (rooms/day)': series_trends.coefficients['c1'],
+            'R²': series_trends.r2,
+            'Days': series_trends.points,
+            'Projected (+30 days)': series_trends.projection.iloc[-1],
+        })
+        trend_table.index.names = ['Hotel', 'Occupancy']
+        st.dataframe(trend_table)
+
+# Nightly rate by length of stay, served from the precomputed cube
+st.header("Nightly Rate by Length of Stay")
+started = time.perf_counter()
+fig_los = go.Figure()
+if selected_length_stays:
+    los_median = los_daily_median(los_cube, selected_length_stays).reset_index()
+    los_median = filter_data(los_median, 'checkin_date', date_range)
+    for length_stay in los_median.columns.drop('checkin_date'):
+        fig_los.add_trace(go.Scatter(
+            x=los_median['checkin_date'],
+            y=los_median[length_stay],
+            mode='lines',
+            name=f'{length_stay} night(s)'
+        ))
+fig_los.update_layout(
+    xaxis_title='Check-in Date',
+    yaxis_title='Median Nightly Rate',
+    hovermode='x unified'
+)
+st.plotly_chart(fig_los, use_container_width=True)
+record_span('length of stay chart', time.perf_counter() - started)
 
 # Função para criar o texto do hover
 def create_hover_text(row):
     return f"<b>Date:</b> {row['checkin_date'].strftime('%d/%m/%Y')}<br>" + \
            f"<b>Discount:</b> {row['discount %']:.2f}%<br>" + \
            f"<b>Hotel:</b> {row['hotel_name']}<br>" + \
-           f"<b>Price:</b> R$ {row['price']:.2f}"
+           f"<b>Price:</b> R$ {row['nightly_price']:.2f}"
 
 # Filtrar dados para excluir descontos de 0%
 filtered_df_combined_nonzero = filtered_df_combined[filtered_df_combined['discount %'] > 0]
+with span('create_hover_text') as record:
+    record['rows'] = len(filtered_df_combined_nonzero)
+    discount_hover_text = filtered_df_combined_nonzero.apply(create_hover_text, axis=1)
 
 # Gráfico de distribuição de descontos
 st.header("Discount Distribution")
+started = time.perf_counter()
 fig_discount = go.Figure()
 
 fig_discount.add_trace(go.Scatter(
@@ -132,7 +248,7 @@ fig_discount.add_trace(go.Scatter(
         cmin=filtered_df_combined_nonzero['discount %'].min(),
         cmax=filtered_df_combined_nonzero['discount %'].max(),
     ),
-    text=filtered_df_combined_nonzero.apply(create_hover_text, axis=1),
+    text=discount_hover_text,
     hoverinfo='text',
     hoverlabel=dict(namelength=-1)
 ))
@@ -147,9 +263,11 @@ fig_discount.update_layout(
 )
 
 st.plotly_chart(fig_discount, use_container_width=True)
+record_span('discount chart', time.perf_counter() - started)
 
 # Gráfico combinado de ocupação e descontos
 st.header("Occupancy vs Discounts")
+started = time.perf_counter()
 fig_combined = make_subplots(specs=[[{"secondary_y": True}]])
 
 # Adicionar traço de ocupação
@@ -179,7 +297,7 @@ fig_combined.add_trace(
             cmin=filtered_df_combined_nonzero['discount %'].min(),
             cmax=filtered_df_combined_nonzero['discount %'].max(),
         ),
-        text=filtered_df_combined_nonzero.apply(create_hover_text, axis=1),
+        text=discount_hover_text,
         hoverinfo='text',
         hoverlabel=dict(namelength=-1)
     ),
@@ -211,6 +329,39 @@ fig_combined.update_yaxes(
 )
 
 st.plotly_chart(fig_combined, use_container_width=True)
+record_span('occupancy vs discounts chart', time.perf_counter() - started)
+
+# Year-over-year comparison against the same weekday 52 weeks earlier
+st.header("Year over Year (Same Weekday)")
+with cached_span('load_yoy_metrics'):
+    yoy_metrics = load_yoy_metrics(df_combined[df_combined['length_stay'].isin(selected_length_stays)])
+yoy_start = filtered_df_combined['checkin_date'].min()
+yoy_end = filtered_df_combined['checkin_date'].max()
+price_summary = yoy_summary(yoy_metrics['price'], yoy_start, yoy_end) if not filtered_df_combined.empty else None
+
+if price_summary is None or price_summary['Matched Days'].sum() == 0:
+    st.info("No check-in dates in this period have data 52 weeks earlier.")
+else:
+    yoy_hotel = st.selectbox("Hotel:", list(price_summary.index[price_summary['Matched Days'] > 0]))
+    yoy_prices = yoy_frame(yoy_metrics['price'], yoy_hotel, yoy_start, yoy_end)
+    fig_yoy = go.Figure()
+    fig_yoy.add_trace(go.Scatter(x=yoy_prices.index, y=yoy_prices['Current'], mode='lines+markers', name='Current'))
+    fig_yoy.add_trace(go.Scatter(x=yoy_prices.index, y=yoy_prices['Last Year'], mode='lines+markers',
+                                 name='Same weekday last year', line=dict(dash='dash')))
+    fig_yoy.update_layout(
+        xaxis_title='Check-in Date',
+        yaxis_title='Median Nightly Rate',
+        hovermode='x unified'
+    )
+    st.plotly_chart(fig_yoy, use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Nightly Rate")
+        st.write(price_summary)
+    with col2:
+        st.subheader("Available Rooms")
+        st.write(yoy_summary(yoy_metrics['occupancy'], yoy_start, yoy_end))
 
 # Summary statistics
 st.header("Summary Statistics")
@@ -222,8 +373,14 @@ with col1:
 
 with col2:
     st.subheader("Discount Distribution")
-    discount_stats = filtered_df_combined.groupby(filtered_df_combined['checkin_date'].dt.to_period('D'))['discount %'].describe()
-    st.write(discount_stats)
+    with span('daily_discount_summary'):
+        daily_discount_stats = daily_discount_summary(
+            discount_stats,
+            start_date=filtered_df_combined['checkin_date'].min(),
+            end_date=filtered_df_combined['checkin_date'].max(),
+            length_stays=selected_length_stays
+        )
+    st.write(daily_discount_stats)
     
     # Add download button for discount data
     def to_excel(df):
@@ -233,7 +390,8 @@ with col2:
         processed_data = output.getvalue()
         return processed_data
 
-    excel_file = to_excel(discount_stats)
+    with span('to_excel'):
+        excel_file = to_excel(daily_discount_stats)
     st.download_button(
         label="Download Discount Data as Excel",
         data=excel_file,
@@ -243,4 +401,6 @@ with col2:
 
 # Footer note
 st.markdown("---")
-st.markdown("Dashboard created with Streamlit and Plotly")
\ No newline at end of file
+st.markdown("Dashboard created with Streamlit and Plotly")
+performance_panel()
+refresh_on_data_change([folder_path])
\ No newline at end of file
@@ -1,44 +1,43 @@
-import os
-import glob
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-from collections import Counter
-from sklearn.linear_model import LinearRegression
+from inventoryIndex import total_availability_frame
+from losCube import normalize_nightly_rate
+from fileCatalog import catalog_entries, read_workbook, data_version, refresh_on_data_change
+from dateSlice import sort_by_date, date_slice
+from trendFit import days_since, predict_trend, build_trend_stats, window_trend
 import numpy as np
 from datetime import datetime, timedelta
+from seasonalForecast import cached_fit, predict_seasonal
+from discountStats import build_discount_stats, discount_threshold, discount_color_range
+from perfSpans import span, cached_span, cache_miss, measure_frame, reset_spans, performance_panel
 
 # Configuração da página
 st.set_page_config(page_title="Khaolak Data Dashboard", layout="wide")
+reset_spans()
 
 
-# Função para carregar e processar os dados
+# Path to the folder containing Excel files
+folder_path = r'C:/Users/ribei/Documents/RegioTels/Dashboard-estatistica/Dados'
+
+# Função para carregar e processar os dados (version muda quando o dropWatcher grava dados novos na pasta)
 @st.cache_data
-def load_data():
-    # Path to the folder containing Excel files
-    folder_path = r'C:/Users/ribei/Documents/RegioTels/Dashboard-estatistica/Dados'
+def load_data(folder_path, version=0):
+    cache_miss()
 
-# Find all Excel files in the specified folder
-    files = glob.glob(os.path.join(folder_path, '*.xlsx'))
+# Monthly scrape workbooks listed in the folder catalog (the compset workbook is skipped)
+    entries = catalog_entries(folder_path, kind='monthly_scrape')
 
 # List to store DataFrames
     df_list = []
 
-    for file in files:
-    # Extract the file name
-        file_name = os.path.basename(file)
-
-    # Split the file name by underscore
-        parts = file_name.split('_')
-
-    # Capture the part of the name that corresponds to the month
-        month = parts[1]
-
+    for entry in entries.itertuples():
     # Load the DataFrame from the Excel file
-        df = pd.read_excel(file)
+        with span('read_workbook') as record:
+            df = measure_frame(record, read_workbook(entry.path, entry.checksum))
 
-    # Add a column for the month, extracted from the file name
-        df['Month'] = month
+    # Add a column for the month, as recorded in the catalog
+        df['Month'] = entry.label
 
     # Add the DataFrame to the list
         df_list.append(df)
@@ -46,25 +45,31 @@ def load_data():
 # Concatenate all DataFrames into a single DataFrame
     df_combined = pd.concat(df_list, ignore_index=True)
 
-# Convert 'checkin_date' to datetime if it's not already
-    df_combined['checkin_date'] = pd.to_datetime(df_combined['checkin_date'])
+# Convert 'checkin_date' to datetime and keep rows sorted by it for the period slices
+    df_combined = normalize_nightly_rate(sort_by_date(df_combined, 'checkin_date'))
 
-# Count occurrences of each check-in date
-    checkin_counts = Counter(df_combined['checkin_date'])
-
-# Convert the Counter to a DataFrame for easier visualization
-    occupancy_df = pd.DataFrame.from_dict(checkin_counts, orient='index', columns=['Occupied_Rooms'])
-    occupancy_df.index.name = 'Date'
-    occupancy_df.reset_index(inplace=True)
-    occupancy_df['Date'] = pd.to_datetime(occupancy_df['Date'])
-    occupancy_df = occupancy_df.sort_values('Date')
+    with span('total_availability_frame'):
+        occupancy_df = total_availability_frame(df_combined)
         
-    df_filtered = df_combined[df_combined['discount %'] >= 24]
+    # Limite e faixa de cores dos descontos vêm dos dados
+    with span('build_discount_stats'):
+        discount_stats = build_discount_stats(df_combined)
+    min_discount = discount_threshold(discount_stats)
+    discount_range = discount_color_range(discount_stats, min_discount)
+    df_filtered = df_combined[df_combined['discount %'] >= min_discount]
         
-    return df_combined, occupancy_df, df_filtered
+    return df_combined, occupancy_df, df_filtered, discount_range
+
+# Somas acumuladas por dia: mudar o período não refaz a regressão sobre os dados
+@st.cache_data
+def load_trend_stats(occupancy_df):
+    cache_miss()
+    return build_trend_stats(occupancy_df.set_index('Date')['Occupied_Rooms'])
     
 # Carregando os dados
-df_combined, occupancy_df, df_filtered = load_data()
+with cached_span('load_data') as record:
+    df_combined, occupancy_df, df_filtered, (cmin, cmax) = load_data(folder_path, data_version(folder_path))
+    measure_frame(record, df_combined)
 
 st.sidebar.header("Filtros")
 min_date = occupancy_df['Date'].min().date()
@@ -77,77 +82,78 @@ hotels = df_combined['hotel_name'].unique()
 selected_hotels = st.sidebar.multiselect("Selecione os hotéis", hotels, default=hotels)
 
 # Aplicar filtros
-mask = (occupancy_df['Date'].dt.date >= start_date) & (occupancy_df['Date'].dt.date <= end_date)
-occupancy_df_filtered = occupancy_df.loc[mask]
+occupancy_df_filtered = date_slice(occupancy_df, start_date, end_date)
 
-mask = (df_filtered['checkin_date'].dt.date >= start_date) &\
-       (df_filtered['checkin_date'].dt.date <= end_date) &\
-       (df_filtered['hotel_name'].isin(selected_hotels))
-df_filtered_filtered = df_filtered.loc[mask]
+df_filtered_filtered = date_slice(df_filtered, start_date, end_date, 'checkin_date')
+df_filtered_filtered = df_filtered_filtered[df_filtered_filtered['hotel_name'].isin(selected_hotels)]
 
 # Título do dashboard
 st.title("Hotel Data Dashboard")
 
 # Gráfico de ocupação
 st.subheader("Hotel Occupancy")
-fig_occupancy = go.Figure()
-fig_occupancy.add_trace(go.Scatter(
-    x=occupancy_df_filtered['Date'],
-    y=occupancy_df_filtered['Occupied_Rooms'],
-    mode='lines',
-    name='Daily Occupancy'
-))
-fig_occupancy.update_layout(
-    xaxis_title='Date',
-    yaxis_title='Available Rooms',
-    height=500
-)
-st.plotly_chart(fig_occupancy, use_container_width=True)
+with span('occupancy chart (plotly)'):
+    fig_occupancy = go.Figure()
+    fig_occupancy.add_trace(go.Scatter(
+        x=occupancy_df_filtered['Date'],
+        y=occupancy_df_filtered['Occupied_Rooms'],
+        mode='lines',
+        name='Daily Occupancy'
+    ))
+    fig_occupancy.update_layout(
+        xaxis_title='Date',
+        yaxis_title='Available Rooms',
+        height=500
+    )
+    st.plotly_chart(fig_occupancy, use_container_width=True)
 
 # Gráfico de distribuição de descontos
 st.subheader("Discount Distribution")
-fig_discount = go.Figure()
-fig_discount.add_trace(go.Scatter(
-    x=df_filtered_filtered['checkin_date'],
-    y=df_filtered_filtered['discount %'],
-    mode='markers',
-    marker=dict(
-        size=8,
-        color=df_filtered_filtered['discount %'],
-        colorscale='viridis',
-        colorbar=dict(title="Discount %"),
-        cmin=24,
-        cmax=38,
-    ),
-    hovertemplate=
-    "<b>Date:</b> %{x|%d/%m/%Y}<br>" +
-    "<b>Discount:</b> %{y:.2f}%<br>" +
-    "<b>Hotel:</b> %{customdata[0]}<br>" +
-    "<b>Price:</b> R$ %{customdata[1]:.2f}<extra></extra>",
-    customdata=df_filtered_filtered[['hotel_name', 'price']]
-))
-fig_discount.update_layout(
-    xaxis_title="Check-in Date",
-    yaxis_title="Discount Percentage",
-    yaxis=dict(range=[24, 38]),
-    height=500
-)
-st.plotly_chart(fig_discount, use_container_width=True)
+with span('discount chart (plotly)') as record:
+    fig_discount = go.Figure()
+    fig_discount.add_trace(go.Scatter(
+        x=df_filtered_filtered['checkin_date'],
+        y=df_filtered_filtered['discount %'],
+        mode='markers',
+        marker=dict(
+            size=8,
+            color=df_filtered_filtered['discount %'],
+            colorscale='viridis',
+            colorbar=dict(title="Discount %"),
+            cmin=cmin,
+            cmax=cmax,
+        ),
+        hovertemplate=
+        "<b>Date:</b> %{x|%d/%m/%Y}<br>" +
+        "<b>Discount:</b> %{y:.2f}%<br>" +
+        "<b>Hotel:</b> %{customdata[0]}<br>" +
+        "<b>Price:</b> R$ %{customdata[1]:.2f}<extra></extra>",
+        customdata=df_filtered_filtered[['hotel_name', 'nightly_price']]
+    ))
+    fig_discount.update_layout(
+        xaxis_title="Check-in Date",
+        yaxis_title="Discount Percentage",
+        yaxis=dict(range=[cmin, cmax]),
+        height=500
+    )
+    st.plotly_chart(fig_discount, use_container_width=True)
+    record['rows'] = len(df_filtered_filtered)
 
 # Gráfico de ocupação com regressão linear
 st.subheader("Hotel Occupancy with Linear Regression")
 
 # Preparar dados para regressão
-X = (occupancy_df_filtered['Date'] - occupancy_df_filtered['Date'].min()).dt.days.values.reshape(-1, 1)
-y = occupancy_df_filtered['Occupied_Rooms'].values
+X = days_since(occupancy_df_filtered['Date'])
 
-# Realizar regressão linear
-model = LinearRegression()
-model.fit(X, y)
+# Regressão linear do período a partir das somas acumuladas
+with cached_span('load_trend_stats'):
+    trend_stats = load_trend_stats(occupancy_df)
+with span('window_trend'):
+    model = window_trend(trend_stats, start_date, end_date)
 
 # Gerar previsões
-X_pred = np.array(range(X.min(), X.max() + 30)).reshape(-1, 1)  # Estender 30 dias para o futuro
-y_pred = model.predict(X_pred)
+X_pred = np.arange(X.min(), X.max() + 30)  # Estender 30 dias para o futuro
+y_pred = predict_trend(model, X_pred)
 
 # Converter X_pred de volta para datas
 dates_pred = pd.date_range(start=occupancy_df_filtered['Date'].min(), periods=len(X_pred), freq='D')
@@ -172,6 +178,17 @@ fig_occupancy_regression.add_trace(go.Scatter(
     line=dict(color='red', dash='dash')
 ))
 
+# Tendência com sazonalidade semanal e anual, ajustada em todo o histórico (em cache pelo hash dos dados)
+with span('cached_fit (seasonal)'):
+    seasonal_model = cached_fit(occupancy_df.set_index('Date')['Occupied_Rooms'])
+fig_occupancy_regression.add_trace(go.Scatter(
+    x=dates_pred,
+    y=predict_seasonal(seasonal_model, dates_pred),
+    mode='lines',
+    name='Seasonal Forecast',
+    line=dict(color='green', dash='dot')
+))
+
 fig_occupancy_regression.update_layout(
     xaxis_title='Date',
     yaxis_title='Available Rooms',
@@ -182,6 +199,9 @@ st.plotly_chart(fig_occupancy_regression, use_container_width=True)
 
 # Estatísticas de regressão
 st.subheader("Regression Statistics")
-st.write(f"Slope: {model.coef_[0]:.4f}")
-st.write(f"Intercept: {model.intercept_:.4f}")
-st.write(f"R-squared: {model.score(X, y):.4f}")
\ No newline at end of file
+st.write(f"Slope: {model.slope:.4f}")
+st.write(f"Intercept: {model.intercept:.4f}")
+st.write(f"R-squared: {model.r2:.4f}")
+
+performance_panel()
+refresh_on_data_change([folder_path])
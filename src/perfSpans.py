@@ -0,0 +1,250 @@
+import json
+import logging
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+import pandas as pd
+
+try:
+    import resource
+except ImportError:   # Windows: sem pico de RSS, só o tracemalloc
+    resource = None
+
+# Spans da execução atual, por thread: cada sessão do Streamlit roda o script na própria thread
+_local = threading.local()
+# Acertos/faltas de cache acumulados no processo, por nome do span
+_CACHE_COUNTS = {}
+
+logger = logging.getLogger('perf')
+logger.addHandler(logging.NullHandler())
+logger.propagate = False
+
+# Modo de memória (opt-in): PERF_MEMORY_REPORT=<pasta> liga o tracemalloc e grava o relatório no fim
+MEMORY_REPORT_VARIABLE = 'PERF_MEMORY_REPORT'
+TOP_ALLOCATORS = 10
+_memory = {'enabled': False, 'top': TOP_ALLOCATORS, 'spans': []}
+
+def _state():
+    if not hasattr(_local, 'spans'):
+        reset_spans()
+    return _local
+
+def reset_spans():
+    # Chamado no início de cada execução do dashboard (ou de cada main() dos scripts)
+    _local.spans = []
+    _local.stack = []
+
+def frame_memory(df):
+    return int(df.memory_usage(deep=True).sum()) if isinstance(df, pd.DataFrame) else None
+
+def measure_frame(record, df):
+    # Linhas e memória do DataFrame produzido pelo estágio; devolve o próprio df
+    record['rows'] = len(df)
+    record['memory_bytes'] = frame_memory(df)
+    return df
+
+@contextmanager
+def span(name, **fields):
+    # Mede o bloco; spans dentro de spans ficam com o nome do pai em 'parent'
+    state = _state()
+    record = {'name': name, 'parent': state.stack[-1]['name'] if state.stack else None, 'seconds': None,
+              'rows': None, 'memory_bytes': None, 'cache': None}
+    record.update(fields)
+    profiled = _memory['enabled']
+    if profiled:
+        _memory_start(record, state.stack)
+    state.stack.append(record)
+    started = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record['seconds'] = time.perf_counter() - started
+        state.stack.pop()
+        if profiled:
+            _memory_end(record, state.stack)
+        if record['cache'] is not None:
+            record['cache'] = 'miss' if record['cache'] == 'miss' else 'hit'
+            counts = _CACHE_COUNTS.setdefault(name, {'hits': 0, 'misses': 0})
+            counts['misses' if record['cache'] == 'miss' else 'hits'] += 1
+        state.spans.append(record)
+        logger.info(json.dumps(_log_record(record), default=str))
+
+def record_span(name, seconds, **fields):
+    # Para estágios que já medem o próprio tempo (ex.: section_timing dos fragmentos)
+    state = _state()
+    record = {'name': name, 'parent': state.stack[-1]['name'] if state.stack else None, 'seconds': seconds,
+              'rows': None, 'memory_bytes': None, 'cache': None}
+    record.update(fields)
+    state.spans.append(record)
+    logger.info(json.dumps(_log_record(record), default=str))
+    return record
+
+@contextmanager
+def cached_span(name, **fields):
+    # Span em volta de uma chamada a uma função com @st.cache_data: vira 'miss' se o corpo
+    # da função chamar cache_miss(), senão 'hit'
+    with span(name, cache='pending', **fields) as record:
+        yield record
+
+def cache_miss():
+    # Primeira linha do corpo de uma função em cache: só roda quando o cache não tinha o resultado
+    for record in reversed(_state().stack):
+        if record['cache'] == 'pending':
+            record['cache'] = 'miss'
+            return
+
+def _log_record(record):
+    entry = {'span': record['name'], 'ms': round(record['seconds'] * 1000, 3)}
+    for key, value in record.items():
+        if key not in ('name', 'seconds', 'top_allocators') and not key.startswith('_') and value is not None:
+            entry[key] = value
+    return entry
+
+def rss_bytes():
+    # RSS atual; só no Linux (/proc), None nos outros sistemas
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def peak_rss_bytes():
+    # Pico de RSS do processo até agora (ru_maxrss vem em KB no Linux e em bytes no macOS)
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def memory_profiling_requested():
+    return os.environ.get(MEMORY_REPORT_VARIABLE)
+
+def start_memory_profiling(top=TOP_ALLOCATORS):
+    # Liga o modo de memória: cada span passa a registrar pico de RSS, pico do tracemalloc e
+    # os maiores alocadores do estágio. Custa caro (snapshots), por isso só quando pedido
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _memory.update(enabled=True, top=top, spans=[])
+
+def stop_memory_profiling():
+    _memory['enabled'] = False
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+def _fold_traced_peak(records):
+    # O pico do tracemalloc é um só para o processo: antes de zerá-lo, repassa aos spans abertos
+    _, peak = tracemalloc.get_traced_memory()
+    for record in records:
+        if '_traced_peak' in record:
+            record['_traced_peak'] = max(record['_traced_peak'], peak)
+    tracemalloc.reset_peak()
+
+def _memory_start(record, stack):
+    # Snapshot antes de medir o início: a memória do próprio snapshot não entra no estágio
+    record['_snapshot'] = tracemalloc.take_snapshot() if _memory['top'] else None
+    _fold_traced_peak(stack)
+    current, _ = tracemalloc.get_traced_memory()
+    record['_traced_start'] = record['_traced_peak'] = current
+    record['_rss_start'] = rss_bytes()
+
+def _memory_end(record, stack):
+    _fold_traced_peak(stack + [record])
+    current, _ = tracemalloc.get_traced_memory()
+    record['traced_peak_bytes'] = record.pop('_traced_peak') - record['_traced_start']
+    record['traced_net_bytes'] = current - record.pop('_traced_start')
+    rss_start, record['rss_bytes'] = record.pop('_rss_start'), rss_bytes()
+    record['rss_growth_bytes'] = record['rss_bytes'] - rss_start if rss_start is not None else None
+    record['peak_rss_bytes'] = peak_rss_bytes()
+    snapshot = record.pop('_snapshot')
+    if snapshot is not None:
+        record['top_allocators'] = top_allocators(snapshot, tracemalloc.take_snapshot(), _memory['top'])
+    _memory['spans'].append(record)
+
+def top_allocators(before, after, top=TOP_ALLOCATORS):
+    # Linhas de código que mais cresceram entre os dois snapshots
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    differences = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), 'lineno')
+    return [{'location': f"{difference.traceback[0].filename}:{difference.traceback[0].lineno}",
+             'size_diff_bytes': difference.size_diff, 'count_diff': difference.count_diff}
+            for difference in differences[:top] if difference.size_diff > 0]
+
+def memory_report(script):
+    return {
+        'script': script,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'machine': platform.platform(),
+        'peak_rss_bytes': peak_rss_bytes(),
+        'traced_peak_bytes': tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None,
+        'stages': [{key: value for key, value in record.items() if not key.startswith('_')}
+                   for record in _memory['spans']],
+    }
+
+def write_memory_report(script, directory=None):
+    # Um JSON por execução (<script>_<data-hora>.json), para comparar com benchmarks/memoryReport.py
+    if not _memory['enabled']:
+        return None
+    directory = directory or memory_profiling_requested() or '.'
+    os.makedirs(directory, exist_ok=True)
+    report = memory_report(script)
+    stamp = datetime.fromisoformat(report['timestamp']).strftime('%Y%m%d-%H%M%S')
+    path = os.path.join(directory, f"{script}_{stamp}.json")
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+    logger.info(json.dumps({'memory_report': path, 'peak_rss_bytes': report['peak_rss_bytes']}))
+    return path
+
+def enable_span_logging(stream=None):
+    # Scripts em lote: uma linha JSON por estágio (tempo, linhas, memória) no stderr por padrão, sem misturar
+    # com os prints
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+
+def spans_frame():
+    spans = _state().spans
+    columns = ['name', 'parent', 'seconds', 'rows', 'memory_bytes', 'cache']
+    return pd.DataFrame(spans, columns=columns) if spans else pd.DataFrame(columns=columns)
+
+def performance_table():
+    # Um estágio por linha, na ordem em que apareceu pela primeira vez
+    spans = spans_frame()
+    if spans.empty:
+        return pd.DataFrame()
+    grouped = spans.groupby('name', sort=False)
+    table = pd.DataFrame({
+        'Stage of': grouped['parent'].first().fillna(''),
+        'Calls': grouped.size(),
+        'Total ms': grouped['seconds'].sum() * 1000,
+        'Max ms': grouped['seconds'].max() * 1000,
+        'Rows': grouped['rows'].last(),
+        'Memory MB': grouped['memory_bytes'].max() / 1e6,
+        'Cache': grouped['cache'].last(),
+    })
+    return table.round(2)
+
+def cache_counts():
+    return pd.DataFrame.from_dict(_CACHE_COUNTS, orient='index', columns=['hits', 'misses'])
+
+def performance_panel(title="Performance"):
+    # Painel recolhível com os spans desta execução e os acertos de cache do processo
+    import streamlit as st
+    with st.expander(title):
+        table = performance_table()
+        if table.empty:
+            st.caption("No stages were timed in this run.")
+            return
+        top_level = spans_frame()
+        top_level = top_level[top_level['parent'].isna()]
+        st.caption(f"Timed top-level stages: {top_level['seconds'].sum() * 1000:.0f} ms")
+        st.dataframe(table)
+        counts = cache_counts()
+        if not counts.empty:
+            st.write("Cache hits and misses since the app started:")
+            st.dataframe(counts)
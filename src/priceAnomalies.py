@@ -0,0 +1,53 @@
+import pandas as pd
+import numpy as np
+
+GROUP_KEYS = ['hotel_name', 'name', 'occupancy']
+WINDOW = '15D'
+THRESHOLD = 7.0
+MIN_PERIODS = 5
+# Piso da escala em log-preço: com MAD zero (preço constante) só desvios acima de
+# THRESHOLD * MAD_FLOOR em log (~2x para cima ou ~0.5x para baixo) são marcados
+MAD_FLOOR = 0.1
+MAD_SCALE = 0.6745
+
+def _rolling_median(frame, column, group_keys, window, min_periods):
+    # frame já vem ordenado por grupo e data, então o resultado sai na mesma ordem das linhas
+    rolled = (frame.groupby(group_keys, observed=True, sort=False, dropna=False)
+              .rolling(window, on='date', center=True, min_periods=min_periods)[column]
+              .median())
+    return rolled.to_numpy()
+
+def flag_price_anomalies(df, group_keys=GROUP_KEYS, date_column='checkin_date', price_column='price',
+                         window=WINDOW, threshold=THRESHOLD, min_periods=MIN_PERIODS):
+    # z-score robusto (mediana/MAD móveis) por (hotel, quarto, ocupação), todas as linhas de uma vez
+    group_keys = [key for key in group_keys if key in df.columns]
+    # Índice posicional: frames concatenados costumam repetir o índice, e o reindex de volta falharia
+    frame = df[group_keys].reset_index(drop=True)
+    frame['date'] = pd.to_datetime(df[date_column]).to_numpy()
+    frame['price'] = pd.to_numeric(df[price_column], errors='coerce').to_numpy()
+    # Erros de coleta são multiplicativos (10x, 1/10), então o z-score é calculado em log-preço
+    frame['log_price'] = np.log(frame['price'].where(frame['price'] > 0))
+    frame = frame.sort_values(group_keys + ['date'], kind='mergesort')
+
+    frame['median'] = _rolling_median(frame, 'log_price', group_keys, window, min_periods)
+    frame['deviation'] = (frame['log_price'] - frame['median']).abs()
+    mad = _rolling_median(frame, 'deviation', group_keys, window, min_periods)
+    scale = np.maximum(mad / MAD_SCALE, MAD_FLOOR)
+
+    frame['zscore'] = (frame['log_price'] - frame['median']) / scale
+    # Movimentos do hotel inteiro no mesmo dia (evento, alta temporada) não são erro de coleta:
+    # desconta o z-score mediano do hotel na data antes de aplicar o limite
+    day_keys = [key for key in group_keys[:1] if key == 'hotel_name'] + ['date']
+    frame['zscore'] -= frame.groupby(day_keys, observed=True, dropna=False)['zscore'].transform('median').fillna(0)
+    frame = frame.sort_index()
+
+    # Devolve uma cópia com as colunas novas, sem alterar o frame do chamador
+    return df.assign(
+        price_median=np.exp(frame['median'].to_numpy()),
+        price_zscore=frame['zscore'].to_numpy(),
+        price_anomaly=((frame['zscore'].abs() > threshold).fillna(False) | (frame['price'] <= 0)).to_numpy(),
+    )
+
+def quarantine_anomalies(df):
+    flagged = df['price_anomaly'].to_numpy(dtype=bool)
+    return df[~flagged], df[flagged]
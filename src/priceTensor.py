@@ -0,0 +1,53 @@
+import pandas as pd
+import numpy as np
+from collections import namedtuple
+
+OCCUPANCY_ORDER = [2, 3, 4, 5, 1]
+
+# tensor[h, d, o] = menor preço Regular do hotel h, na data d, com ocupação occupancies[o]
+PriceTensor = namedtuple('PriceTensor', ['tensor', 'hotels', 'dates', 'occupancies'])
+
+def build_price_tensor(scrapes, start_date=None, end_date=None, room_type='Regular', price_column='price'):
+    # Ocupação vazia viraria o código -1 do factorize, que o np.fmin.at grava na última ocupação
+    rows = scrapes[(scrapes['type'] == room_type) & scrapes[price_column].notna() & scrapes['occupancy'].notna()]
+
+    hotel_codes, hotels = pd.factorize(rows['hotel_name'].astype(str), sort=False)
+    occupancy_codes, occupancies = pd.factorize(rows['occupancy'], sort=True)
+
+    checkin = rows['checkin_date'].to_numpy(dtype='datetime64[D]')
+    start_date = checkin.min() if start_date is None else np.datetime64(pd.Timestamp(start_date).date(), 'D')
+    end_date = checkin.max() if end_date is None else np.datetime64(pd.Timestamp(end_date).date(), 'D')
+    dates = pd.date_range(start=start_date, end=end_date, name='Date')
+
+    date_codes = (checkin - start_date).astype(np.int64)
+    in_range = (date_codes >= 0) & (date_codes < len(dates))
+
+    tensor = np.full((len(hotels), len(dates), len(occupancies)), np.inf)
+    np.fmin.at(tensor,
+               (hotel_codes[in_range], date_codes[in_range], occupancy_codes[in_range]),
+               rows[price_column].to_numpy(dtype=np.float64)[in_range])
+    tensor[np.isinf(tensor)] = np.nan
+
+    return PriceTensor(tensor, pd.Index(hotels), dates, np.asarray(occupancies))
+
+def resolve_hierarchy(price_tensor, occupancy_order=OCCUPANCY_ORDER):
+    # Reordena o eixo de ocupação pela preferência e pega a primeira ocupação com preço
+    occupancy_order = [o for o in occupancy_order if o in price_tensor.occupancies]
+    columns = np.searchsorted(price_tensor.occupancies, occupancy_order)
+    ordered = price_tensor.tensor[:, :, columns]
+
+    available = ~np.isnan(ordered)
+    first = available.argmax(axis=2)
+    found = available.any(axis=2)
+
+    prices = np.take_along_axis(ordered, first[:, :, None], axis=2)[:, :, 0]
+    occupancy = np.asarray(occupancy_order, dtype=np.float64)[first]
+    occupancy[~found] = np.nan
+    return prices, occupancy
+
+def tensor_to_compset(price_tensor, occupancy_order=OCCUPANCY_ORDER, hotels=None):
+    prices, _ = resolve_hierarchy(price_tensor, occupancy_order)
+    matrix = pd.DataFrame(prices.T, index=price_tensor.dates, columns=price_tensor.hotels)
+    if hotels is not None:
+        matrix = matrix.reindex(columns=hotels)
+    return matrix
@@ -0,0 +1,87 @@
+import pandas as pd
+import os
+import re
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+DEFAULT_MEMO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'room_types_memo.csv')
+OTHER = 'Other'
+
+# Categorias canônicas em ordem de prioridade; cada frase só casa se todos os seus tokens aparecem no nome
+CANONICAL_CATEGORIES = [
+    ('Run of House', [('assigned', 'arrival'), ('partner', 'offer')]),
+    ('Villa', [('villa',)]),
+    ('Suite', [('suite',)]),
+    ('Family', [('family',), ('children',)]),
+    ('Pool Access', [('pool', 'access'), ('private', 'pool')]),
+    ('Bungalow', [('bungalow',)]),
+    ('Deluxe', [('deluxe',), ('grand',), ('premier',)]),
+    ('Standard', [('superior',), ('standard',), ('classic',), ('chalet',), ('triple',), ('double', 'room'),
+                  ('twin', 'room')]),
+]
+CATEGORY_NAMES = [category for category, _ in CANONICAL_CATEGORIES] + [OTHER]
+FUZZY_THRESHOLD = 0.85
+BLOCK_PREFIX = 3
+
+KEYWORDS = sorted({token for _, phrases in CANONICAL_CATEGORIES for phrase in phrases for token in phrase})
+
+# Bloqueio por prefixo: cada token do nome só é comparado com palavras-chave do mesmo bloco
+KEYWORD_BLOCKS = {}
+for keyword in KEYWORDS:
+    KEYWORD_BLOCKS.setdefault(keyword[:BLOCK_PREFIX], []).append(keyword)
+
+# Índice invertido palavra-chave -> categorias candidatas
+CATEGORY_INDEX = {}
+for position, (category, phrases) in enumerate(CANONICAL_CATEGORIES):
+    for phrase in phrases:
+        for token in phrase:
+            CATEGORY_INDEX.setdefault(token, set()).add(position)
+
+def tokenize(name):
+    return re.findall(r'[a-z]+', str(name).lower())
+
+@lru_cache(maxsize=None)
+def match_token(token):
+    if token in CATEGORY_INDEX:
+        return token
+    best, best_score = None, FUZZY_THRESHOLD
+    for keyword in KEYWORD_BLOCKS.get(token[:BLOCK_PREFIX], []):
+        score = SequenceMatcher(None, token, keyword).ratio()
+        if score >= best_score:
+            best, best_score = keyword, score
+    return best
+
+def match_room_type(name):
+    keywords = {match_token(token) for token in tokenize(name)} - {None}
+    candidates = sorted(set().union(*(CATEGORY_INDEX[keyword] for keyword in keywords))) if keywords else []
+    for position in candidates:
+        category, phrases = CANONICAL_CATEGORIES[position]
+        if any(all(token in keywords for token in phrase) for phrase in phrases):
+            return category
+    return OTHER
+
+def load_memo(memo_path=DEFAULT_MEMO_PATH):
+    if memo_path is None or not os.path.exists(memo_path):
+        return {}
+    memo = pd.read_csv(memo_path, dtype=str, keep_default_na=False)
+    return dict(zip(memo['name'], memo['category']))
+
+def save_memo(memo, memo_path=DEFAULT_MEMO_PATH):
+    memo_df = pd.DataFrame(sorted(memo.items()), columns=['name', 'category'])
+    memo_df.to_csv(memo_path, index=False)
+
+def normalize_room_types(names, memo_path=DEFAULT_MEMO_PATH):
+    # Cada nome distinto é casado uma única vez; o resultado fica salvo no memo
+    codes, uniques = pd.factorize(pd.Series(names, dtype=object).fillna(''))
+    memo = load_memo(memo_path)
+    new_names = [name for name in uniques if name not in memo]
+    if new_names:
+        memo.update({name: match_room_type(name) for name in new_names})
+        if memo_path is not None:
+            try:
+                save_memo(memo, memo_path)
+            except OSError as e:
+                print(f"Error saving room type memo: {str(e)}")
+
+    categories = pd.Categorical([memo[name] for name in uniques], categories=CATEGORY_NAMES)
+    return pd.Categorical.from_codes(categories.codes[codes], categories=CATEGORY_NAMES)
@@ -0,0 +1,161 @@
+import pandas as pd
+import numpy as np
+import os
+import re
+import time
+from perfSpans import span, measure_frame, enable_span_logging
+
+# Mesmas colunas, na mesma ordem, das planilhas de coleta
+SCRAPE_SCHEMA = ['hotel_name', 'type', 'name', 'occupancy', 'price', 'checkin_date', 'checkout_date', 'length_stay',
+                 'breakfast_included', 'refundable', 'deal', 'discount %', 'deal_name', 'fetch_date', 'block_id']
+
+ROOM_NAMES = [
+    'Superior Double or Twin Room', 'Deluxe Room', 'Deluxe Pool Access', 'Garden Bungalow', 'Beachfront Villa',
+    'Family Suite', 'Junior Suite', 'Standard Room', 'Pool Villa', 'Oriental Villa', 'Siam Chalet Room',
+    'Premier Sea View Room',
+]
+DISCOUNTS = [25, 30, 35, 45, 50, 75, 78]
+
+def hotel_names(hotels):
+    return [f'Synthetic Resort {i + 1:02d} Khao Lak' for i in range(hotels)]
+
+def room_names(room_types):
+    # Nomes reais primeiro; acima disso, variações numeradas
+    return [ROOM_NAMES[i % len(ROOM_NAMES)] + (f' {i // len(ROOM_NAMES) + 1}' if i >= len(ROOM_NAMES) else '')
+            for i in range(room_types)]
+
+def _generate_fetch(fetch_number, fetch_date, checkin_days, start, names, rooms, occupancies, length_stays,
+                    sold_out_rate, room_sold_out_rate, deal_rate, wholesaler_rate, seed):
+    # Linhas de uma coleta: (check-in, hotel, quarto, ocupação, estadia), montadas em NumPy.
+    # Semente própria por coleta: o resultado não depende de como as coletas são agrupadas
+    rng = np.random.default_rng([seed, fetch_number])
+    hotels, room_types = len(names), len(rooms)
+    grid = np.stack(np.meshgrid(np.arange(len(checkin_days)), np.arange(hotels), np.arange(room_types),
+                                np.arange(len(occupancies)), np.arange(len(length_stays)), indexing='ij'),
+                    axis=-1).reshape(-1, 5)
+    day_index, hotel, room, occupancy_index, stay_index = grid.T
+
+    # Sold out: o hotel inteiro some na data ou só um quarto
+    hotel_sold_out = rng.random((len(checkin_days), hotels)) < sold_out_rate
+    keep = ~hotel_sold_out[day_index, hotel] & (rng.random(len(grid)) >= room_sold_out_rate)
+    day_index, hotel, room = day_index[keep], hotel[keep], room[keep]
+    occupancy_index, stay_index = occupancy_index[keep], stay_index[keep]
+    n = len(day_index)
+
+    occupancy = np.asarray(occupancies)[occupancy_index]
+    length_stay = np.asarray(length_stays)[stay_index]
+    checkin = start + pd.to_timedelta(checkin_days[day_index], unit='D')
+
+    # Preço: base do hotel x quarto x ocupação x alta temporada (nov-abr) x fim de semana x ruído
+    hotel_base = np.random.default_rng(seed).uniform(1500, 6000, hotels)
+    room_factor = np.linspace(1.0, 2.5, room_types)
+    season = 1 + 0.35 * np.cos(2 * np.pi * (checkin.dayofyear.to_numpy() - 15) / 365.25)
+    weekend = np.where(checkin.dayofweek.to_numpy() >= 4, 1.1, 1.0)
+    nightly = (hotel_base[hotel] * room_factor[room] * (1 + 0.15 * (occupancy - 2)) * season * weekend *
+               rng.lognormal(0, 0.05, n))
+    price = np.round(nightly * length_stay).astype(np.int64)
+
+    deal = rng.random(n) < deal_rate
+    discount = np.where(deal, rng.choice(DISCOUNTS, n), 0)
+    wholesaler = rng.random(n) < wholesaler_rate
+    breakfast = rng.random(n) < 0.85
+    refundable = rng.random(n) < 0.9
+
+    # block_id por (hotel, quarto, ocupação, café): tabela pequena indexada, sem formatar linha a linha
+    block_ids = np.array([f'{h}{r:03d}_{8_800_000 + h * 100 + r}_{o}_{b}_0_{440_000 + h}'
+                          for h in range(hotels) for r in range(room_types) for o in occupancies for b in (0, 1)],
+                         dtype=object)
+    block_code = ((hotel * room_types + room) * len(occupancies) + occupancy_index) * 2 + breakfast
+    block_id = np.where(wholesaler, np.nan, block_ids[block_code])
+
+    df = pd.DataFrame({
+        'hotel_name': np.asarray(names, dtype=object)[hotel],
+        'type': np.where(wholesaler, 'Wholesaler', 'Regular'),
+        'name': np.asarray(rooms, dtype=object)[room],
+        'occupancy': occupancy,
+        'price': price,
+        'checkin_date': checkin.strftime('%Y-%m-%d'),
+        'checkout_date': (checkin + pd.to_timedelta(length_stay, unit='D')).strftime('%Y-%m-%d'),
+        'length_stay': length_stay,
+        'breakfast_included': np.where(breakfast, 'yes', 'no'),
+        'refundable': np.where(refundable, 'yes', 'no'),
+        'deal': np.where(deal, 'yes', 'no'),
+        'discount %': discount,
+        'deal_name': np.where(deal & (rng.random(n) < 0.05), 'Getaway Deal', None),
+        'fetch_date': fetch_date.strftime('%Y-%m-%d'),
+        'block_id': block_id,
+    })
+    return df[SCRAPE_SCHEMA]
+
+def iter_scrapes(hotels=8, start_date='2024-10-01', years=1, fetch_every_days=365, horizon_days=365,
+                 room_types=6, occupancies=(2, 3, 4), length_stays=(1,), sold_out_rate=0.05,
+                 room_sold_out_rate=0.15, deal_rate=0.25, wholesaler_rate=0.01, seed=0):
+    # Um DataFrame por coleta, para gerar volumes grandes sem ter tudo na memória.
+    # Cada coleta cobre os check-ins dos horizon_days seguintes dentro de [start_date, start_date + years)
+    start = pd.Timestamp(start_date)
+    end = start + pd.DateOffset(years=years)
+    fetches = pd.date_range(start - pd.Timedelta(days=1), end - pd.Timedelta(days=1), freq=f'{fetch_every_days}D')
+    names = hotel_names(hotels)
+    rooms = room_names(room_types)
+    all_days = np.arange((end - start).days)
+
+    for fetch_number, fetch_date in enumerate(fetches):
+        offset = (fetch_date - start).days
+        checkin_days = all_days[(all_days > offset) & (all_days <= offset + horizon_days)]
+        yield _generate_fetch(fetch_number, fetch_date, checkin_days, start, names, rooms, occupancies, length_stays,
+                              sold_out_rate, room_sold_out_rate, deal_rate, wholesaler_rate, seed)
+
+def generate_scrapes(**params):
+    # Todas as coletas num único DataFrame; os padrões dão o volume de hoje (8 hotéis, 1 coleta)
+    return pd.concat(iter_scrapes(**params), ignore_index=True)
+
+def scrape_file_name(hotel_name, fetch_date, month_start):
+    # Mesmo padrão dos arquivos do DashboardTHKHA: <hotel>_<coleta>_<mês>_to_<mês seguinte>.xlsx
+    month_start = pd.Timestamp(month_start)
+    next_month = month_start + pd.offsets.MonthBegin(1)
+    safe_name = re.sub(r'[^\w\-]', '_', hotel_name)
+    return (f"{safe_name}_{pd.Timestamp(fetch_date).strftime('%Y%m%d')}_"
+            f"{month_start.strftime('%Y-%m-%d')}_to_{next_month.strftime('%Y-%m-%d')}.xlsx")
+
+def write_scrape_workbooks(df, output_directory, file_format='xlsx'):
+    # Uma pasta por hotel e um arquivo por (coleta, mês de check-in), como o DashboardTHKHA.
+    # file_format='parquet' grava um arquivo por primeira coleta do frame (precisa de pyarrow ou fastparquet)
+    os.makedirs(output_directory, exist_ok=True)
+    if file_format == 'parquet':
+        output_file_path = os.path.join(output_directory, f"scrapes_{df['fetch_date'].min().replace('-', '')}.parquet")
+        df.to_parquet(output_file_path, index=False)
+        return [output_file_path]
+
+    written = []
+    months = df['checkin_date'].str[:7] + '-01'
+    for (hotel_name, fetch_date, month_start), workbook in df.groupby(['hotel_name', 'fetch_date', months], sort=True):
+        hotel_directory = os.path.join(output_directory, re.sub(r'[^\w\-]', '_', hotel_name))
+        os.makedirs(hotel_directory, exist_ok=True)
+        output_file_path = os.path.join(hotel_directory, scrape_file_name(hotel_name, fetch_date, month_start))
+        workbook.to_excel(output_file_path, index=False)
+        written.append(output_file_path)
+    return written
+
+def main():
+    output_directory = "./data/Synthetic/"   # Replace with the directory to generate into
+
+    # Os padrões dão o volume de hoje (8 hotéis, 1 coleta). Para 10x-1000x aumente hotels, years
+    # ou diminua fetch_every_days (ex.: fetch_every_days=7 com years=2 e hotels=20)
+    params = dict(hotels=8, years=1, fetch_every_days=365, room_types=6, occupancies=(2, 3, 4))
+
+    enable_span_logging()
+    started = time.perf_counter()
+    rows = files = 0
+    try:
+        # Uma coleta por vez: a memória não cresce com o número de coletas
+        for df in iter_scrapes(**params):
+            with span('write_scrape_workbooks', fetch_date=df['fetch_date'].iloc[0]) as record:
+                measure_frame(record, df)
+                files += len(write_scrape_workbooks(df, output_directory))
+            rows += len(df)
+        print(f"Saved {rows} rows in {files} files to {output_directory} in {time.perf_counter() - started:.1f} s")
+    except Exception as e:
+        print(f"Error saving synthetic scrapes: {str(e)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import pandas as pd
+import numpy as np
+import os
+import pickle
+import hashlib
+from collections import namedtuple
+from trendFit import days_since, r_squared
+
+WEEK_DAYS = 7
+YEAR_DAYS = 365.25
+
+# Tendência linear + termos de Fourier semanais e anuais; coefficients na ordem de seasonal_design
+SeasonalModel = namedtuple('SeasonalModel', ['origin', 'coefficients', 'weekly_order', 'annual_order',
+                                             'residual_std', 'r2', 'points', 'data_hash'])
+
+# Modelos já ajustados, por hash dos dados: um rerun do dashboard não reajusta nada
+_MODEL_CACHE = {}
+
+def seasonal_design(x, weekly_order=3, annual_order=3):
+    x = np.asarray(x, dtype=np.float64)
+    columns = [np.ones_like(x), x]
+    for period, order in [(WEEK_DAYS, weekly_order), (YEAR_DAYS, annual_order)]:
+        for k in range(1, order + 1):
+            angle = 2 * np.pi * k * x / period
+            columns += [np.sin(angle), np.cos(angle)]
+    return np.column_stack(columns)
+
+def data_hash(series, **params):
+    # Muda quando muda qualquer data, valor ou parâmetro do ajuste
+    digest = hashlib.sha1(pd.util.hash_pandas_object(series, index=True).to_numpy().tobytes())
+    digest.update(repr(sorted(params.items())).encode())
+    return digest.hexdigest()
+
+def fit_seasonal(series, weekly_order=3, annual_order=3):
+    # series: valores por data (NaN = dia sem coleta)
+    key = data_hash(series, weekly_order=weekly_order, annual_order=annual_order)
+    series = series.dropna()
+    dates = pd.DatetimeIndex(series.index).normalize()
+    origin = dates.min()
+    x = days_since(dates, origin)
+
+    # Com menos de um ano de histórico a sazonalidade anual se confunde com a tendência
+    if len(x) == 0 or x.max() < 365:
+        annual_order = 0
+    design = seasonal_design(x, weekly_order, annual_order)
+    y = series.to_numpy(dtype=np.float64)
+    if len(y) <= design.shape[1]:
+        coefficients = np.full(design.shape[1], np.nan)
+        return SeasonalModel(origin, coefficients, weekly_order, annual_order, np.nan, np.nan, len(y), key)
+
+    coefficients = np.linalg.lstsq(design, y, rcond=None)[0]
+    fitted = design @ coefficients
+    residual_std = np.sqrt(np.sum((y - fitted) ** 2) / (len(y) - design.shape[1]))
+    return SeasonalModel(origin, coefficients, weekly_order, annual_order, residual_std,
+                         r_squared(y, fitted), len(y), key)
+
+def predict_seasonal(model, dates):
+    x = days_since(pd.DatetimeIndex(dates).normalize(), model.origin)
+    return seasonal_design(x, model.weekly_order, model.annual_order) @ model.coefficients
+
+def forecast_frame(model, last_date, horizon=30):
+    # Próximos horizon dias depois de last_date, com faixa de ±1,96 desvio dos resíduos
+    dates = pd.date_range(pd.Timestamp(last_date).normalize() + pd.Timedelta(days=1), periods=horizon, freq='D')
+    forecast = predict_seasonal(model, dates)
+    return pd.DataFrame({
+        'Forecast': forecast,
+        'Lower': forecast - 1.96 * model.residual_std,
+        'Upper': forecast + 1.96 * model.residual_std,
+    }, index=dates)
+
+def cached_fit(series, cache_dir=None, weekly_order=3, annual_order=3):
+    # Procura o modelo pelo hash dos dados na memória e, se cache_dir for dado, em disco
+    key = data_hash(series, weekly_order=weekly_order, annual_order=annual_order)
+    model = _MODEL_CACHE.get(key)
+    path = os.path.join(cache_dir, f'{key}.pkl') if cache_dir else None
+    if model is None and path and os.path.exists(path):
+        try:
+            with open(path, 'rb') as f:
+                model = pickle.load(f)
+        except Exception as e:
+            print(f"Error reading cached model {path}: {str(e)}")
+    if model is None:
+        model = fit_seasonal(series, weekly_order, annual_order)
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(path, 'wb') as f:
+                pickle.dump(model, f)
+    _MODEL_CACHE[key] = model
+    return model
+
+def fit_seasonal_per_hotel(frame, cache_dir=None, weekly_order=3, annual_order=3):
+    # frame: data x hotel; só os hotéis cuja série mudou são reajustados
+    return {hotel: cached_fit(frame[hotel], cache_dir, weekly_order, annual_order) for hotel in frame.columns}
+
+def forecast_summary(models, last_date, horizon=30):
+    # Uma linha por hotel: média prevista para os próximos dias e qualidade do ajuste
+    rows = {}
+    for hotel, model in models.items():
+        forecast = forecast_frame(model, last_date, horizon)['Forecast']
+        rows[hotel] = {
+            f'Forecast (next {horizon} days)': forecast.mean(),
+            'R²': model.r2,
+            'Residual Std': model.residual_std,
+            'Days': model.points,
+        }
+    return pd.DataFrame.from_dict(rows, orient='index')
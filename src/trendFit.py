@@ -0,0 +1,180 @@
+import pandas as pd
+import numpy as np
+from collections import namedtuple
+
+# coefficients em grau crescente: y = c0 + c1*x + c2*x^2 ...
+TrendFit = namedtuple('TrendFit', ['coefficients', 'slope', 'intercept', 'r2', 'degree'])
+# Uma linha por série: coefficients (série x grau), r2 e points por série, projection (data x série)
+BatchTrends = namedtuple('BatchTrends', ['coefficients', 'r2', 'points', 'projection'])
+
+def days_since(dates, origin=None):
+    # Eixo x das tendências: dias desde a primeira data
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    origin = dates.min() if origin is None else np.datetime64(origin, 'D')
+    return (dates - origin).astype(np.int64)
+
+def _r2(ss_res, ss_tot, sum_yy):
+    # Mesma convenção do sklearn.metrics.r2_score para y constante; as somas são comparadas com uma
+    # tolerância relativa a sum(y²), já que o ajuste deixa um resíduo numérico (~1e-30) em vez de zero
+    tolerance = 1e-12 * np.maximum(sum_yy, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(ss_tot > tolerance, 1.0 - ss_res / ss_tot, np.where(np.abs(ss_res) <= tolerance, 1.0, 0.0))
+
+def r_squared(y, y_hat):
+    ss_res = np.sum((y - y_hat) ** 2)
+    ss_tot = np.sum((y - y.mean()) ** 2)
+    return float(_r2(ss_res, ss_tot, np.sum(y ** 2)))
+
+def _clean_xy(x, y):
+    x = np.asarray(x, dtype=np.float64).ravel()
+    y = np.asarray(y, dtype=np.float64).ravel()
+    valid = ~np.isnan(x) & ~np.isnan(y)
+    return x[valid], y[valid]
+
+def fit_trend(x, y, degree=1):
+    # Mínimos quadrados em NumPy (linear quando degree=1); dias sem valor (NaN) são ignorados
+    x, y = _clean_xy(x, y)
+    design = np.vander(x, degree + 1, increasing=True)
+    coefficients = np.linalg.lstsq(design, y, rcond=None)[0]
+    r2 = r_squared(y, design @ coefficients)
+    slope = coefficients[1] if degree >= 1 else 0.0
+    return TrendFit(coefficients, slope, coefficients[0], r2, degree)
+
+def predict_trend(fit, x):
+    return np.polynomial.polynomial.polyval(np.asarray(x, dtype=np.float64), fit.coefficients)
+
+def fit_trends_batched(series, degree=1, horizon=30):
+    # series: data x série, NaN = dia sem valor. Todas as equações normais são montadas com
+    # einsum sobre a máscara e resolvidas numa única chamada de np.linalg.solve
+    x = days_since(series.index).astype(np.float64)
+    values = series.to_numpy(dtype=np.float64)
+    mask = ~np.isnan(values)
+    y = np.where(mask, values, 0.0)
+    weights = mask.astype(np.float64)
+
+    design = np.vander(x, degree + 1, increasing=True)
+    normal = np.einsum('ts,ti,tj->sij', weights, design, design)
+    rhs = np.einsum('ts,ti,ts->si', weights, design, y)
+    points = mask.sum(axis=0)
+
+    # Séries com pontos de menos para o grau ficam com coeficientes NaN
+    solvable = (points > degree) & (np.linalg.matrix_rank(normal) == degree + 1)
+    normal[~solvable] = np.eye(degree + 1)
+    rhs[~solvable] = 0.0
+    coefficients = np.linalg.solve(normal, rhs[..., None])[..., 0]
+    coefficients[~solvable] = np.nan
+
+    fitted = design @ coefficients.T
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = y.sum(axis=0) / points
+        ss_res = (weights * (y - fitted) ** 2).sum(axis=0)
+        ss_tot = (weights * (y - means) ** 2).sum(axis=0)
+        r2 = _r2(ss_res, ss_tot, (weights * y ** 2).sum(axis=0))
+    r2[~solvable] = np.nan
+
+    # Mesmo eixo das regressões dos dashboards: do primeiro dia até horizon dias depois do último
+    x_pred = np.arange(x.min(), x.max() + horizon) if len(x) else np.array([])
+    projection = pd.DataFrame(np.vander(x_pred, degree + 1, increasing=True) @ coefficients.T,
+                              index=pd.date_range(series.index.min(), periods=len(x_pred), freq='D'),
+                              columns=series.columns)
+    return BatchTrends(
+        pd.DataFrame(coefficients, index=series.columns, columns=[f'c{i}' for i in range(degree + 1)]),
+        pd.Series(r2, index=series.columns, name='R²'),
+        pd.Series(points, index=series.columns, name='Points'),
+        projection,
+    )
+
+# Somas por dia de calendário, acumuladas: prefix[d] = somas dos dias [0, d) desde origin.
+# prefix tem forma (dias + 1, estatística, série), na ordem de SUFFICIENT_STATS
+SUFFICIENT_STATS = ['n', 'sum_x', 'sum_y', 'sum_xy', 'sum_xx', 'sum_yy']
+TrendStats = namedtuple('TrendStats', ['origin', 'prefix', 'columns'])
+
+def _as_frame(series):
+    frame = series.to_frame() if isinstance(series, pd.Series) else series
+    return frame, pd.DatetimeIndex(frame.index).normalize()
+
+def _daily_sums(days, values, n_days):
+    # Soma das estatísticas de cada dia em [0, n_days); NaN não conta
+    mask = ~np.isnan(values)
+    x = np.broadcast_to(days[:, None].astype(np.float64), values.shape)
+    y = np.where(mask, values, 0.0)
+    w = mask.astype(np.float64)
+    terms = np.stack([w, w * x, y, y * x, w * x * x, y * y], axis=1)
+    daily = np.zeros((n_days, len(SUFFICIENT_STATS), values.shape[1]))
+    np.add.at(daily, days, terms)
+    return daily
+
+def build_trend_stats(series, origin=None):
+    # series: data x série (ou uma Series); várias linhas no mesmo dia são somadas
+    frame, dates = _as_frame(series)
+    origin = dates.min() if origin is None else pd.Timestamp(origin)
+    days = (dates - origin).days.to_numpy()
+    n_days = days.max() + 1 if len(days) else 0
+    daily = _daily_sums(days, frame.to_numpy(dtype=np.float64), n_days)
+    prefix = np.concatenate([np.zeros((1,) + daily.shape[1:]), np.cumsum(daily, axis=0)])
+    return TrendStats(origin, prefix, frame.columns)
+
+def _window_bounds(stats, start_date, end_date):
+    n_days = len(stats.prefix) - 1
+    start = 0 if start_date is None else (pd.Timestamp(start_date).normalize() - stats.origin).days
+    end = n_days if end_date is None else (pd.Timestamp(end_date).normalize() - stats.origin).days + 1
+    start = min(max(start, 0), n_days)
+    return start, min(max(end, start), n_days)
+
+def window_trends(stats, start_date=None, end_date=None, x_origin=None):
+    # Reta de cada série na janela [start_date, end_date] em O(1) pelas somas prefixadas.
+    # Como nos dashboards, x conta dias a partir da primeira data com valor na janela
+    # (ou de x_origin, a mesma para todas as séries)
+    start, end = _window_bounds(stats, start_date, end_date)
+    n, sum_x, sum_y, sum_xy, sum_xx, sum_yy = stats.prefix[end] - stats.prefix[start]
+
+    if x_origin is None:
+        counts = stats.prefix[:, 0, :]
+        first = np.array([np.searchsorted(counts[:, s], counts[start, s], side='right') - 1
+                          for s in range(counts.shape[1])], dtype=np.float64)
+    else:
+        first = float((pd.Timestamp(x_origin).normalize() - stats.origin).days)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sxx = sum_xx - sum_x ** 2 / n
+        sxy = sum_xy - sum_x * sum_y / n
+        syy = sum_yy - sum_y ** 2 / n
+        slope = sxy / sxx
+        intercept = (sum_y - slope * sum_x) / n + slope * first
+        ss_res = syy - slope * sxy
+        r2 = _r2(ss_res, syy, sum_yy)
+    solvable = (n > 1) & (sxx > 1e-12 * np.maximum(sum_xx, 1))
+    return pd.DataFrame({
+        'slope': np.where(solvable, slope, np.nan),
+        'intercept': np.where(solvable, intercept, np.nan),
+        'r2': np.where(solvable, r2, np.nan),
+        'points': n.astype(np.int64),
+    }, index=stats.columns)
+
+def window_trend(stats, start_date=None, end_date=None, column=None):
+    # TrendFit de uma série, para usar com predict_trend como o fit_trend
+    row = window_trends(stats, start_date, end_date).loc[stats.columns[0] if column is None else column]
+    coefficients = np.array([row['intercept'], row['slope']])
+    return TrendFit(coefficients, row['slope'], row['intercept'], row['r2'], 1)
+
+def window_trends_batched(stats, start_date=None, end_date=None, horizon=30):
+    # Mesmo resultado do fit_trends_batched (grau 1) sobre a janela, sem voltar aos dados:
+    # origem comum no primeiro dia com algum valor, só as séries com pontos na janela
+    start, end = _window_bounds(stats, start_date, end_date)
+    observed = stats.prefix[:, 0, :].sum(axis=1)
+    first_day = np.searchsorted(observed, observed[start], side='right') - 1
+    last_day = np.searchsorted(observed, observed[end], side='left') - 1
+    x_origin = stats.origin + pd.Timedelta(days=int(first_day))
+
+    trends = window_trends(stats, start_date, end_date, x_origin)
+    trends = trends[trends['points'] > 0]
+    x_pred = np.arange(0, last_day - first_day + horizon) if observed[end] > observed[start] else np.array([])
+    projection = pd.DataFrame(trends['intercept'].to_numpy() + np.outer(x_pred, trends['slope'].to_numpy()),
+                              index=pd.date_range(x_origin, periods=len(x_pred), freq='D'),
+                              columns=trends.index)
+    return BatchTrends(
+        pd.DataFrame({'c0': trends['intercept'], 'c1': trends['slope']}),
+        trends['r2'].rename('R²'),
+        trends['points'].rename('Points'),
+        projection,
+    )
@@ -0,0 +1,70 @@
+import pandas as pd
+import numpy as np
+from collections import namedtuple
+from inventoryIndex import daily_availability_index
+
+# 52 semanas: a data do ano anterior cai no mesmo dia da semana
+LAG_DAYS = 364
+
+# current[d, h] e previous[d, h] alinhados no calendário completo dates (NaN = sem coleta)
+YoYSeries = namedtuple('YoYSeries', ['current', 'previous', 'dates', 'hotels'])
+
+def align_yoy(daily, lag_days=LAG_DAYS):
+    # daily: data x hotel; monta as duas matrizes uma única vez
+    daily = daily.sort_index()
+    dates = pd.date_range(daily.index.min(), daily.index.max()) if len(daily) else pd.DatetimeIndex([])
+    current = daily.reindex(dates).to_numpy(dtype=np.float64)
+    if lag_days < 0:
+        raise ValueError(f"lag_days must be zero or positive, got {lag_days}")
+    previous = np.full_like(current, np.nan)
+    if lag_days == 0:
+        # current[:-0] seria vazio: sem defasagem, cada data é comparada com ela mesma
+        previous[:] = current
+    elif lag_days < len(dates):
+        previous[lag_days:] = current[:-lag_days]
+    return YoYSeries(current, previous, dates, pd.Index(daily.columns))
+
+def build_yoy_metrics(df, hotel_column='hotel_name', date_column='checkin_date', price_column='nightly_price',
+                      lag_days=LAG_DAYS):
+    # Preço mediano e quartos disponíveis por hotel/data, alinhados com 52 semanas antes
+    dates = pd.to_datetime(df[date_column]).dt.normalize()
+    price = pd.to_numeric(df[price_column], errors='coerce')
+    daily_price = price.groupby([dates, df[hotel_column]]).median().unstack(hotel_column)
+    daily_occupancy = daily_availability_index(df, hotel_column, date_column)
+    return {
+        'price': align_yoy(daily_price, lag_days),
+        'occupancy': align_yoy(daily_occupancy.reindex(columns=daily_price.columns), lag_days),
+    }
+
+def _period(series, start_date=None, end_date=None):
+    start = 0 if start_date is None else series.dates.searchsorted(pd.Timestamp(start_date), side='left')
+    end = len(series.dates) if end_date is None else series.dates.searchsorted(pd.Timestamp(end_date), side='right')
+    return slice(start, end)
+
+def yoy_frame(series, hotel, start_date=None, end_date=None):
+    # Série do hotel e a do ano anterior lado a lado, para o gráfico
+    period = _period(series, start_date, end_date)
+    column = series.hotels.get_loc(hotel)
+    return pd.DataFrame({
+        'Current': series.current[period, column],
+        'Last Year': series.previous[period, column],
+    }, index=series.dates[period])
+
+def yoy_summary(series, start_date=None, end_date=None):
+    # Média do período só nos dias com valor nos dois anos, para comparar igual com igual
+    period = _period(series, start_date, end_date)
+    current = series.current[period]
+    previous = series.previous[period]
+    matched = ~np.isnan(current) & ~np.isnan(previous)
+    days = matched.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        current_mean = np.where(matched, current, 0).sum(axis=0) / days
+        previous_mean = np.where(matched, previous, 0).sum(axis=0) / days
+    summary = pd.DataFrame({
+        'Matched Days': days,
+        'Current': current_mean,
+        'Last Year': previous_mean,
+    }, index=series.hotels)
+    summary['Delta'] = summary['Current'] - summary['Last Year']
+    summary['Delta %'] = summary['Delta'] / summary['Last Year'] * 100
+    return summary